@@ -0,0 +1,31 @@
+# backend/app/config.py
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# MongoDB (MONGO_URI, DB_NAME, pool / read preference / write concern) is
+# configured in src/mongo.py, shared with the main app
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+
+SUMMARIZATION_MODEL = os.getenv("SUMMARIZATION_MODEL", "sshleifer/distilbart-cnn-12-6")
+
+# Upper bound on decoded image memory held by a single upload
+PDF_MEMORY_BUDGET_MB = int(os.getenv("PDF_MEMORY_BUDGET_MB", "256"))
+
+# BM25 inverted index (snapshot + journal) kept next to the vector store
+LEXICAL_INDEX_DIR = os.getenv("LEXICAL_INDEX_DIR", os.path.join("data", "lexical_index"))
+# Journal entries before the index is compacted into a new snapshot
+LEXICAL_SNAPSHOT_EVERY = int(os.getenv("LEXICAL_SNAPSHOT_EVERY", "1000"))
+
+# Memory-mapped embedding index shared by all worker processes (src/vector_index.py)
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", os.path.join("data", "vector_index"))
+
+# Per-process LRU caches for /api/search/ (src/query_cache.py), capped in bytes
+SEARCH_EMBEDDING_CACHE_BYTES = int(os.getenv("SEARCH_EMBEDDING_CACHE_BYTES", str(8 * 1024 * 1024)))
+SEARCH_RESULT_CACHE_BYTES = int(os.getenv("SEARCH_RESULT_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+# Compressed page text storage (see src/page_store.py)
+PAGE_CODEC = os.getenv("PAGE_CODEC", "zstd")
+PAGE_COMPRESSION_LEVEL = int(os.getenv("PAGE_COMPRESSION_LEVEL", "3"))
+MAX_PAGES_PER_REQUEST = int(os.getenv("MAX_PAGES_PER_REQUEST", "50"))
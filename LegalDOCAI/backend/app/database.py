@@ -1,9 +1,29 @@
-from pymongo import MongoClient, ASCENDING
-from .config import MONGO_URI, DB_NAME
+from src import mongo
+from src.clauses import ClauseStore
+from src.entity_index import EntityIndex
+from src.near_duplicates import NearDuplicateIndex
+from src.page_store import PageStore
+from .config import PAGE_CODEC, PAGE_COMPRESSION_LEVEL
 
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-documents_collection = db["documents"]
+# Same pooled client and database as the main app (src/mongo.py: MONGO_URI,
+# DB_NAME, pool / read preference / write concern settings); search records,
+# entities and clauses have their own collections, apart from main.py's
+mongo_layer = mongo.shared()
+db = mongo_layer.db
+documents_collection = db[mongo.SEARCH_DOCUMENTS]
+pages_collection = db["pages"]
 
-# Ensure simple index on doc_id (unique)
-documents_collection.create_index([("doc_id", ASCENDING)], unique=True)
+# Compressed page text, one record per (doc_id, page)
+page_store = PageStore(pages_collection, codec=PAGE_CODEC, level=PAGE_COMPRESSION_LEVEL)
+
+# MinHash signatures + LSH band keys stored on the document records
+near_duplicates = NearDuplicateIndex(documents_collection)
+
+# Normalized entity -> documents index (plus the alias table merging spellings)
+entity_index = EntityIndex(db[mongo.SEARCH_ENTITIES], db[mongo.SEARCH_ENTITY_ALIASES])
+
+# Segmented clauses with types and page offsets, one record per clause
+clause_store = ClauseStore(db[mongo.SEARCH_CLAUSES])
+
+# Unique doc_id, hash and file type indexes on documents, then the stores'
+mongo_layer.ensure_indexes(page_store, near_duplicates, entity_index, clause_store, documents=mongo.SEARCH_DOCUMENTS)
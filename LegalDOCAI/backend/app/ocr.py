@@ -1,13 +1,16 @@
 import pytesseract
 from pdf2image import convert_from_path
 
+from src.ocr_engine import get_ocr_engine
+
 # Tell pytesseract where the exe is installed
 pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
 def extract_text_from_file(filepath: str) -> str:
     """Extract text from a PDF file using OCR."""
     images = convert_from_path(filepath)
+    engine = get_ocr_engine()
     text = ""
     for img in images:
-        text += pytesseract.image_to_string(img)
+        text += engine.image_to_string(img)
     return text
@@ -3,6 +3,8 @@ from .health import router as health_router
 from .upload import router as upload_router
 from .search import router as search_router
 from .document import router as document_router
+from .entities import router as entities_router
+from .clauses import router as clauses_router
 
 # API Router with common prefix
 router = APIRouter(prefix="/api")
@@ -13,3 +15,5 @@ router.include_router(upload_router, prefix="", tags=["upload"])
 router.include_router(search_router, prefix="", tags=["search"])
 router.include_router(search_router, prefix="", tags=["process"])
 router.include_router(document_router, prefix="", tags=["document"])
+router.include_router(entities_router, prefix="", tags=["entities"])
+router.include_router(clauses_router, prefix="", tags=["clauses"])
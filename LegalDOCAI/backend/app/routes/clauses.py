@@ -0,0 +1,38 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from backend.app.database import clause_store
+from backend.app.vectorstore import fetch_document_by_id
+from src.clauses import CLAUSE_TYPES
+
+router = APIRouter()
+
+
+# ---------------------- Clause search across documents ----------------------
+@router.get("/clauses")
+def search_clauses(
+    type: Optional[str] = Query(None, pattern="^(" + "|".join(CLAUSE_TYPES) + ")$"),
+    q: Optional[str] = Query(None, min_length=1),
+    doc_id: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    skip: int = Query(0, ge=0),
+):
+    """
+    Clause bodies of a type (e.g. type=indemnity) and/or matching a text
+    query, across the corpus. Served from the clauses collection (types
+    index + text index); full document text is never read.
+    """
+    if not type and not q and not doc_id:
+        raise HTTPException(status_code=400, detail="Provide type, q or doc_id")
+    return {"type": type, "q": q, "clauses": clause_store.search(type, q, doc_id=doc_id, limit=limit, skip=skip)}
+
+
+# ---------------------- Clauses of one document ----------------------
+@router.get("/document/{doc_id}/clauses")
+def get_document_clauses(doc_id: str):
+    """
+    Segmented clauses of a document in order, each with its heading, types
+    and (page_start, start) .. (page_end, end) offsets into the page text.
+    """
+    if not fetch_document_by_id(doc_id):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"doc_id": doc_id, "clauses": clause_store.get_clauses(doc_id)}
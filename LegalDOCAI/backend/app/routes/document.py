@@ -1,6 +1,8 @@
 from typing import Optional, Dict
 from fastapi import APIRouter, Query, HTTPException
-from backend.app.vectorstore import fetch_document_by_id
+from backend.app.config import MAX_PAGES_PER_REQUEST
+from backend.app.database import near_duplicates, page_store
+from backend.app.vectorstore import fetch_document_by_id, get_document_text
 from backend.app.summarizer import summarize_text
 
 router = APIRouter()
@@ -17,6 +19,51 @@ def get_document(doc_id: str):
     return doc
 
 
+# ---------------------- Page range of a document ----------------------
+@router.get("/document/{doc_id}/pages")
+def get_document_pages(
+    doc_id: str,
+    start: int = Query(1, alias="from", ge=1),
+    end: Optional[int] = Query(None, alias="to", ge=1),
+):
+    """
+    Fetch the text of pages from..to (1-based, inclusive) lazily from the
+    compressed page store; at most MAX_PAGES_PER_REQUEST pages per call.
+    """
+    doc: Optional[Dict] = fetch_document_by_id(doc_id)
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    last = start + MAX_PAGES_PER_REQUEST - 1
+    end = min(end, last) if end else last
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    return {
+        "doc_id": doc_id,
+        "from": start,
+        "to": end,
+        "total_pages": doc.get("total_pages") or page_store.page_count(doc_id),
+        "pages": page_store.get_pages(doc_id, start, end),
+    }
+
+
+# ---------------------- Near-duplicate documents ----------------------
+@router.get("/document/{doc_id}/near-duplicates")
+def get_near_duplicates(
+    doc_id: str,
+    min_similarity: float = Query(0.5, ge=0.0, le=1.0),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Stored documents whose estimated Jaccard similarity to doc_id (MinHash
+    over word shingles, candidates from the LSH band index) is at least
+    min_similarity, most similar first.
+    """
+    matches = near_duplicates.find(doc_id, min_similarity=min_similarity, limit=limit)
+    if matches is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"doc_id": doc_id, "near_duplicates": matches}
+
+
 # ---------------------- Document/Text summary ----------------------
 @router.get("/document/summary/")
 def get_summary(doc_id: Optional[str] = Query(None), text: Optional[str] = Query(None)):
@@ -28,7 +75,7 @@ def get_summary(doc_id: Optional[str] = Query(None), text: Optional[str] = Query
         doc: Optional[Dict] = fetch_document_by_id(doc_id)
         if not doc:
             raise HTTPException(status_code=404, detail="Document not found")
-        text_to_summarize: str = doc.get("text") or ""
+        text_to_summarize: str = get_document_text(doc_id)
     elif text:
         text_to_summarize: str = text
     else:
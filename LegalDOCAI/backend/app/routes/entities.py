@@ -0,0 +1,79 @@
+from typing import Dict, Optional
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from backend.app.database import documents_collection, entity_index
+from src.entity_index import ENTITY_KINDS
+
+router = APIRouter()
+
+KIND_PATTERN = "^(" + "|".join(ENTITY_KINDS) + ")$"
+
+
+class Alias(BaseModel):
+    kind: str
+    alias: str
+    canonical: str
+
+
+# ---------------------- Entity lookup ----------------------
+@router.get("/entities")
+def lookup_entity(
+    q: str = Query(..., min_length=1),
+    kind: str = Query("person", pattern=KIND_PATTERN),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """
+    Documents mentioning an entity. q is normalized like the stored keys
+    (case, whitespace, honorifics, company suffixes, aliases), so
+    "Mr. ARUN  Kumar" finds documents listing "Arun Kumar".
+    """
+    found: Dict = entity_index.documents(kind, q, limit=limit)
+    names = {
+        d["doc_id"]: d.get("filename")
+        for d in documents_collection.find({"doc_id": {"$in": found["doc_ids"]}}, {"_id": 0, "doc_id": 1, "filename": 1})
+    }
+    found["documents"] = [{"doc_id": d, "filename": names.get(d)} for d in found.pop("doc_ids")]
+    return found
+
+
+# ---------------------- Prefix autocomplete ----------------------
+@router.get("/entities/autocomplete")
+def autocomplete_entities(
+    prefix: str = Query(..., min_length=1),
+    kind: Optional[str] = Query(None, pattern=KIND_PATTERN),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """
+    Entities whose normalized key starts with prefix, most documents first.
+    """
+    return {"prefix": prefix, "entities": entity_index.autocomplete(prefix, kind=kind, limit=limit)}
+
+
+# ---------------------- Co-occurrence ----------------------
+@router.get("/entities/co-occurrence")
+def entity_co_occurrence(
+    q: str = Query(..., min_length=1),
+    kind: str = Query("person", pattern=KIND_PATTERN),
+    with_kind: Optional[str] = Query(None, pattern=KIND_PATTERN),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Entities (optionally of kind with_kind) found in the same documents as
+    the given entity, ranked by the number of shared documents.
+    """
+    return entity_index.co_occurring(kind, q, with_kind=with_kind, limit=limit)
+
+
+# ---------------------- Alias merging ----------------------
+@router.post("/entities/aliases")
+def add_entity_alias(alias: Alias):
+    """
+    Merge one spelling of an entity into a canonical one; stored records
+    are rewritten and later ingests use the canonical key.
+    """
+    if alias.kind not in ENTITY_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(ENTITY_KINDS)}")
+    try:
+        return entity_index.add_alias(alias.kind, alias.alias, alias.canonical)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,16 +1,22 @@
 from typing import List, Dict
 from fastapi import APIRouter, Query
-from backend.app.vectorstore import search, fetch_document_by_id
+from backend.app.vectorstore import SEARCH_MODES, cache_stats, search, fetch_document_by_id
 
 router = APIRouter()
 
 @router.get("/search/")
-def search_documents(q: str = Query(..., min_length=1), k: int = 5):
+def search_documents(
+    q: str = Query(..., min_length=1),
+    k: int = 5,
+    mode: str = Query("vector", pattern="^(" + "|".join(SEARCH_MODES) + ")$"),
+):
     """
-    Perform semantic search on documents.
-    q = query (required), k = number of top results (default=5).
+    Perform semantic, keyword (BM25) or hybrid search on documents.
+    q = query (required), k = number of top results (default=5),
+    mode = vector | lexical | hybrid. Wrap exact wording in double quotes
+    ("governing law") to require the phrase in lexical/hybrid mode.
     """
-    hits: List[Dict] = search(q, top_k=k)
+    hits: List[Dict] = search(q, top_k=k, mode=mode)
     expanded: List[Dict] = []
 
     for h in hits:
@@ -19,7 +25,13 @@ def search_documents(q: str = Query(..., min_length=1), k: int = 5):
             "doc_id": h.get("doc_id"),
             "score": h.get("score"),
             "filename": doc.get("filename"),
-            "text_preview": (doc.get("text") or "")[:400],
+            "text_preview": (doc.get("text_preview") or doc.get("text") or "")[:400],
         })
 
-    return {"query": q, "results": expanded}
+    return {"query": q, "mode": mode, "results": expanded}
+
+
+@router.get("/search/cache")
+def search_cache_stats():
+    """Hit rate, entries and bytes of the query-embedding and search-result caches."""
+    return cache_stats()
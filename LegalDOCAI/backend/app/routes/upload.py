@@ -1,8 +1,13 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from backend.app import processing, vectorstore
+from fastapi.concurrency import run_in_threadpool
+from backend.app import processing
+from src.pipeline import PipelineJob
 
 router = APIRouter()
 
+# ingest -> extract -> OCR -> embed -> persist (no NLP/LLM on this API)
+UPLOAD_STAGES = ("ingest", "extract", "ocr", "embed", "persist")
+
 @router.post("/upload/")
 async def upload_file(file: UploadFile = File(...)):
     """
@@ -15,27 +20,22 @@ async def upload_file(file: UploadFile = File(...)):
     filename: str = file.filename or "uploaded_file"
     file_bytes = await file.read()
 
-    # Process file -> returns dict with combined_text and OCR results
-    result: dict = processing.process_uploaded_file_bytes(file_bytes, filename)
+    # Run the shared pipeline in a worker thread (OCR, embedding and the Mongo
+    # writes of the persist stage would otherwise block the event loop)
+    job = PipelineJob(filename, file_bytes)
+    try:
+        await run_in_threadpool(processing.pipeline.run, job, UPLOAD_STAGES)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to process file: {e}")
 
     # Make sure combined_text is str
-    combined_text: str = str(result.get("combined_text") or "")
-
-    # Prepare document for vector store
-    doc = {
-        "filename": filename,
-        "combined_text": combined_text,
-        "metadata": {"source_filename": filename},
-    }
-
-    # Store document
-    doc_id = vectorstore.add_document(doc)
+    combined_text: str = job.full_text.strip()
 
     # Safe count of OCR texts
-    ocr_texts = list(result.get("ocr_texts", []))
+    ocr_texts = processing.ocr_texts_of(job)
 
     return {
-        "doc_id": doc_id,
+        "doc_id": job.doc_id,
         "filename": filename,
         "text_preview": combined_text[:500],
         "ocr_texts_count": len(ocr_texts),
@@ -1,8 +1,34 @@
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
+import threading
 import uuid
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from .database import documents_collection
+from src.clauses import segment_clauses
+from src.lexical_index import LexicalIndex, parse_query, reciprocal_rank_fusion
+from src.near_duplicates import minhash, signature_fields
+from src.query_cache import ByteLRUCache
+from src.vector_index import VectorIndex
+from .config import (
+    LEXICAL_INDEX_DIR,
+    LEXICAL_SNAPSHOT_EVERY,
+    SEARCH_EMBEDDING_CACHE_BYTES,
+    SEARCH_RESULT_CACHE_BYTES,
+    VECTOR_INDEX_DIR,
+)
+from .database import clause_store, documents_collection, entity_index, page_store
+
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+# characters of text kept on the document record itself
+TEXT_PREVIEW_CHARS = 500
+# each ranking feeding the fusion contributes this many candidates per result
+HYBRID_CANDIDATES_PER_RESULT = 4
+
+_lexical_index: Optional[LexicalIndex] = None
+_lexical_lock = threading.Lock()
+_vector_index: Optional[VectorIndex] = None
+_vector_lock = threading.Lock()
+
+# query text -> embedding, and (query, top_k, mode, index generation) -> hits
+_embedding_cache = ByteLRUCache("embedding", SEARCH_EMBEDDING_CACHE_BYTES)
+_result_cache = ByteLRUCache("results", SEARCH_RESULT_CACHE_BYTES)
 
 # NOTE: replace this with your real embedding model (SentenceTransformer) when ready.
 # For now we provide a small deterministic placeholder embedding so code runs without heavy installs.
@@ -26,69 +52,162 @@ def embed_texts(texts: List[str]) -> List[List[float]]:
 def add_document(doc: Dict[str, Any]) -> str:
     """
     Upsert document into MongoDB with computed embedding vector.
-    doc expects keys: filename, combined_text (or text), metadata (optional)
+    doc expects keys: filename, combined_text (or text), metadata (optional),
+    vector (optional, precomputed by the pipeline embed stage), analytics (optional),
+    pages (optional list of {"page", "text"}; defaults to the whole text as page 1),
+    pipeline_version (optional {stage: version} of the stages that produced it),
+    minhash (optional, precomputed near-duplicate signature),
+    entities (optional results_summary-style {"names": [...], ...} for the entity index),
+    clauses (optional src.clauses.segment_clauses output; segmented here when missing)
+    Page text goes to the page store; the record keeps a short text_preview.
     Returns generated doc_id.
     """
     doc_id = doc.get("doc_id") or str(uuid.uuid4())
     text = doc.get("combined_text") or doc.get("text") or ""
-    vector_list = embed_texts([text])[0] if text else []
+    vector_list = doc.get("vector")
+    if vector_list is None:
+        vector_list = embed_texts([text])[0] if text else []
+    pages = doc.get("pages") or [{"page": 1, "text": text}]
+    total_pages = page_store.put_pages(doc_id, ((p["page"], p["text"]) for p in pages))
     db_doc = {
         "doc_id": doc_id,
         "filename": doc.get("filename"),
-        "text": text,
+        "text_preview": text[:TEXT_PREVIEW_CHARS],
+        "total_pages": total_pages,
         "metadata": doc.get("metadata", {}),
         "vector": vector_list,
+        **signature_fields(doc["minhash"] if doc.get("minhash") is not None else minhash(text)),
     }
-    documents_collection.update_one({"doc_id": doc_id}, {"$set": db_doc}, upsert=True)
+    if doc.get("analytics"):
+        db_doc["analytics"] = doc["analytics"]
+    if doc.get("pipeline_version"):
+        db_doc["pipeline_version"] = doc["pipeline_version"]
+    documents_collection.update_one({"doc_id": doc_id}, {"$set": db_doc, "$unset": {"text": ""}}, upsert=True)
+    get_lexical_index().add(doc_id, text)
+    if vector_list:
+        get_vector_index().add(doc_id, vector_list)
+    # the generation bump already makes cached results unreachable; free them now
+    _result_cache.clear()
+    if doc.get("entities"):
+        entity_index.index_document(doc_id, doc["entities"])
+    clauses = doc.get("clauses")
+    if clauses is None:
+        clauses = segment_clauses(p["text"] for p in pages)
+    clause_store.put_clauses(doc_id, clauses, doc.get("filename"))
     return doc_id
 
 
-def get_all_vectors_and_ids() -> Tuple[List[str], np.ndarray]:
+def get_document_text(doc_id: str) -> str:
+    """Full text of a stored document (page store; legacy records kept it inline)."""
+    text = page_store.get_text(doc_id)
+    if text:
+        return text
+    doc = documents_collection.find_one({"doc_id": doc_id}, {"_id": 0, "text": 1}) or {}
+    return doc.get("text") or ""
+
+
+def get_lexical_index() -> LexicalIndex:
     """
-    Retrieve (ids_list, vectors_array) from MongoDB.
-    Returns vectors as numpy.ndarray of shape (n_docs, dim). If no vectors, returns empty array shape (0, dim).
+    BM25 index in LEXICAL_INDEX_DIR, shared by all workers (one writer at a
+    time; each process picks up the others' additions before searching).
+    An empty index is backfilled from the documents already in MongoDB.
     """
-    docs = list(documents_collection.find({}, {"doc_id": 1, "vector": 1}))
-    ids = [d["doc_id"] for d in docs]
-    vecs = [d.get("vector", []) for d in docs]
-    if not vecs:
-        return ids, np.zeros((0, 0))
-    # ensure numeric arrays
-    try:
-        arr = np.array(vecs, dtype=float)
-    except Exception:
-        # fallback: empty
-        arr = np.zeros((0, 0))
-    return ids, arr
-
-
-def search(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    global _lexical_index
+    with _lexical_lock:
+        if _lexical_index is None:
+            index = LexicalIndex(LEXICAL_INDEX_DIR, snapshot_every=LEXICAL_SNAPSHOT_EVERY)
+            if not len(index):
+                for d in documents_collection.find({}, {"doc_id": 1}):
+                    index.add(d["doc_id"], get_document_text(d["doc_id"]))
+                index.save()
+            _lexical_index = index
+        return _lexical_index
+
+
+def get_vector_index() -> VectorIndex:
     """
-    Search for documents similar to the query string.
+    Memory-mapped embedding index in VECTOR_INDEX_DIR, shared by all workers.
+    An empty index is rebuilt from the vectors stored on the MongoDB records.
+    """
+    global _vector_index
+    with _vector_lock:
+        if _vector_index is None:
+            index = VectorIndex(VECTOR_INDEX_DIR)
+            if not len(index):
+                index.rebuild(
+                    (d["doc_id"], d.get("vector"))
+                    for d in documents_collection.find({"vector": {"$ne": []}}, {"_id": 0, "doc_id": 1, "vector": 1})
+                )
+            _vector_index = index
+        return _vector_index
+
+
+def index_generation() -> Tuple[int, Tuple[int, int]]:
+    """Changes whenever either index does (vector writes by other workers included)."""
+    return get_lexical_index().generation, get_vector_index().generation
+
+
+def embed_query(query: str) -> List[float]:
+    """Query embedding, from the LRU cache when the same text was embedded before."""
+    vector = _embedding_cache.get(query)
+    if vector is None:
+        vector = embed_texts([query])[0]
+        _embedding_cache.put(query, vector)
+    return vector
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hits, misses, hit rate and size of the search caches."""
+    return {"embedding": _embedding_cache.stats(), "results": _result_cache.stats()}
+
+
+def search(query: str, top_k: int = 5, mode: str = "vector") -> List[Dict[str, Any]]:
+    """
+    Search documents. mode is "vector" (embedding similarity), "lexical"
+    (BM25; "quoted phrases" must match exactly) or "hybrid" (reciprocal
+    rank fusion of both rankings).
+    Results are cached per (query, top_k, mode, index generation).
     Returns list of {doc_id, score}.
     """
     if not query:
         return []
+    key = (query, top_k, mode, index_generation())
+    hits = _result_cache.get(key)
+    if hits is None:
+        hits = _search(query, top_k, mode)
+        _result_cache.put(key, hits)
+    return hits
 
-    q_vec = embed_texts([query])[0]
-    ids, X = get_all_vectors_and_ids()
-    if X.size == 0:
-        return []
 
-    q_np = np.array([q_vec], dtype=float)  # shape (1, d)
-    # If shapes mismatch, try to pad or return empty
-    if q_np.shape[1] != X.shape[1]:
-        # shape mismatch: cannot compare
+def _search(query: str, top_k: int, mode: str) -> List[Dict[str, Any]]:
+    if mode == "lexical":
+        return get_lexical_index().search(query, top_k=top_k)
+    if mode == "hybrid":
+        n = top_k * HYBRID_CANDIDATES_PER_RESULT
+        lexical = get_lexical_index().search(query, top_k=n)
+        vector = vector_search(query, top_k=n)
+        if parse_query(query)[1]:
+            # quoted phrases are a hard filter in hybrid mode too
+            matched = {h["doc_id"] for h in lexical}
+            vector = [h for h in vector if h["doc_id"] in matched]
+        return reciprocal_rank_fusion([vector, lexical], top_k=top_k)
+    return vector_search(query, top_k=top_k)
+
+
+def vector_search(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    """
+    Search for documents similar to the query string.
+    Returns list of {doc_id, score}.
+    """
+    if not query:
         return []
 
-    sims = cosine_similarity(q_np, X)[0]  # shape (n_docs,)
-    paired = list(zip(ids, sims.tolist()))
-    paired.sort(key=lambda x: x[1], reverse=True)
-    results = [{"doc_id": pid, "score": float(score)} for pid, score in paired[:top_k]]
-    return results
+    q_vec = embed_query(query)
+    # cosine similarity over the memory-mapped index (mismatched dimensions -> [])
+    return get_vector_index().search(q_vec, top_k=top_k)
 
 
 def fetch_document_by_id(doc_id: str) -> Dict[str, Any]:
-    """Return stored document (omit _id)."""
-    doc = documents_collection.find_one({"doc_id": doc_id}, {"_id": 0})
+    """Return stored document metadata (omit _id, the embedding vector and MinHash fields)."""
+    doc = documents_collection.find_one({"doc_id": doc_id}, {"_id": 0, "vector": 0, "minhash": 0, "lsh_bands": 0})
     return doc or {}
@@ -0,0 +1,92 @@
+# benchmarks/analysis_profiles.py
+"""
+Pages per second of the analyze + verify stages for each analysis profile.
+
+Synthetic contract pages (parties, emails, phones, numbered clauses) are
+analyzed with src.pipeline exactly as an upload would after extraction;
+extraction/OCR cost is the same for every profile and left out. The full
+profile verifies through src.llm_client against benchmarks/fake_openai.py
+(--llm-latency-ms), standard uses no LLM and triage skips NER, the parser
+and verification.
+
+Needs the spaCy model (python -m spacy download en_core_web_sm). Run from
+the LegalDOCAI folder:
+    python -m benchmarks.analysis_profiles --docs 20 --pages 10
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_openai import serve_in_thread  # noqa: E402
+from src.llm_client import LLMClient  # noqa: E402
+from src.pipeline import ANALYSIS_PROFILES, Pipeline, PipelineJob  # noqa: E402
+
+PARTIES = ["Arun Kumar", "Priya Sharma", "Acme Pvt Ltd", "Globex Corporation", "John Smith"]
+CLAUSES = ["Termination", "Confidentiality", "Liability", "Payment", "Indemnity", "Governing Law", "Warranty"]
+
+
+def make_page(rng: random.Random, n: int) -> str:
+    a, b = rng.sample(PARTIES, 2)
+    lines = [f"{n}. {rng.choice(CLAUSES)}"]
+    for _ in range(12):
+        lines.append(
+            f"{a} and {b} agree that the obligation under this agreement continues until "
+            f"{rng.randint(1, 28)}/{rng.randint(1, 12)}/2025; notices go to {a.split()[0].lower()}@example.com "
+            f"or +91 98{rng.randint(10000000, 99999999)}. Payment is due within {rng.randint(7, 60)} days."
+        )
+    lines.append(f"Signed by {a}")
+    return "\n".join(lines)
+
+
+def run_profile(pipeline: Pipeline, profile: str, docs, repeat: int) -> float:
+    pages = 0
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for i, texts in enumerate(docs):
+            job = PipelineJob(f"doc{i}.pdf", b"", profile=profile)
+            job.file_type = "pdf"
+            job.pages = [{"page": n, "text": t, "ocr_texts": []} for n, t in enumerate(texts, start=1)]
+            pipeline.run(job, ("analyze", "verify"))
+            pages += len(texts)
+    return pages / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=10, help="pages per document")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    serve_in_thread(args.port, latency_ms=args.llm_latency_ms, jitter_ms=args.llm_latency_ms / 5)
+    llm = LLMClient(api_key="sk-fake", model="fake", base_url=f"http://127.0.0.1:{args.port}/v1")
+
+    def verifier(text, deadline):
+        raw = llm.chat([{"role": "user", "content": text[:2000]}], deadline=deadline, max_tokens=50)
+        return {"marker": "✅ LEGAL" if "LEGAL" in raw and "UNVERIFIED" not in raw else "❌ UNVERIFIED",
+                "ai_confidence": None, "raw": raw}
+
+    rng = random.Random(0)
+    docs = [[make_page(rng, n) for n in range(1, args.pages + 1)] for _ in range(args.docs)]
+    # jobs built from text have no content hash, so the stage cache is never used
+    pipeline = Pipeline(verifier=verifier)
+    pipeline.nlp_loader()
+    pipeline.light_nlp_loader()
+
+    print(f"{args.docs} documents x {args.pages} pages, LLM latency {args.llm_latency_ms:.0f} ms")
+    baseline = None
+    for profile in ANALYSIS_PROFILES:
+        rate = run_profile(pipeline, profile, docs, args.repeat)
+        baseline = baseline or rate
+        print(f"  {profile:9s} {rate:9.1f} pages/s  ({rate / baseline:5.2f}x triage)")
+    llm.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# benchmarks/cancellation.py
+"""
+Simulated client disconnects: how quickly a cancelled upload stops working.
+
+Runs the whole pipeline on a scanned PDF (no text layer, so every page is
+OCRed) in a worker thread, the way main.upload_file does, and cancels the
+job's Deadline part-way through, which is what main.cancel_on_disconnect
+does when the client goes away. OCR is a stand-in engine that sleeps
+--ocr-ms per page (no tesseract needed) and the LLM verifier calls
+benchmarks/fake_openai.py with --llm-latency-ms.
+
+For each disconnect point the script prints how long the job kept running
+after the cancel, the stage it stopped in, the pages OCRed out of the
+total, and the cancellation counters (src.metrics, LLM client stats), and
+checks that the job stopped within --max-stop-ocr OCR pages plus one
+cancellation poll, ended in RequestCancelled, left pages un-OCRed (OCR
+disconnects) and bumped the pipeline.cancelled.* counters (and the LLM
+client's "cancelled" count for the LLM disconnect). Exits with status 1
+when a check fails.
+
+Needs the spaCy model (python -m spacy download en_core_web_sm). Run from
+the LegalDOCAI folder:
+    python -m benchmarks.cancellation --pages 40 --ocr-ms 50
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import fitz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_openai import serve_in_thread  # noqa: E402
+from src import metrics, ocr_engine  # noqa: E402
+from src.llm_client import CANCEL_POLL_SECONDS, Deadline, LLMClient, LLMUnavailable, RequestCancelled  # noqa: E402
+from src.pipeline import Pipeline, PipelineJob, StageCache  # noqa: E402
+
+
+class SleepingOCR(ocr_engine.OCREngine):
+    """Takes `seconds` per image and returns a fixed contract paragraph."""
+
+    name = "sleeping"
+
+    def __init__(self, seconds: float):
+        super().__init__()
+        self.seconds = seconds
+        self.pages = 0
+
+    def _recognize(self, image) -> str:
+        time.sleep(self.seconds)
+        self.pages += 1
+        return "This Agreement is made between Arun Kumar and Acme Pvt Ltd. Payment is due within 30 days."
+
+
+def scanned_pdf(pages: int) -> bytes:
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page(width=300, height=400)
+        page.draw_rect(fitz.Rect(20, 20, 280, 380), color=(0, 0, 0))
+    return doc.tobytes()
+
+
+def run_once(pipeline: Pipeline, source: bytes, engine: SleepingOCR, cancel_after: float):
+    """(seconds after cancel until run() returned, outcome, pages OCRed, exception raised or None)"""
+    time.sleep(2 * engine.seconds)  # let OCR still in flight from the previous run finish
+    engine.pages = 0
+    job = PipelineJob("scan.pdf", source, profile="full")
+    job.deadline = Deadline(None)
+    outcome = {"error": None}
+
+    def work():
+        try:
+            pipeline.run(job)
+            outcome["result"] = "completed"
+        except LLMUnavailable as e:
+            outcome["result"] = f"{type(e).__name__}: {e}"
+            outcome["error"] = e
+        outcome["ended"] = time.perf_counter()
+
+    t0 = time.perf_counter()
+    worker = threading.Thread(target=work)
+    worker.start()
+    cancelled_at = None
+    if cancel_after is not None:
+        worker.join(cancel_after)
+        cancelled_at = time.perf_counter()
+        job.deadline.cancel("client disconnected")
+    worker.join()
+    after = outcome["ended"] - (cancelled_at or t0)
+    return after, outcome["result"], engine.pages, outcome["error"]
+
+
+def cancelled_counts(llm: LLMClient):
+    """(sum of the pipeline.cancelled.* counters, LLM client cancelled calls)"""
+    counters = metrics.snapshot()["counters"]
+    return sum(v for k, v in counters.items() if k.startswith("pipeline.cancelled.")), llm.stats["cancelled"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--ocr-ms", type=float, default=50)
+    parser.add_argument("--ocr-workers", type=int, default=2)
+    parser.add_argument("--llm-latency-ms", type=float, default=3000)
+    parser.add_argument("--port", type=int, default=8768)
+    parser.add_argument("--max-stop-ocr", type=float, default=3,
+                        help="allowed stop time after a cancel, in OCR pages (plus one cancellation poll)")
+    args = parser.parse_args()
+
+    serve_in_thread(args.port, latency_ms=args.llm_latency_ms, jitter_ms=0)
+    llm = LLMClient(api_key="sk-fake", model="fake", base_url=f"http://127.0.0.1:{args.port}/v1", timeout=30)
+
+    def verifier(text, deadline):
+        raw = llm.chat([{"role": "user", "content": text[:2000]}], deadline=deadline, max_tokens=50)
+        return {"marker": "✅ LEGAL" if "LEGAL" in raw else "❌ UNVERIFIED", "ai_confidence": None, "raw": raw}
+
+    engine = SleepingOCR(args.ocr_ms / 1000)
+    ocr_engine._engine = engine
+    pipeline = Pipeline(verifier=verifier, cache=StageCache(0))
+    pipeline.stages["ocr"].concurrency = args.ocr_workers
+    pipeline.nlp_loader()
+    source = scanned_pdf(args.pages)
+
+    full, result, pages, _ = run_once(pipeline, source, engine, None)
+    ocr_seconds = args.pages * args.ocr_ms / 1000 / args.ocr_workers
+    print(f"{args.pages} scanned pages, {args.ocr_ms:.0f} ms OCR x {args.ocr_workers} workers, "
+          f"LLM latency {args.llm_latency_ms:.0f} ms")
+    print(f"  {'no disconnect':24s} ran {full:6.2f}s  {result}, {pages}/{args.pages} pages OCRed")
+    # (label, seconds until the disconnect, whether it lands in the OCR stage)
+    points = [
+        ("disconnect early in OCR", 0.1 * ocr_seconds, True),
+        ("disconnect late in OCR", 0.8 * ocr_seconds, True),
+        ("disconnect during LLM", ocr_seconds + args.llm_latency_ms / 2000, False),
+    ]
+    max_stop = args.max_stop_ocr * args.ocr_ms / 1000 + CANCEL_POLL_SECONDS
+    failures = []
+    for label, at, in_ocr in points:
+        pipeline_before, llm_before = cancelled_counts(llm)
+        after, result, pages, error = run_once(pipeline, source, engine, at)
+        pipeline_after, llm_after = cancelled_counts(llm)
+        print(f"  {label:24s} stopped {after * 1000:6.0f} ms after cancel  {result[:60]}, "
+              f"{pages}/{args.pages} pages OCRed")
+        if after > max_stop:
+            failures.append(f"{label}: stopped {after * 1000:.0f} ms after cancel (limit {max_stop * 1000:.0f} ms)")
+        if not isinstance(error, RequestCancelled):
+            failures.append(f"{label}: ended with {result!r}, not RequestCancelled")
+        if in_ocr and pages >= args.pages:
+            failures.append(f"{label}: all {pages} pages were OCRed")
+        if pipeline_after <= pipeline_before:
+            failures.append(f"{label}: pipeline.cancelled.* counters did not increase")
+        if not in_ocr and llm_after <= llm_before:
+            failures.append(f"{label}: LLM client cancelled count did not increase")
+    counters = {k: v for k, v in metrics.snapshot()["counters"].items() if k.startswith("pipeline.")}
+    print(f"  counters: {counters}  llm: {llm.health()}")
+    llm.close()
+    for failure in failures:
+        print(f"  FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print("  OK: every disconnect stopped the job")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+# benchmarks/common.py
+"""Helpers shared by the benchmark scripts (Linux only)."""
+import multiprocessing as mp
+from typing import Any, Callable
+
+
+def peak_rss_mib() -> float:
+    """Peak resident set size of the current process in MiB."""
+    # VmHWM is reset on exec, unlike ru_maxrss which inherits the parent's peak
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _call(fn: Callable[..., Any], args: tuple, queue) -> None:
+    queue.put((fn(*args), peak_rss_mib()))
+
+
+def run_isolated(fn: Callable[..., Any], *args: Any):
+    """Run fn(*args) in a fresh interpreter; return (result, peak_rss_mib)."""
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_call, args=(fn, args, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
@@ -0,0 +1,100 @@
+# benchmarks/fake_openai.py
+"""
+Local stand-in for the OpenAI chat completions API.
+
+Answers POST /v1/chat/completions with a verification-style JSON verdict
+after a configurable latency, and injects 429 / 500 errors at configurable
+rates. Knobs can be changed while running with POST /_control (same field
+names as the CLI flags), which tests use to simulate an outage.
+
+Run from the LegalDOCAI folder and point the app at it:
+    python -m benchmarks.fake_openai --port 8765 --latency-ms 300 --error-rate 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 uvicorn main:app
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+knobs: Dict[str, float] = {
+    "latency_ms": 200.0,
+    "jitter_ms": 50.0,
+    "error_rate": 0.0,        # fraction of calls answered with HTTP 500
+    "rate_limit_rate": 0.0,   # fraction of calls answered with HTTP 429
+    "retry_after": 0.0,       # Retry-After seconds sent with 429s (0 = none)
+}
+counters: Dict[str, int] = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0}
+
+app = FastAPI(title="fake-openai")
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    counters["requests"] += 1
+    await asyncio.sleep(max(0.0, knobs["latency_ms"] + random.uniform(-1, 1) * knobs["jitter_ms"]) / 1000)
+    roll = random.random()
+    if roll < knobs["rate_limit_rate"]:
+        counters["rate_limited"] += 1
+        headers = {"retry-after": str(knobs["retry_after"])} if knobs["retry_after"] else {}
+        return JSONResponse({"error": {"message": "Rate limit reached", "type": "rate_limit"}}, status_code=429, headers=headers)
+    if roll < knobs["rate_limit_rate"] + knobs["error_rate"]:
+        counters["errors"] += 1
+        return JSONResponse({"error": {"message": "Upstream failure", "type": "server_error"}}, status_code=500)
+    counters["ok"] += 1
+    prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+    legal = any(w in prompt.lower() for w in ("agreement", "contract", "hereby"))
+    content = f'{{"status": "{"LEGAL" if legal else "UNVERIFIED"}", "confidence": {random.randint(60, 95)}}}'
+    return {
+        "id": f"chatcmpl-fake-{counters['requests']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 12, "total_tokens": len(prompt) // 4 + 12},
+    }
+
+
+@app.post("/_control")
+async def control(update: Dict[str, float]):
+    knobs.update({k: float(v) for k, v in update.items() if k in knobs})
+    return {"knobs": knobs, "counters": counters}
+
+
+@app.get("/_stats")
+async def stats():
+    return {"knobs": knobs, "counters": counters}
+
+
+def serve_in_thread(port: int, **settings: Any):
+    """Start the fake server in a daemon thread; returns the uvicorn.Server."""
+    import uvicorn
+
+    knobs.update(settings)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline: Optional[float] = time.time() + 10
+    while not server.started and time.time() < deadline:
+        time.sleep(0.02)
+    return server
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    for name, default in knobs.items():
+        parser.add_argument("--" + name.replace("_", "-"), type=float, default=default)
+    args = parser.parse_args()
+    knobs.update({name: getattr(args, name) for name in knobs})
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
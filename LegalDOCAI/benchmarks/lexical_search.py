@@ -0,0 +1,112 @@
+# benchmarks/lexical_search.py
+"""
+BM25 query latency of src.lexical_index at growing corpus sizes.
+
+Generates contract-like synthetic documents (Zipf-distributed vocabulary
+plus section numbers, party names and legal phrases), indexes them
+incrementally, and at each size reports index build rate, snapshot size
+and p50/p95 latency for single-term, multi-term and phrase queries. The
+old linear substring scan (src/vector_search.py style) is timed for
+comparison.
+
+Run from the LegalDOCAI folder:
+    python -m benchmarks.lexical_search --sizes 10000 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.lexical_index import SNAPSHOT_FILE, LexicalIndex  # noqa: E402
+
+PHRASES = [
+    "governing law", "confidential information", "force majeure", "receiving party",
+    "termination for convenience", "limitation of liability", "intellectual property rights",
+]
+PARTIES = ["Acme Properties Pvt Ltd", "Arun Kumar", "Chennai Logistics LLP", "Priya Raman", "Globex India"]
+
+
+def make_corpus(n_docs: int, doc_tokens: int, vocab_size: int = 30000, seed: int = 7):
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(vocab_size)]
+    weights = [1.0 / (i + 1) for i in range(vocab_size)]
+    for n in range(n_docs):
+        words = rng.choices(vocab, weights=weights, k=doc_tokens)
+        for _ in range(3):
+            at = rng.randrange(len(words))
+            words[at:at] = rng.choice(PHRASES + PARTIES).split()
+        words.insert(rng.randrange(len(words)), f"section {rng.randint(1, 40)}.{rng.randint(1, 9)}")
+        yield f"doc-{n}", " ".join(words)
+
+
+QUERIES = {
+    "term (common)": ["term3", "term10", "term25"],
+    "term (rare)": ["term18000", "term25011", "section 12.3"],
+    "multi-term": ["governing law india term40", "payment term7 term900 liability"],
+    "phrase": ['"governing law"', '"arun kumar" "force majeure"', '"limitation of liability" term12'],
+}
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(q * (len(samples) - 1))))]
+
+
+def time_queries(fn, queries, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        for q in queries:
+            t0 = time.perf_counter()
+            fn(q)
+            samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), percentile(samples, 0.95)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--doc-tokens", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    path = tempfile.mkdtemp(prefix="lexical_bench_")
+    index = LexicalIndex(path, snapshot_every=10**9)
+    texts = []
+    corpus = make_corpus(max(args.sizes), args.doc_tokens)
+    built = 0
+    for size in sorted(args.sizes):
+        t0, start = time.perf_counter(), built
+        for doc_id, text in corpus:
+            index.add(doc_id, text)
+            texts.append(text.lower())
+            built += 1
+            if built >= size:
+                break
+        build_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        index.save()
+        save_s = time.perf_counter() - t0
+        snap_mb = os.path.getsize(os.path.join(path, SNAPSHOT_FILE)) / 2**20
+        raw_mb = sum(len(t) for t in texts) / 2**20
+        print(f"\n== {size} documents: {(built - start) / build_s:.0f} docs/s incremental indexing, "
+              f"snapshot {snap_mb:.1f} MiB for {raw_mb:.1f} MiB of text, saved in {save_s:.1f}s")
+        print(f"{'query':16s} {'bm25 p50 ms':>12s} {'bm25 p95 ms':>12s} {'scan p50 ms':>12s}")
+        for name, queries in QUERIES.items():
+            p50, p95 = time_queries(lambda q: index.search(q, top_k=args.top_k), queries, args.repeat)
+            scan = lambda q: [t for t in texts if q.strip('"').split('"')[0].lower() in t][:args.top_k]  # noqa: E731
+            s50, _ = time_queries(scan, queries, 1)
+            print(f"{name:16s} {p50:12.2f} {p95:12.2f} {s50:12.2f}")
+
+    t0 = time.perf_counter()
+    LexicalIndex(path)
+    print(f"\nreload of {built} documents from snapshot: {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
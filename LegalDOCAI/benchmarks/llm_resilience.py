@@ -0,0 +1,82 @@
+# benchmarks/llm_resilience.py
+"""
+Exercise src.llm_client against benchmarks/fake_openai.py.
+
+Scenarios (each prints wall time, outcomes and client stats):
+  healthy        - all calls succeed
+  flaky          - 30% HTTP 500 / 20% HTTP 429, retried with jittered backoff
+  outage         - every call fails; the breaker opens and later calls are
+                   skipped immediately
+  slow upstream  - 3 s latency against a 0.5 s request deadline
+  concurrency    - 40 parallel calls through a semaphore of 4
+
+Run from the LegalDOCAI folder:
+    python -m benchmarks.llm_resilience
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_openai import knobs, serve_in_thread  # noqa: E402
+from src.llm_client import Deadline, LLMClient  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "Verify: this Agreement is made between ..."}]
+
+
+def run_scenario(name: str, client: LLMClient, calls: int, deadline_s=None, parallel: bool = False) -> None:
+    async def one():
+        try:
+            await client.achat(MESSAGES, deadline=Deadline(deadline_s), max_tokens=20)
+            return "ok"
+        except Exception as e:
+            return type(e).__name__
+
+    async def all_calls():
+        if parallel:
+            return await asyncio.gather(*(one() for _ in range(calls)))
+        return [await one() for _ in range(calls)]
+
+    t0 = time.perf_counter()
+    outcomes = asyncio.run(all_calls())
+    print(f"{name:14s} {time.perf_counter() - t0:6.2f}s  {dict(Counter(outcomes))}  {client.health()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    serve_in_thread(args.port, latency_ms=50, jitter_ms=10)
+    base_url = f"http://127.0.0.1:{args.port}/v1"
+
+    def client(**kw):
+        settings = dict(api_key="sk-fake", model="fake", base_url=base_url, timeout=2.0, max_retries=3,
+                        backoff_base=0.1, breaker_failures=3, breaker_reset_seconds=1.0)
+        settings.update(kw)
+        return LLMClient(**settings)
+
+    run_scenario("healthy", client(), 10)
+
+    knobs.update(error_rate=0.3, rate_limit_rate=0.2)
+    run_scenario("flaky", client(), 20)
+
+    knobs.update(error_rate=1.0, rate_limit_rate=0.0)
+    c = client()
+    run_scenario("outage", c, 10)
+    knobs.update(error_rate=0.0)
+    time.sleep(1.1)
+    run_scenario("recovered", c, 3)
+
+    knobs.update(latency_ms=3000)
+    run_scenario("slow upstream", client(), 3, deadline_s=0.5)
+
+    knobs.update(latency_ms=100, jitter_ms=0)
+    run_scenario("concurrency", client(max_concurrency=4), 40, parallel=True)
+
+
+if __name__ == "__main__":
+    main()
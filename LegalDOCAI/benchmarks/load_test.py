@@ -0,0 +1,241 @@
+# benchmarks/load_test.py
+"""
+End-to-end load test of the API with local stand-ins for OpenAI and MongoDB.
+
+Starts three processes:
+  - benchmarks/fake_openai.py with --llm-latency-ms / --llm-error-rate
+  - the app (main:app with the backend routers mounted under /api, so
+    /api/search/ is served too) under uvicorn, pointed at the fake OpenAI
+    server and, unless --mongo-uri is given, at an in-memory mongomock
+    client (sync and async); it runs in a scratch directory so uploads and index files do
+    not touch the working tree
+  - this one, which uploads every sample file once (so history and search
+    have data) and then replays a weighted mix of traffic from
+    --concurrency clients for --duration seconds:
+
+      upload   POST /upload with one of the sample files
+      search   GET  /api/search/ (lexical / hybrid)
+      history  GET  /history
+      ai       POST /api/ai-response
+
+For each endpoint it reports requests, errors (transport failures, HTTP
+>= 400, and ai-response answers reporting an OpenAI failure), error rate,
+throughput and latency p50 / p95 / p99 / max, followed by the fake
+OpenAI counters and the app's own upload timings (GET /metrics).
+
+Needs the spaCy model (python -m spacy download en_core_web_sm) and
+mongomock (pip install mongomock mongomock-motor) unless --mongo-uri
+points at a real server. Run from the LegalDOCAI folder:
+    python -m benchmarks.load_test --concurrency 8 --duration 30 --mix upload=1,search=4,history=2,ai=2
+"""
+import argparse
+import asyncio
+import glob
+import multiprocessing as mp
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.metrics import Metrics  # noqa: E402
+
+DEFAULT_MIX = "upload=1,search=4,history=2,ai=2"
+SAMPLE_EXTENSIONS = (".pdf", ".docx", ".xlsx", ".txt")
+SEARCH_QUERIES = ["payment terms", "governing law", "termination notice", "confidentiality", '"this agreement"',
+                  "liability", "indemnity clause", "signed by"]
+SEARCH_MODES = ["lexical", "hybrid"]
+AI_TEXT = ("This Agreement is made between Arun Kumar and Acme Pvt Ltd. The Client shall pay all fees within "
+           "thirty days. This Agreement is governed by the laws of India.")
+AI_QUESTIONS = [None, "Who are the parties?", "When is payment due?"]
+
+
+def _serve_app(port: int, openai_url: str, mongo_uri: Optional[str], workdir: str, log_level: str) -> None:
+    """App process: stand-in environment, then uvicorn."""
+    os.environ.update({"OPENAI_API_KEY": "sk-load-test", "OPENAI_BASE_URL": openai_url, "DB_NAME": "LegalDocAI_loadtest"})
+    if mongo_uri:
+        os.environ["MONGO_URI"] = mongo_uri
+    else:
+        import mongomock
+        import mongomock_motor
+        import motor.motor_asyncio
+        import pymongo
+
+        shared = mongomock.MongoClient()
+        pymongo.MongoClient = lambda *args, **kwargs: shared
+        motor.motor_asyncio.AsyncIOMotorClient = \
+            lambda *args, **kwargs: mongomock_motor.AsyncMongoMockClient(mock_mongo_client=shared)
+    sys.path.insert(0, ROOT)
+    os.chdir(workdir)
+    import uvicorn
+
+    import main
+    from backend.app.routes import router as backend_router
+
+    main.app.include_router(backend_router)
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level=log_level)
+
+
+def start_fake_openai(port: int, latency_ms: float, error_rate: float) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_openai", "--port", str(port),
+         "--latency-ms", str(latency_ms), "--error-rate", str(error_rate)],
+        cwd=ROOT,
+    )
+
+
+def wait_until_up(url: str, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def load_samples(patterns: List[str]) -> List[Tuple[str, bytes]]:
+    paths = sorted({p for pattern in patterns for p in glob.glob(pattern)})
+    samples = [(os.path.basename(p), open(p, "rb").read()) for p in paths if p.lower().endswith(SAMPLE_EXTENSIONS)]
+    if not samples:
+        raise SystemExit(f"No sample files ({', '.join(SAMPLE_EXTENSIONS)}) match {patterns}")
+    return samples
+
+
+# ---------------------- SCENARIOS ----------------------
+# each returns (endpoint label, coroutine making the request, check(response) -> ok)
+def upload(client: httpx.AsyncClient, samples):
+    name, data = random.choice(samples)
+    return "POST /upload", client.post("/upload", files={"file": (name, data)}), None
+
+
+def search(client: httpx.AsyncClient, samples):
+    params = {"q": random.choice(SEARCH_QUERIES), "k": 5, "mode": random.choice(SEARCH_MODES)}
+    return "GET /api/search/", client.get("/api/search/", params=params), None
+
+
+def history(client: httpx.AsyncClient, samples):
+    return "GET /history", client.get("/history"), lambda r: "error" not in r.json()
+
+
+def ai(client: httpx.AsyncClient, samples):
+    body = {"text": AI_TEXT, "question": random.choice(AI_QUESTIONS)}
+    return "POST /api/ai-response", client.post("/api/ai-response", json=body), \
+        lambda r: not r.json().get("answer", "").startswith("⚠️")
+
+
+SCENARIOS: Dict[str, Callable] = {"upload": upload, "search": search, "history": history, "ai": ai}
+
+
+async def run_load(base_url: str, mix: Dict[str, float], samples, concurrency: int, duration: float,
+                   timeout: float) -> Tuple[Metrics, float]:
+    results = Metrics(window=10 ** 6)
+    names, weights = list(mix), list(mix.values())
+    stop_at = time.perf_counter() + duration
+
+    async def client_loop(client: httpx.AsyncClient):
+        while time.perf_counter() < stop_at:
+            label, request, check = SCENARIOS[random.choices(names, weights)[0]](client, samples)
+            t0 = time.perf_counter()
+            try:
+                response = await request
+                ok = response.status_code < 400 and (check is None or check(response))
+            except (httpx.HTTPError, ValueError):
+                ok = False
+            results.observe(label, time.perf_counter() - t0)
+            results.incr(label + (" ok" if ok else " error"))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        return results, time.perf_counter() - t0
+
+
+def report(results: Metrics, elapsed: float) -> None:
+    snap = results.snapshot()
+    counters = snap["counters"]
+    print(f"  {'endpoint':24s} {'requests':>8s} {'errors':>7s} {'err %':>6s} {'req/s':>7s} "
+          f"{'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'max ms':>8s}")
+    total = errors = 0
+    for label, h in sorted(snap["histograms"].items()):
+        err = int(counters.get(label + " error", 0))
+        total, errors = total + h["count"], errors + err
+        print(f"  {label:24s} {h['count']:8d} {err:7d} {100 * err / h['count']:6.1f} {h['count'] / elapsed:7.1f} "
+              f"{h['p50'] * 1000:8.0f} {h['p95'] * 1000:8.0f} {h['p99'] * 1000:8.0f} {h['max'] * 1000:8.0f}")
+    print(f"  {'all':24s} {total:8d} {errors:7d} {100 * errors / max(total, 1):6.1f} {total / elapsed:7.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of measured traffic")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"scenario=weight,... from {', '.join(SCENARIOS)}")
+    parser.add_argument("--files", nargs="*", default=[os.path.join(ROOT, "uploads", "*"), os.path.join(ROOT, "data", "*")],
+                        help="sample files to upload (globs)")
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--mongo-uri", help="real MongoDB to use instead of mongomock")
+    parser.add_argument("--port", type=int, default=8780)
+    parser.add_argument("--openai-port", type=int, default=8781)
+    parser.add_argument("--request-timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    mix = parse_mix(args.mix)
+    samples = load_samples(args.files)
+    base_url = f"http://127.0.0.1:{args.port}"
+    openai_url = f"http://127.0.0.1:{args.openai_port}/v1"
+
+    fake = start_fake_openai(args.openai_port, args.llm_latency_ms, args.llm_error_rate)
+    with tempfile.TemporaryDirectory() as workdir:
+        server = mp.get_context("spawn").Process(
+            target=_serve_app, args=(args.port, openai_url, args.mongo_uri, workdir, args.log_level), daemon=True)
+        try:
+            wait_until_up(f"http://127.0.0.1:{args.openai_port}/_stats", 30)
+            server.start()
+            wait_until_up(base_url + "/api/ai-health", 180)
+            for name, data in samples:
+                httpx.post(base_url + "/upload", files={"file": (name, data)}, timeout=args.request_timeout)
+            print(f"{len(samples)} sample files, mix {mix}, {args.concurrency} clients for {args.duration:.0f}s, "
+                  f"LLM latency {args.llm_latency_ms:.0f} ms / error rate {args.llm_error_rate:.0%}, "
+                  f"Mongo: {args.mongo_uri or 'mongomock'}")
+            results, elapsed = asyncio.run(run_load(base_url, mix, samples, args.concurrency, args.duration,
+                                                    args.request_timeout))
+            report(results, elapsed)
+            llm = httpx.get(f"http://127.0.0.1:{args.openai_port}/_stats").json()["counters"]
+            app = httpx.get(base_url + "/metrics").json()["histograms"].get("upload.seconds", {})
+            print(f"  fake OpenAI: {llm}")
+            if app:
+                print(f"  app upload.seconds: p50 {app['p50']:.2f}s p95 {app['p95']:.2f}s p99 {app['p99']:.2f}s "
+                      f"({app['count']} uploads incl. seeding)")
+        finally:
+            server.terminate()
+            server.join(10)
+            fake.terminate()
+            fake.wait(10)
+
+
+if __name__ == "__main__":
+    main()
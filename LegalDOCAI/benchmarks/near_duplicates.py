@@ -0,0 +1,95 @@
+# benchmarks/near_duplicates.py
+"""
+Near-duplicate lookup: LSH band index vs. brute-force signature scan.
+
+Builds a synthetic corpus of contract-sized documents in which every
+`--dup-every`th document is an edited copy of an earlier one (a few words
+replaced), computes MinHash signatures with src.near_duplicates, and for
+growing corpus sizes times one lookup through the LSH buckets (same keys
+as the lsh_bands multikey index in MongoDB) against a vectorized scan of
+all signatures. Recall is measured on the planted pairs.
+
+Run from the LegalDOCAI folder (100k signatures take about a minute):
+    python -m benchmarks.near_duplicates --docs 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.near_duplicates import LSHIndex, minhash  # noqa: E402
+
+
+def make_corpus(n_docs: int, words: int, edits: int, dup_every: int, seed: int = 0):
+    """(texts, {copy_index: original_index})"""
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(20000)]
+    texts, planted = [], {}
+    for i in range(n_docs):
+        if i and i % dup_every == 0:
+            src = rng.randrange(i)
+            tokens = texts[src].split()
+            for pos in rng.sample(range(len(tokens)), edits):
+                tokens[pos] = rng.choice(vocab)
+            planted[i] = src
+            texts.append(" ".join(tokens))
+        else:
+            texts.append(" ".join(rng.choice(vocab) for _ in range(words)))
+    return texts, planted
+
+
+def timed(fn, repeat: int) -> float:
+    """Median milliseconds per call."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(samples))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument("--edits", type=int, default=6, help="words replaced in each planted copy")
+    parser.add_argument("--dup-every", type=int, default=50)
+    parser.add_argument("--min-similarity", type=float, default=0.5)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    texts, planted = make_corpus(args.docs, args.words, args.edits, args.dup_every)
+    t0 = time.perf_counter()
+    signatures = np.stack([minhash(t) for t in texts])
+    print(f"{args.docs} signatures in {time.perf_counter() - t0:.1f}s "
+          f"({signatures.nbytes / 2**20:.1f} MiB, {len(planted)} planted near-duplicates)")
+
+    sizes = sorted({s for s in (1000, 10000, args.docs // 2, args.docs) if s <= args.docs})
+    print(f"{'docs':>8s} {'lsh ms':>8s} {'scan ms':>8s} {'candidates':>10s} {'recall':>7s}")
+    index, added = LSHIndex(), 0
+    for size in sizes:
+        for i in range(added, size):
+            index.add(str(i), signatures[i])
+        added = size
+        copies = [c for c in planted if c < size][: args.queries]
+        if not copies:
+            continue
+        found, candidates = 0, 0
+        for c in copies:
+            hits = {h["doc_id"] for h in index.query(signatures[c], args.min_similarity, exclude=[str(c)])}
+            found += str(planted[c]) in hits
+            candidates += len(index.candidates(signatures[c]))
+        probe = signatures[copies[0]]
+        lsh_ms = timed(lambda: index.query(probe, args.min_similarity), 50)
+        matrix = signatures[:size]
+        scan_ms = timed(lambda: np.nonzero((matrix == probe).mean(axis=1) >= args.min_similarity)[0], 20)
+        print(f"{size:8d} {lsh_ms:8.3f} {scan_ms:8.3f} {candidates / len(copies):10.1f} {found / len(copies):7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/ocr_engines.py
+"""
+Per-page OCR latency: pytesseract (subprocess per page) vs the tesserocr
+worker pool from src.ocr_engine.
+
+Renders N test pages (see benchmarks/ocr_preprocess.py), OCRs them with
+each engine sequentially and with a thread pool, and prints mean/p95
+per-page latency and pages/sec. Preprocessing is disabled so only the
+engine cost is measured. Needs tesseract (and tesserocr for the pool).
+
+Run from the LegalDOCAI folder:
+    python -m benchmarks.ocr_engines --pages 20 --workers 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.ocr_preprocess import render_page  # noqa: E402
+from src.ocr_engine import create_ocr_engine  # noqa: E402
+
+
+def timed(engine, image) -> float:
+    t0 = time.perf_counter()
+    engine.image_to_string(image)
+    return time.perf_counter() - t0
+
+
+def report(label: str, latencies, wall: float) -> None:
+    p95 = sorted(latencies)[int(0.95 * (len(latencies) - 1))]
+    print(
+        f"{label:28s} mean={statistics.mean(latencies) * 1000:7.1f}ms "
+        f"p95={p95 * 1000:7.1f}ms  {len(latencies) / wall:6.2f} pages/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    pages = [render_page() for _ in range(args.pages)]
+    for backend in ("pytesseract", "tesserocr"):
+        try:
+            engine = create_ocr_engine(backend=backend, workers=args.workers, preprocess=False)
+            engine.image_to_string(pages[0])  # warm-up
+        except Exception as e:
+            print(f"{backend:28s} unavailable: {e}")
+            continue
+
+        t0 = time.perf_counter()
+        latencies = [timed(engine, p) for p in pages]
+        report(f"{backend} sequential", latencies, time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(args.workers) as pool:
+            latencies = list(pool.map(lambda p: timed(engine, p), pages))
+        report(f"{backend} x{args.workers} threads", latencies, time.perf_counter() - t0)
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/ocr_preprocess.py
+"""
+OCR time and character accuracy with and without src.image_preprocess.
+
+Renders a known contract paragraph into test images that mimic what we
+receive (clean 300 DPI scan, oversized phone photo, skewed photo on a dark
+table with sensor noise), OCRs each raw and preprocessed, and reports
+seconds and character accuracy (difflib ratio against the ground truth).
+
+Needs the tesseract binary. Run from the LegalDOCAI folder:
+    python -m benchmarks.ocr_preprocess --psm 3 --oem 3
+"""
+import argparse
+import difflib
+import os
+import sys
+import time
+
+import numpy as np
+import pytesseract
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.image_preprocess import preprocess_for_ocr, tesseract_config  # noqa: E402
+
+GROUND_TRUTH = [
+    "12. TERMINATION. Either party may terminate this Agreement",
+    "upon thirty (30) days written notice to the other party.",
+    "13. CONFIDENTIALITY. The Receiving Party shall not disclose",
+    "any Confidential Information to any third party without the",
+    "prior written consent of the Disclosing Party.",
+    "14. GOVERNING LAW. This Agreement shall be governed by the",
+    "laws of India and subject to the courts at Chennai.",
+    "Signed by Arun Kumar, Authorized Signatory, 12/03/2024.",
+] * 4
+
+
+def render_page(scale: float = 1.0) -> Image.Image:
+    size = (int(2480 * scale), int(3508 * scale))
+    img = Image.new("L", size, 255)
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default(size=int(42 * scale))
+    for i, line in enumerate(GROUND_TRUTH):
+        draw.text((int(180 * scale), int((220 + i * 90) * scale)), line, fill=0, font=font)
+    return img
+
+
+def phone_photo(page: Image.Image, angle: float) -> Image.Image:
+    rotated = page.rotate(angle, expand=True, fillcolor=40)
+    w, h = rotated.size
+    canvas = Image.new("L", (w + 400, h + 400), 35)
+    canvas.paste(rotated, (200, 200))
+    noisy = np.asarray(canvas, dtype=np.int16) + np.random.default_rng(1).normal(0, 18, (canvas.height, canvas.width))
+    return Image.fromarray(noisy.clip(0, 255).astype(np.uint8)).convert("RGB")
+
+
+def accuracy(text: str) -> float:
+    norm = lambda s: " ".join(s.split())  # noqa: E731
+    return difflib.SequenceMatcher(None, norm(text), norm(" ".join(GROUND_TRUTH))).ratio()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--psm", type=int, default=3)
+    parser.add_argument("--oem", type=int, default=3)
+    parser.add_argument("--lang", default="eng")
+    args = parser.parse_args()
+    config = tesseract_config(args.psm, args.oem)
+
+    cases = {
+        "clean scan 300dpi": render_page(),
+        "phone photo 2x": phone_photo(render_page(1.6), 0),
+        "skewed photo 3deg": phone_photo(render_page(1.6), 3),
+    }
+    print(f"{'image':20s} {'mode':6s} {'seconds':>8s} {'accuracy':>9s}")
+    for name, img in cases.items():
+        for mode in ("raw", "prep"):
+            t0 = time.perf_counter()
+            target = preprocess_for_ocr(img) if mode == "prep" else img
+            text = pytesseract.image_to_string(target, lang=args.lang, config=config)
+            print(f"{name:20s} {mode:6s} {time.perf_counter() - t0:8.2f} {accuracy(text):9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/pdf_memory.py
+"""
+Peak RSS of streaming PDF extraction as page count grows.
+
+Builds scanned-style PDFs (one distinct full-page image per page, plus a
+logo repeated on every page) and runs src.extraction.iter_pdf_pages over
+them in a fresh process per size under a --budget-mb memory budget. Peak
+RSS has to stay flat: the largest document's peak may exceed the smallest
+one's by at most the budget plus --slack-mb, otherwise the script exits
+with status 1.
+
+Run from the LegalDOCAI folder:
+    python -m benchmarks.pdf_memory --pages 10 50 150 300
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+
+import fitz
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import run_isolated  # noqa: E402
+from src.extraction import DEFAULT_MEMORY_BUDGET_BYTES  # noqa: E402
+
+
+def _png(seed: int, size=(1700, 2200)) -> bytes:
+    img = Image.new("RGB", size, (255, 255 - seed % 200, seed % 255))
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def build_pdf(path: str, pages: int) -> None:
+    doc = fitz.open()
+    logo = _png(0, (300, 120))
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_image(page.rect, stream=_png(i + 1))
+        page.insert_image(fitz.Rect(20, 20, 170, 80), stream=logo)
+    doc.save(path)
+    doc.close()
+
+
+def fake_ocr(img: Image.Image) -> str:
+    # touch every pixel so the decoded image is really materialized
+    return str(sum(img.resize((64, 64)).getdata()[0]))
+
+
+def extract(path: str, budget_mb: int) -> int:
+    from src.extraction import MemoryBudget, iter_pdf_pages
+
+    pages = 0
+    budget = MemoryBudget(budget_mb * 1024 * 1024)
+    for _ in iter_pdf_pages(path, ocr=fake_ocr, ocr_embedded_images=True, budget=budget):
+        pages += 1
+    return pages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50, 150])
+    parser.add_argument("--budget-mb", type=int, default=DEFAULT_MEMORY_BUDGET_BYTES // (1024 * 1024))
+    parser.add_argument("--slack-mb", type=float, default=32, help="allowed growth on top of the budget")
+    args = parser.parse_args()
+
+    peaks = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sorted(args.pages):
+            path = os.path.join(tmp, f"scan_{n}.pdf")
+            build_pdf(path, n)
+            pages, peaks[n] = run_isolated(extract, path, args.budget_mb)
+            print(f"pages={pages:4d}  peak_rss={peaks[n]:8.1f} MiB")
+
+    smallest, largest = min(peaks), max(peaks)
+    limit = peaks[smallest] + args.budget_mb + args.slack_mb
+    if peaks[largest] > limit:
+        print(f"FAIL peak RSS grows with page count: {peaks[largest]:.1f} MiB at {largest} pages, "
+              f"limit {limit:.1f} MiB ({peaks[smallest]:.1f} at {smallest} pages + {args.budget_mb} budget "
+              f"+ {args.slack_mb:g} slack)")
+        sys.exit(1)
+    print(f"OK peak RSS {peaks[largest]:.1f} MiB at {largest} pages <= {limit:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
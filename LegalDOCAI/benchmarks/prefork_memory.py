@@ -0,0 +1,155 @@
+# benchmarks/prefork_memory.py
+"""
+Memory of N serving workers: independent processes versus src.prefork.
+
+"today" starts N fresh interpreters (what `uvicorn --workers N` does):
+each loads the models itself and, like the old vector search, pulls every
+vector into a private numpy array. "prefork" loads the models once in the
+parent, forks N workers after gc.freeze() and has them search the
+memory-mapped src.vector_index instead.
+
+Every worker runs a few searches, reports ready and is then measured with
+src.metrics.process_memory. Per-worker RSS counts shared pages in every
+process that maps them; PSS divides them among those processes, so the
+PSS total is the real memory the group uses.
+
+The models are spaCy (load_nlp + load_light_nlp) when en_core_web_sm is
+installed, plus --model-mib of synthetic weights standing in for the
+legality classifier / transformers pipelines. Vectors are random.
+
+Linux only (needs /proc/<pid>/smaps_rollup and os.fork). Run from the
+LegalDOCAI folder:
+    python -m benchmarks.prefork_memory --workers 4 --docs 100000 --dim 384
+"""
+import argparse
+import gc
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.metrics import process_memory  # noqa: E402
+from src.vector_index import MANIFEST_FILE, VectorIndex  # noqa: E402
+
+_models = []  # keeps loaded models alive in whichever process loaded them
+
+
+def load_models(model_mib: float) -> str:
+    """Load the stand-in models into this process; returns what was loaded."""
+    loaded = []
+    try:
+        from src.analysis import load_light_nlp, load_nlp
+
+        _models.extend([load_nlp(), load_light_nlp()])
+        loaded.append("spaCy")
+    except Exception as e:
+        loaded.append(f"no spaCy ({type(e).__name__})")
+    if model_mib:
+        weights = np.random.default_rng(0).standard_normal(int(model_mib * 2 ** 20 / 4)).astype(np.float32)
+        _models.append(weights)
+        loaded.append(f"{model_mib:.0f} MiB weights")
+    return ", ".join(loaded)
+
+
+def build_index(path: str, docs: int, dim: int, batch: int = 10_000) -> VectorIndex:
+    index = VectorIndex(path)
+    rng = np.random.default_rng(1)
+    index.rebuild([])
+    for start in range(0, docs, batch):
+        n = min(batch, docs - start)
+        index.add_many(zip((f"doc-{start + i}" for i in range(n)), rng.standard_normal((n, dim))))
+    return index
+
+
+def _worker(mode: str, index_dir: str, model_mib: float, searches: int, ready, stop) -> None:
+    if mode == "today":
+        load_models(model_mib)
+    index = VectorIndex(index_dir)
+    rng = np.random.default_rng(os.getpid())
+    with open(os.path.join(index_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    dim = manifest["dim"]
+    if mode == "today":
+        # every vector copied into this process, as vector search did before the shared index
+        private = np.fromfile(os.path.join(index_dir, manifest["vectors"]), dtype=np.float32).reshape(-1, dim)
+        for _ in range(searches):
+            q = rng.standard_normal(dim).astype(np.float32)
+            np.argsort(-(private @ q))[:5]
+    else:
+        for _ in range(searches):
+            index.search(rng.standard_normal(dim), top_k=5)
+    ready.put(os.getpid())
+    stop.wait()
+
+
+def measure(mode: str, workers: int, index_dir: str, model_mib: float, searches: int):
+    """(parent memory, [worker memory]) with `workers` processes started in `mode`."""
+    ctx = mp.get_context("spawn" if mode == "today" else "fork")
+    ready, stop = ctx.Queue(), ctx.Event()
+    if mode == "prefork":
+        gc.collect()
+        gc.freeze()
+    procs = [ctx.Process(target=_worker, args=(mode, index_dir, model_mib, searches, ready, stop))
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    pids = [ready.get(timeout=600) for _ in procs]
+    time.sleep(0.2)
+    usage = [process_memory(pid) for pid in pids]
+    parent = process_memory()
+    stop.set()
+    for p in procs:
+        p.join()
+    if mode == "prefork":
+        gc.unfreeze()
+    return parent, usage
+
+
+def report(label: str, parent, usage, count_parent: bool) -> float:
+    print(f"  {label}")
+    for i, mem in enumerate(usage):
+        print(f"    worker {i}: rss {mem.get('rss_mib', 0):7.1f} MiB  pss {mem.get('pss_mib', 0):7.1f} MiB  "
+              f"shared {mem.get('shared_mib', 0):7.1f} MiB  private {mem.get('private_mib', 0):7.1f} MiB")
+    rows = usage + ([parent] if count_parent else [])
+    total_pss = sum(m.get("pss_mib", 0) for m in rows)
+    total_rss = sum(m.get("rss_mib", 0) for m in rows)
+    note = " incl. parent" if count_parent else ""
+    print(f"    total{note}: rss {total_rss:.1f} MiB, pss {total_pss:.1f} MiB")
+    return total_pss
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--model-mib", type=float, default=200, help="synthetic model weights per process")
+    parser.add_argument("--searches", type=int, default=20)
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork") or not process_memory():
+        sys.exit("Needs Linux (os.fork and /proc/<pid>/smaps_rollup).")
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        build_index(tmp, args.docs, args.dim)
+        index_mib = args.docs * args.dim * 4 / 2 ** 20
+        print(f"{args.workers} workers, {args.docs} vectors x {args.dim} ({index_mib:.0f} MiB), "
+              f"index built in {time.perf_counter() - t0:.1f}s")
+
+        parent, usage = measure("today", args.workers, tmp, args.model_mib, args.searches)
+        today = report("today: independent processes, models and vectors per process", parent, usage, False)
+
+        loaded = load_models(args.model_mib)
+        parent, usage = measure("prefork", args.workers, tmp, args.model_mib, args.searches)
+        prefork = report(f"prefork: {loaded} loaded in the parent, memory-mapped index", parent, usage, True)
+        print(f"  total pss {today:.1f} MiB -> {prefork:.1f} MiB ({today / max(prefork, 1e-9):.1f}x less)")
+
+
+if __name__ == "__main__":
+    main()
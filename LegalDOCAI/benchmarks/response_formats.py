@@ -0,0 +1,122 @@
+# benchmarks/response_formats.py
+"""
+Size and encode / decode time of the /upload response for a large document.
+
+Builds the response of a --pages page upload (synthetic contract pages,
+regex page findings as the triage profile produces them, a full-profile
+analytics block) and encodes it as the endpoint used to (starlette's
+JSONResponse: stdlib json) and as src/responses.py does now: orjson or
+MessagePack, full or slim (page text left out, the default), with gzip and
+br compression on top of the slim JSON body. Decode is the client's
+json.loads / msgpack.unpackb of the uncompressed body plus decompression.
+
+Formats whose optional package (orjson, msgpack, brotli) is missing are
+skipped. Run from the LegalDOCAI folder:
+    python -m benchmarks.response_formats --pages 200 --repeat 20
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.analysis_profiles import make_page  # noqa: E402
+from src import responses  # noqa: E402
+from src.analysis import analyze_pages_triage  # noqa: E402
+from src.pipeline import chart_data  # noqa: E402
+
+
+def upload_payload(pages: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    results = analyze_pages_triage(make_page(rng, n) for n in range(1, pages + 1))
+    for r in results:
+        r["names"] = sorted(set(r["signers"]))
+    clause_counts: Dict[str, int] = {}
+    for r in results:
+        for kw in r["clauses_found"]:
+            clause_counts[kw] = clause_counts.get(kw, 0) + 1
+    analytics = {
+        "total_clauses": sum(clause_counts.values()),
+        "clause_types": clause_counts,
+        "legality_score": 80,
+        "keyword_frequency": {w: rng.randint(50, 500) for w in ("agreement", "payment", "notice", "obligation")},
+        "summary": " ".join(results[0]["text"].split(".")[:3]),
+        "file_type": "pdf",
+        "total_pages": pages,
+        "analysis_profile": "full",
+        "verified_marker": "✅ VERIFIED",
+        "ai_confidence": 87,
+        "openai_raw": json.dumps({"verified": True, "confidence": 87, "notes": "x" * 1900})[:2000],
+        "verified_by": "openai",
+    }
+    analytics["chart_data"] = chart_data(analytics)
+    return {"fileName": "contract.pdf", "results": results, "analytics": analytics}
+
+
+def stdlib_json(payload: Any) -> bytes:
+    """What starlette's JSONResponse does."""
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def timed(fn: Callable[[], Any], repeat: int):
+    samples, result = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    return result, statistics.median(samples) * 1000
+
+
+def measure(label: str, encode: Callable[[], bytes], decode: Callable[[bytes], Any], repeat: int,
+            compress: Optional[Callable[[bytes], bytes]] = None, decompress: Optional[Callable[[bytes], bytes]] = None):
+    body, encode_ms = timed(encode, repeat)
+    wire = body
+    if compress is not None:
+        wire, compress_ms = timed(lambda: compress(body), repeat)
+        encode_ms += compress_ms
+        _, decode_ms = timed(lambda: decode(decompress(wire)), repeat)
+    else:
+        _, decode_ms = timed(lambda: decode(body), repeat)
+    print(f"  {label:28s} {len(wire) / 1024:10.1f} {encode_ms:10.2f} {decode_ms:10.2f}")
+    return len(wire)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    full = upload_payload(args.pages, args.seed)
+    slim = responses.slim(full, ("results.text",), set())
+    print(f"/upload response for a {args.pages}-page document "
+          f"(orjson: {'yes' if responses.orjson else 'no'}, msgpack: {'yes' if responses.msgpack else 'no'}, "
+          f"brotli: {'yes' if responses.brotli else 'no'})")
+    print(f"  {'format':28s} {'KiB':>10s} {'encode ms':>10s} {'decode ms':>10s}")
+    baseline = measure("json full (before)", lambda: stdlib_json(full), json.loads, args.repeat)
+    measure("json slim", lambda: stdlib_json(slim), json.loads, args.repeat)
+    if responses.orjson is not None:
+        measure("orjson full", lambda: responses.dumps_json(full), responses.orjson.loads, args.repeat)
+        measure("orjson slim", lambda: responses.dumps_json(slim), responses.orjson.loads, args.repeat)
+    if responses.msgpack is not None:
+        measure("msgpack full", lambda: responses.dumps_msgpack(full), responses.msgpack.unpackb, args.repeat)
+        measure("msgpack slim", lambda: responses.dumps_msgpack(slim), responses.msgpack.unpackb, args.repeat)
+    loads = responses.orjson.loads if responses.orjson is not None else json.loads
+    smallest = measure("slim json + gzip", lambda: responses.dumps_json(slim), loads, args.repeat,
+                       lambda b: gzip.compress(b, compresslevel=responses.GZIP_LEVEL), gzip.decompress)
+    if responses.brotli is not None:
+        smallest = measure("slim json + br", lambda: responses.dumps_json(slim), loads, args.repeat,
+                           lambda b: responses.brotli.compress(b, quality=responses.BROTLI_QUALITY),
+                           responses.brotli.decompress)
+    print(f"  default response is {baseline / smallest:.0f}x smaller on the wire than before")
+
+
+if __name__ == "__main__":
+    main()
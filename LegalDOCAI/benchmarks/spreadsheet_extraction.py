@@ -0,0 +1,89 @@
+# benchmarks/spreadsheet_extraction.py
+"""
+Streaming spreadsheet extraction vs the old pandas path.
+
+Writes a payment-schedule style workbook (default 100k rows over two
+sheets) and compares wall time and peak RSS of:
+  - pandas:    pd.read_excel(...).to_string()  (first sheet only)
+  - streaming: src.extraction.iter_spreadsheet_pages (every sheet)
+
+pandas is no longer an app requirement; the baseline is skipped when it
+is not installed (pip install pandas to compare). Run from the LegalDOCAI
+folder:
+    python -m benchmarks.spreadsheet_extraction --rows 100000
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import run_isolated  # noqa: E402
+
+try:
+    import pandas as pd
+except ImportError:  # optional dependency: baseline only
+    pd = None
+
+
+def build_workbook(path: str, rows: int) -> None:
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    start = datetime.date(2020, 1, 1)
+    for name, count in (("Schedule", rows - rows // 10), ("Adjustments", rows // 10)):
+        ws = wb.create_sheet(name)
+        ws.append(["Installment", "Due date", "Payer", "Payee", "Amount", "Notes"])
+        for i in range(count):
+            ws.append([
+                i + 1,
+                start + datetime.timedelta(days=i % 3650),
+                f"Tenant {i % 97}",
+                "Acme Properties Pvt Ltd",
+                round(1000 + (i % 500) * 3.75, 2),
+                "Late payment penalty applies per clause 7.2" if i % 13 == 0 else "",
+            ])
+    wb.save(path)
+
+
+def run_pandas(path: str):
+    t0 = time.perf_counter()
+    text = pd.read_excel(path).to_string()
+    return time.perf_counter() - t0, 1, len(text)
+
+
+def run_streaming(path: str):
+    from src.extraction import iter_spreadsheet_pages
+
+    t0 = time.perf_counter()
+    pages = chars = 0
+    for page in iter_spreadsheet_pages(path, max_rows=10**7):
+        pages += 1
+        chars += len(page["text"])
+    return time.perf_counter() - t0, pages, chars
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "schedule.xlsx")
+        build_workbook(path, args.rows)
+        print(f"workbook: {args.rows} rows, {os.path.getsize(path) / 1e6:.1f} MB")
+        runs = [("streaming", run_streaming)]
+        if pd is not None:
+            runs.insert(0, ("pandas", run_pandas))
+        else:
+            print("pandas not installed; skipping the pandas baseline")
+        for label, fn in runs:
+            (seconds, pages, chars), peak_mb = run_isolated(fn, path)
+            print(f"{label:10s} {seconds:7.2f}s  pages={pages:5d}  chars={chars:10d}  peak_rss={peak_mb:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
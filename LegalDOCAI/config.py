@@ -14,6 +14,8 @@ load_dotenv()
 # ---------------- OpenAI Configuration ----------------
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+# Any OpenAI-compatible endpoint, e.g. http://127.0.0.1:8765/v1 (benchmarks/fake_openai.py)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
 
 if not OPENAI_API_KEY or OPENAI_API_KEY.startswith("sk-your"):
     raise ValueError(
@@ -23,14 +25,30 @@ if not OPENAI_API_KEY or OPENAI_API_KEY.startswith("sk-your"):
 
 # Initialize OpenAI client
 try:
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
     # 🔹 Optional quick verification (lightweight)
     # Comment this out if you want faster startup, or keep for debugging
     # test_response = client.models.list()
 except Exception as e:
     raise RuntimeError(f"⚠️ Failed to initialize OpenAI client or verify key: {e}")
 
+# Resilience settings for src/llm_client.py
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "20"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+OPENAI_TOKENS_PER_MINUTE = int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "0"))  # 0 = unlimited
+OPENAI_BREAKER_FAILURES = int(os.getenv("OPENAI_BREAKER_FAILURES", "5"))
+OPENAI_BREAKER_RESET_SECONDS = float(os.getenv("OPENAI_BREAKER_RESET_SECONDS", "30"))
+# Total time budget per request; LLM calls only get what is left of it
+UPLOAD_BUDGET_SECONDS = float(os.getenv("UPLOAD_BUDGET_SECONDS", "120"))
+AI_RESPONSE_BUDGET_SECONDS = float(os.getenv("AI_RESPONSE_BUDGET_SECONDS", "30"))
+
 # ---------------- MongoDB Configuration ----------------
+# Shared by the app, backend routers and CLIs through src/mongo.py, which also
+# reads the pool (MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_MS,
+# MONGO_WAIT_QUEUE_TIMEOUT_MS, MONGO_SERVER_SELECTION_TIMEOUT_MS), read
+# preference (MONGO_READ_PREFERENCE) and write concern (MONGO_WRITE_CONCERN,
+# MONGO_JOURNAL) settings.
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "LegalDocAI_DB")
 
@@ -39,6 +57,90 @@ TESSERACT_CMD = os.getenv("TESSERACT_CMD")
 if TESSERACT_CMD:
     pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
 
+# "auto" uses a pool of in-process tesserocr workers when installed and
+# falls back to pytesseract (one subprocess per image) otherwise.
+OCR_ENGINE = os.getenv("OCR_ENGINE", "auto")
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "2"))
+
+# Language pack(s), page segmentation mode and engine mode passed to Tesseract
+TESSERACT_LANG = os.getenv("TESSERACT_LANG", "eng")
+TESSERACT_PSM = int(os.getenv("TESSERACT_PSM", "3"))
+TESSERACT_OEM = int(os.getenv("TESSERACT_OEM", "3"))
+
+# Grayscale/downscale/deskew/binarize/crop images before OCR
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "true").lower() in ("1", "true", "yes")
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI", "300"))
+
+# ---------------- Extraction Limits ----------------
+# Upper bound on decoded image memory held by a single upload (rasterized
+# pages + embedded images awaiting OCR).
+PDF_MEMORY_BUDGET_MB = int(os.getenv("PDF_MEMORY_BUDGET_MB", "256"))
+
+# Spreadsheets are streamed row by row; each block of rows becomes a page.
+EXCEL_ROWS_PER_PAGE = int(os.getenv("EXCEL_ROWS_PER_PAGE", "200"))
+EXCEL_MAX_ROWS = int(os.getenv("EXCEL_MAX_ROWS", "100000"))
+EXCEL_MAX_COLS = int(os.getenv("EXCEL_MAX_COLS", "50"))
+EXCEL_MAX_CELL_CHARS = int(os.getenv("EXCEL_MAX_CELL_CHARS", "200"))
+
+# DOCX paragraphs/tables are grouped into sections of about this many
+# characters unless an explicit page or section break comes first.
+DOCX_PAGE_CHARS = int(os.getenv("DOCX_PAGE_CHARS", "3000"))
+
+# ---------------- Page Storage ----------------
+# Page text is kept out of document records, compressed one record per page
+# ("zstd" needs the zstandard package; "zlib" is always available).
+PAGE_CODEC = os.getenv("PAGE_CODEC", "zstd")
+PAGE_COMPRESSION_LEVEL = int(os.getenv("PAGE_COMPRESSION_LEVEL", "3"))
+# Largest page range served by one /document/{id}/pages request
+MAX_PAGES_PER_REQUEST = int(os.getenv("MAX_PAGES_PER_REQUEST", "50"))
+
+# ---------------- Page Images ----------------
+# PNGs served by /document/{id}/page/{n}.png are cached on disk (least
+# recently used deleted first past the budget). Pages rasterized for OCR
+# are kept there too, so previews of scanned pages are not rendered again.
+PAGE_IMAGE_CACHE_DIR = os.getenv("PAGE_IMAGE_CACHE_DIR", os.path.join("data", "page_images"))
+PAGE_IMAGE_CACHE_MB = int(os.getenv("PAGE_IMAGE_CACHE_MB", "512"))
+PAGE_IMAGE_MAX_SIZE = int(os.getenv("PAGE_IMAGE_MAX_SIZE", "1600"))  # longer side in px
+PAGE_IMAGE_KEEP_OCR_RASTERS = os.getenv("PAGE_IMAGE_KEEP_OCR_RASTERS", "true").lower() in ("1", "true", "yes")
+
+# ---------------- Local Legality Classifier ----------------
+# Trained from stored OpenAI verdicts (python -m src.legality_classifier train).
+# OpenAI is only called when P(LEGAL) falls inside (LOWER, UPPER).
+LEGALITY_LOCAL_ENABLED = os.getenv("LEGALITY_LOCAL_ENABLED", "true").lower() in ("1", "true", "yes")
+LEGALITY_MODEL_PATH = os.getenv("LEGALITY_MODEL_PATH", os.path.join("models", "legality_classifier.joblib"))
+LEGALITY_LOCAL_LOWER = float(os.getenv("LEGALITY_LOCAL_LOWER", "0.15"))
+LEGALITY_LOCAL_UPPER = float(os.getenv("LEGALITY_LOCAL_UPPER", "0.85"))
+
+# ---------------- Reprocessing ----------------
+# Background refresh of documents whose analytics are from an older
+# pipeline version: documents per bulk write, and a rate cap (0 = no cap;
+# keep it low when the verify stage, i.e. OpenAI, is re-run).
+REPROCESS_BATCH_SIZE = int(os.getenv("REPROCESS_BATCH_SIZE", "50"))
+REPROCESS_MAX_DOCS_PER_SEC = float(os.getenv("REPROCESS_MAX_DOCS_PER_SEC", "5"))
+
+# ---------------- Analysis Profiles ----------------
+# triage | standard | full (see src/pipeline.py). Batch imports default to
+# triage; documents can be promoted later from stored text.
+UPLOAD_ANALYSIS_PROFILE = os.getenv("UPLOAD_ANALYSIS_PROFILE", "full")
+BATCH_ANALYSIS_PROFILE = os.getenv("BATCH_ANALYSIS_PROFILE", "triage")
+BATCH_UPLOAD_MAX_FILES = int(os.getenv("BATCH_UPLOAD_MAX_FILES", "50"))
+
+# ---------------- Ingestion Scheduling ----------------
+# Uploads wait for one of INGEST_SLOTS slots (see src/scheduler.py):
+# interactive uploads are admitted first, bulk imports hold at most
+# INGEST_BULK_MAX_SLOTS and share them fairly between tenants (tenant key
+# from the INGEST_TENANT_HEADER request header; weights like "acme=2,globex=1").
+INGEST_SLOTS = int(os.getenv("INGEST_SLOTS", "4"))
+INGEST_BULK_MAX_SLOTS = int(os.getenv("INGEST_BULK_MAX_SLOTS", "3"))
+INGEST_TENANT_HEADER = os.getenv("INGEST_TENANT_HEADER", "X-Tenant")
+INGEST_TENANT_WEIGHTS = os.getenv("INGEST_TENANT_WEIGHTS", "")
+
+# ---------------- Response Encoding ----------------
+# /upload, /upload/batch and /history answer in JSON (orjson when installed)
+# or MessagePack (Accept: application/msgpack); bodies of at least this many
+# bytes are gzip / br compressed when the client accepts it.
+RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+
 # ---------------- Optional Startup Logs ----------------
 def print_config():
     print("===============================================")
@@ -3,51 +3,127 @@
 
 import os
 import re
+import asyncio
 import shutil
 import json
+import tempfile
+import time
+from datetime import datetime
 from collections import Counter
-from typing import List, Dict, Any
+from typing import Dict, Any, List
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pymongo import MongoClient
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 from bson import ObjectId
 
 # ---------------- OCR, NLP & File Parsing ----------------
-import fitz  # PyMuPDF for PDFs
-from PIL import Image
 import pytesseract
-import spacy
-import dateparser
-import docx
-import pandas as pd
 
-# ---------------- OpenAI SDK ----------------
-from openai import OpenAI
+from src import metrics
+from src.analysis import load_nlp
+from src.legality_classifier import load_classifier
+from src.llm_client import Deadline, DeadlineExceeded, LLMClient, LLMUnavailable, RequestCancelled
+from src.ocr_engine import configure_ocr_engine
+from src.clauses import CLAUSE_TYPES, ClauseStore
+from src.entity_index import ENTITY_FIELDS, ENTITY_KINDS, EntityIndex
+from src import mongo
+from src.export import EXPORT_FORMATS, EXPORT_TABLES, MEDIA_TYPES, export
+from src.near_duplicates import NearDuplicateIndex, signature_fields
+from src.page_images import PageImageCache
+from src.page_store import PageStore
+from src.reprocess import ReprocessJob, stale_filter
+from src.responses import negotiated_response, parse_fields, slim
+from src.scheduler import PRIORITY_CLASSES, FairScheduler, parse_weights
+from src.pipeline import (
+    ANALYSIS_PROFILES,
+    ANALYSIS_STAGES,
+    EXTRACTION_STAGES,
+    IMAGE_TYPES,
+    EmptyDocument,
+    Pipeline,
+    PipelineJob,
+    UnsupportedFileType,
+    content_sha256,
+)
 
 # ---------------------- CONFIG IMPORT ----------------------
 try:
-    from config import (
-        OPENAI_API_KEY,
-        OPENAI_MODEL,
-        MONGO_URI,
-        DB_NAME,
-        TESSERACT_CMD,
-        client as OPENAI_CLIENT,
-    )
-except Exception:
-    try:
-        from config import OPENAI_API_KEY, OPENAI_MODEL, MONGO_URI, DB_NAME, TESSERACT_CMD
-        OPENAI_CLIENT = OpenAI(api_key=OPENAI_API_KEY)
-    except Exception as e:
-        raise ImportError("⚠️ config.py not found or missing required variables") from e
+    from config import OPENAI_API_KEY, OPENAI_MODEL, TESSERACT_CMD
+except Exception as e:
+    raise ImportError("⚠️ config.py not found or missing required variables") from e
+
+from config import (
+    PDF_MEMORY_BUDGET_MB,
+    EXCEL_ROWS_PER_PAGE,
+    EXCEL_MAX_ROWS,
+    EXCEL_MAX_COLS,
+    EXCEL_MAX_CELL_CHARS,
+    DOCX_PAGE_CHARS,
+    OCR_ENGINE,
+    OCR_WORKERS,
+    OCR_PREPROCESS,
+    OCR_TARGET_DPI,
+    TESSERACT_LANG,
+    TESSERACT_PSM,
+    TESSERACT_OEM,
+    PAGE_CODEC,
+    PAGE_COMPRESSION_LEVEL,
+    MAX_PAGES_PER_REQUEST,
+    PAGE_IMAGE_CACHE_DIR,
+    PAGE_IMAGE_CACHE_MB,
+    PAGE_IMAGE_MAX_SIZE,
+    PAGE_IMAGE_KEEP_OCR_RASTERS,
+    REPROCESS_BATCH_SIZE,
+    REPROCESS_MAX_DOCS_PER_SEC,
+    LEGALITY_LOCAL_ENABLED,
+    LEGALITY_MODEL_PATH,
+    LEGALITY_LOCAL_LOWER,
+    LEGALITY_LOCAL_UPPER,
+    OPENAI_BASE_URL,
+    OPENAI_TIMEOUT_SECONDS,
+    OPENAI_MAX_RETRIES,
+    OPENAI_MAX_CONCURRENCY,
+    OPENAI_TOKENS_PER_MINUTE,
+    OPENAI_BREAKER_FAILURES,
+    OPENAI_BREAKER_RESET_SECONDS,
+    UPLOAD_BUDGET_SECONDS,
+    AI_RESPONSE_BUDGET_SECONDS,
+    UPLOAD_ANALYSIS_PROFILE,
+    BATCH_ANALYSIS_PROFILE,
+    BATCH_UPLOAD_MAX_FILES,
+    INGEST_SLOTS,
+    INGEST_BULK_MAX_SLOTS,
+    INGEST_TENANT_HEADER,
+    INGEST_TENANT_WEIGHTS,
+    RESPONSE_COMPRESS_MIN_BYTES,
+)
 
 # ---------------------- MONGO SETUP ------------------------
-client_mongo = MongoClient(MONGO_URI)
-db = client_mongo[DB_NAME]
-collection = db["documents"]
+# One pooled client per process (src/mongo.py): sync for the pipeline's worker
+# threads, async (motor) for request handlers; indexes are created at startup
+mongo_layer = mongo.shared()
+db = mongo_layer.db
+collection = db[mongo.DOCUMENTS]
+
+# Page text lives in its own compressed collection, not in document records
+page_store = PageStore(db["pages"], codec=PAGE_CODEC, level=PAGE_COMPRESSION_LEVEL)
+
+# MinHash signatures + LSH band keys on document records
+near_duplicates = NearDuplicateIndex(collection)
+
+# Normalized (kind, key) -> documents index of extracted entities
+entity_index = EntityIndex(db["entities"], db["entity_aliases"])
+
+# Segmented clauses (heading, types, page offsets, text), one record each
+clause_store = ClauseStore(db["clauses"])
+
+def async_documents():
+    """documents collection on the async client, for code running on the event loop"""
+    return mongo_layer.async_db[mongo.DOCUMENTS]
 
 # ---------------------- OCR + NLP SETUP --------------------
 if TESSERACT_CMD:
@@ -55,24 +131,44 @@ if TESSERACT_CMD:
 else:
     print("⚠️ Warning: TESSERACT_CMD not configured. Using system default.")
 
-# Load SpaCy NLP model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    raise RuntimeError("⚠️ SpaCy model 'en_core_web_sm' not found. Run: python -m spacy download en_core_web_sm")
+# One long-lived OCR engine (tesserocr worker pool, or pytesseract fallback)
+ocr_engine = configure_ocr_engine(
+    backend=OCR_ENGINE,
+    lang=TESSERACT_LANG,
+    psm=TESSERACT_PSM,
+    oem=TESSERACT_OEM,
+    workers=OCR_WORKERS,
+    preprocess=OCR_PREPROCESS,
+    target_dpi=OCR_TARGET_DPI,
+)
+print(f"✅ OCR engine: {ocr_engine.name}")
+
+# Load SpaCy NLP model (shared with the pipeline, see src/analysis.py)
+nlp = load_nlp()
 
 # ---------------------- OPENAI SETUP -----------------------
 if not OPENAI_API_KEY:
     raise ValueError("⚠️ OPENAI_API_KEY not set in config.py or .env")
 
-client = OPENAI_CLIENT  # use the client from config.py
+# Shared async client: timeouts, retries, concurrency/token limits, circuit breaker
+llm = LLMClient(
+    api_key=OPENAI_API_KEY,
+    model=OPENAI_MODEL,
+    base_url=OPENAI_BASE_URL,
+    timeout=OPENAI_TIMEOUT_SECONDS,
+    max_retries=OPENAI_MAX_RETRIES,
+    max_concurrency=OPENAI_MAX_CONCURRENCY,
+    tokens_per_minute=OPENAI_TOKENS_PER_MINUTE,
+    breaker_failures=OPENAI_BREAKER_FAILURES,
+    breaker_reset_seconds=OPENAI_BREAKER_RESET_SECONDS,
+)
 
 # ---------------------- VERIFY OPENAI KEY ------------------
-def verify_openai_key():
+async def verify_openai_key():
     try:
-        resp = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[{"role": "user", "content": "Ping: verify connectivity (short reply)"}],
+        await llm.achat(
+            [{"role": "user", "content": "Ping: verify connectivity (short reply)"}],
+            deadline=Deadline(OPENAI_TIMEOUT_SECONDS),
             max_tokens=5,
             temperature=0
         )
@@ -82,22 +178,16 @@ def verify_openai_key():
         print("❌ OpenAI API key validation failed:", e)
         return False
 
-verify_openai_key()
-
 # ---------------------- CONSTANTS --------------------------
 UPLOAD_FOLDER = "uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-EMAIL_PATTERN = r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+"
-PHONE_PATTERN = r"\+?\d[\d\s-]{7,}\d"
-DATE_PATTERN = r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b"
-SIGNER_PATTERN = r"(signed by|signature|authorized signatory|attested by)\s*[:\-]?\s*([A-Z][a-z]+(?:\s[A-Z][a-z]+)*)"
+# Rendered page PNGs (and OCR rasters), disk LRU keyed by file hash / page / size
+page_images = PageImageCache(PAGE_IMAGE_CACHE_DIR, PAGE_IMAGE_CACHE_MB * 1024 * 1024, PAGE_IMAGE_MAX_SIZE)
+DISCONNECT_POLL_SECONDS = 0.5
 
-CLAUSE_KEYWORDS = [
-    "termination", "confidentiality", "liability", "warranty",
-    "dispute", "governing law", "payment", "obligation",
-    "indemnity", "agreement"
-]
+# Interactive uploads first, bulk imports shared fairly between tenants
+ingest_scheduler = FairScheduler(INGEST_SLOTS, {"bulk": INGEST_BULK_MAX_SLOTS}, parse_weights(INGEST_TENANT_WEIGHTS))
 
 # ---------------------- FASTAPI APP ------------------------
 app = FastAPI(title="⚖️ LegalDocAI Backend", version="1.0.0")
@@ -110,114 +200,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def startup_checks():
+    await run_in_threadpool(mongo_layer.ensure_indexes, page_store, near_duplicates, entity_index, clause_store)
+    await verify_openai_key()
+
+@app.on_event("shutdown")
+def close_mongo():
+    mongo_layer.close()
+
 # ===========================================================
 # ---------------------- HELPERS ----------------------------
 # ===========================================================
 
-def detect_file_type(filename: str) -> str:
-    ext = filename.split(".")[-1].lower()
-    if ext in ["pdf", "docx", "xls", "xlsx", "png", "jpg", "jpeg"]:
-        return ext
-    return "unknown"
-
-def extract_text_from_pdf(file_path: str) -> List[str]:
-    texts = []
-    doc = fitz.open(file_path)
-    for page in doc:
-        text = page.get_text("text") or ""
-        if not text.strip():
-            # Fallback OCR
-            pix = page.get_pixmap(dpi=300)
-            img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
-            text = pytesseract.image_to_string(img)
-        texts.append(text)
-    return texts
-
-def extract_text_from_image(file_path: str) -> List[str]:
-    image = Image.open(file_path)
-    return [pytesseract.image_to_string(image)]
-
-def extract_text_from_word(file_path: str) -> List[str]:
-    doc = docx.Document(file_path)
-    return [para.text for para in doc.paragraphs if para.text.strip()]
-
-def extract_text_from_excel(file_path: str) -> List[str]:
-    df = pd.read_excel(file_path)
-    return [df.to_string()]
-
-def extract_text_by_filetype(file_path: str, ext: str) -> List[str]:
-    if ext == "pdf":
-        return extract_text_from_pdf(file_path)
-    elif ext in ["png", "jpg", "jpeg"]:
-        return extract_text_from_image(file_path)
-    elif ext == "docx":
-        return extract_text_from_word(file_path)
-    elif ext in ["xls", "xlsx"]:
-        return extract_text_from_excel(file_path)
-    else:
-        raise HTTPException(status_code=400, detail="Unsupported file type")
-
-# ---------------------- TEXT ANALYSIS ----------------------
-def analyze_text_overall(full_text: str):
-    doc = nlp(full_text)
-    names = [ent.text for ent in doc.ents if ent.label_ == "PERSON"]
-    orgs = [ent.text for ent in doc.ents if ent.label_ == "ORG"]
-    emails = re.findall(EMAIL_PATTERN, full_text)
-    phones = re.findall(PHONE_PATTERN, full_text)
-    dates = [str(dateparser.parse(d).date()) for d in re.findall(DATE_PATTERN, full_text) if dateparser.parse(d)]
-    clause_counter = Counter()
-    for kw in CLAUSE_KEYWORDS:
-        clause_counter[kw] = len(re.findall(r"\b" + re.escape(kw) + r"\b", full_text, flags=re.IGNORECASE))
-    signers = [m[1] for m in re.findall(SIGNER_PATTERN, full_text, flags=re.IGNORECASE)]
-    tokens = [t.lemma_.lower() for t in doc if t.is_alpha and not t.is_stop]
-    keyword_frequency = dict(Counter(tokens).most_common(10))
-
-    # Summarization
-    sentences = [s.text.strip() for s in doc.sents if len(s.text.strip()) > 20]
-    summary = "No summary available."
-    if sentences:
-        freq = Counter(t.lemma_.lower() for t in doc if not t.is_stop and not t.is_punct)
-        maxf = max(freq.values()) if freq else 1
-        sent_scores = {}
-        for s in sentences:
-            s_doc = nlp(s.lower())
-            score = sum(freq.get(t.lemma_.lower(),0)/maxf for t in s_doc)
-            sent_scores[s] = score
-        summary = " ".join(s for s,_ in sorted(sent_scores.items(), key=lambda x: x[1], reverse=True)[:3])
-
-    total_clauses = sum(clause_counter.values())
-    legality_score = min(100, int(
-        min(40, len(set(names))*2) +
-        min(30, total_clauses*4) +
-        min(30, (len(set(emails))+len(set(phones)))*2)
-    ))
-
-    results_summary = {
-        "names": list(set(names)),
-        "organizations": list(set(orgs)),
-        "emails": list(set(emails)),
-        "phones": list(set(phones)),
-        "dates": list(set(dates)),
-        "clauses_found": list(clause_counter.keys()),
-        "signers": list(set(signers))
-    }
-
-    analytics = {
-        "clause_summary": dict(clause_counter),
-        "keyword_frequency": keyword_frequency,
-        "summary": summary,
-        "legality_score": legality_score,
-        "total_names": len(results_summary["names"]),
-        "total_emails": len(results_summary["emails"]),
-        "total_phones": len(results_summary["phones"]),
-        "total_signers": len(results_summary["signers"]),
-        "total_clauses": total_clauses
-    }
-
-    return results_summary, analytics
-
 # ---------------------- OPENAI VERIFICATION -----------------
-def ask_openai_for_verification_and_confidence(text: str) -> Dict[str, Any]:
+def ask_openai_for_verification_and_confidence(text: str, deadline: Deadline = None) -> Dict[str, Any]:
     try:
         prompt = (
             "You are a legal document verification assistant. "
@@ -226,14 +223,12 @@ def ask_openai_for_verification_and_confidence(text: str) -> Dict[str, Any]:
             "Document (first 2000 chars):\n" + text[:2000]
         )
 
-        resp = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[{"role":"user","content":prompt}],
+        raw = llm.chat(
+            [{"role":"user","content":prompt}],
+            deadline=deadline,
             temperature=0.0,
             max_tokens=150
-        )
-
-        raw = resp.choices[0].message.content.strip() # type: ignore
+        ).strip()
         json_str = None
         if raw.startswith("{"):
             json_str = raw
@@ -255,17 +250,125 @@ def ask_openai_for_verification_and_confidence(text: str) -> Dict[str, Any]:
             confidence = int(m.group(1)) if m else None
             return {"marker": marker, "ai_confidence": confidence, "raw": raw}
 
+    except RequestCancelled:
+        # client gone: let the pipeline stop instead of recording a verdict
+        raise
+    except LLMUnavailable as e:
+        # circuit open or request budget spent: degrade instead of waiting on upstream
+        print(f"⚠️ OpenAI verification skipped: {e}")
+        return {"marker":"❌ UNVERIFIED (skipped)","ai_confidence":None,"raw":str(e),"verified_by":"skipped"}
     except Exception as e:
         print(f"⚠️ OpenAI verification failed: {e}")
-        return {"marker":"❌ UNVERIFIED","ai_confidence":None,"raw":str(e)}
+        return {"marker":"❌ UNVERIFIED","ai_confidence":None,"raw":f"Error:{e}"}
+
+# ---------------------- LOCAL LEGALITY CLASSIFIER ---------
+legality_classifier = load_classifier(LEGALITY_MODEL_PATH) if LEGALITY_LOCAL_ENABLED else None
+
+def local_verification(text: str, analytics: Dict[str, Any]):
+    """Local verdict when confident; None sends the document to OpenAI."""
+    if legality_classifier is None:
+        return None
+    return legality_classifier.verdict(text, analytics, lower=LEGALITY_LOCAL_LOWER, upper=LEGALITY_LOCAL_UPPER)
+
+# ---------------------- PIPELINE --------------------------
+def save_document(job: PipelineJob) -> str:
+    """Persist stage: metadata + analytics in documents, page text in the page store."""
+    doc_id = str(ObjectId())
+    try:
+        page_store.put_pages(doc_id, enumerate(job.page_texts, start=1))
+        doc_data = {
+            "doc_id": doc_id,
+            "filename": job.filename,
+            "sha256": job.sha256,
+            "source_path": job.source if isinstance(job.source, str) else None,
+            "results": [{k: v for k, v in r.items() if k != "text"} for r in job.page_results],
+            "analytics": job.analytics,
+            "pipeline_version": job.versions,
+            "timings": job.timings,
+            **signature_fields(job.minhash)
+        }
+        collection.insert_one(doc_data)
+        entity_index.index_document(doc_id, job.results_summary)
+        clause_store.put_clauses(doc_id, job.clauses, job.filename)
+    except Exception as e:
+        print(f"⚠️ MongoDB insert failed: {e}")
+    return doc_id
+
+pipeline = Pipeline(
+    verifier=ask_openai_for_verification_and_confidence,
+    classifier=local_verification,
+    persister=save_document,
+    memory_budget_bytes=PDF_MEMORY_BUDGET_MB * 1024 * 1024,
+    spreadsheet_limits={
+        "rows_per_page": EXCEL_ROWS_PER_PAGE,
+        "max_rows": EXCEL_MAX_ROWS,
+        "max_cols": EXCEL_MAX_COLS,
+        "max_cell_chars": EXCEL_MAX_CELL_CHARS,
+    },
+    docx_page_chars=DOCX_PAGE_CHARS,
+    raster_sink=page_images.store_raster if PAGE_IMAGE_KEEP_OCR_RASTERS else None,
+)
 
 # ===========================================================
 # ---------------------- ROUTES -----------------------------
 # ===========================================================
 
-@app.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
-    """Upload, scan, analyze, verify and save document"""
+PROFILE_PATTERN = "^(" + "|".join(ANALYSIS_PROFILES) + ")$"
+PRIORITY_PATTERN = "^(" + "|".join(PRIORITY_CLASSES) + ")$"
+# heavy fields left out of responses unless named in ?fields= (see src/responses.py)
+UPLOAD_SLIM_EXCLUDE = ("results.text",)
+HISTORY_SLIM_EXCLUDE = ("results", "timings", "analytics.openai_raw", "analytics.chart_data")
+
+async def cancel_on_disconnect(request: Request, deadline: Deadline):
+    """Cancel the request's pipeline work (OCR, NLP, OpenAI) as soon as the client goes away"""
+    while not deadline.cancelled:
+        if await request.is_disconnected():
+            metrics.incr("upload.client_disconnects")
+            deadline.cancel("client disconnected")
+            return
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+async def run_stages(request: Request, job: PipelineJob, stages) -> PipelineJob:
+    """Run pipeline stages in the threadpool; cancelled/over-budget jobs become HTTP 499/504"""
+    watcher = asyncio.create_task(cancel_on_disconnect(request, job.deadline)) if request is not None else None
+    try:
+        return await run_in_threadpool(pipeline.run, job, stages)
+    except RequestCancelled as e:
+        metrics.incr("upload.cancelled")
+        raise HTTPException(status_code=499, detail=str(e))
+    except DeadlineExceeded as e:
+        metrics.incr("upload.deadline_exceeded")
+        raise HTTPException(status_code=504, detail=str(e))
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+
+def ingest_tenant(request: Request) -> str:
+    """Tenant key for fair scheduling: the tenant header, else the client address"""
+    if request is None:
+        return "default"
+    return request.headers.get(INGEST_TENANT_HEADER) or (request.client.host if request.client else "default")
+
+async def admit_upload(request: Request, file: UploadFile, priority: str, deadline: Deadline):
+    """Wait for an ingestion slot; giving up while queued (disconnect, budget) becomes HTTP 499/504.
+    The returned ticket must be released with ingest_scheduler.release()"""
+    watcher = asyncio.create_task(cancel_on_disconnect(request, deadline)) if request is not None else None
+    cost = 1 + (getattr(file, "size", None) or 0) / (1024 * 1024)  # ~ work per MiB of file
+    try:
+        return await ingest_scheduler.acquire(priority, ingest_tenant(request), cost=cost, deadline=deadline)
+    except RequestCancelled as e:
+        metrics.incr("upload.cancelled")
+        raise HTTPException(status_code=499, detail=str(e))
+    except DeadlineExceeded as e:
+        metrics.incr("upload.deadline_exceeded")
+        raise HTTPException(status_code=504, detail=str(e))
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+
+async def start_upload(file: UploadFile, profile: str, stages=EXTRACTION_STAGES, request: Request = None,
+                       deadline: Deadline = None) -> PipelineJob:
+    """Save an uploaded file and run the given extraction stages; bad files become HTTP 400"""
     if not file or not file.filename:
         raise HTTPException(status_code=400, detail="No file selected.")
 
@@ -274,82 +377,178 @@ async def upload_file(file: UploadFile = File(...)):
     with open(file_path,"wb") as f:
         shutil.copyfileobj(file.file,f)
 
-    file_type = detect_file_type(file.filename)
+    job = PipelineJob(file.filename, file_path, profile=profile)
+    job.deadline = deadline or Deadline(UPLOAD_BUDGET_SECONDS)
     try:
-        page_texts = extract_text_by_filetype(file_path,file_type)
+        await run_stages(request, job, stages)
+    except HTTPException:
+        raise
+    except UnsupportedFileType:
+        raise HTTPException(status_code=400, detail="Unsupported file type")
+    except EmptyDocument:
+        raise HTTPException(status_code=400,detail="Failed to extract text from file.")
     except Exception as e:
         raise HTTPException(status_code=400,detail=f"Failed to extract text: {e}")
-
-    if not any(page_texts):
-        raise HTTPException(status_code=400,detail="Failed to extract text from file.")
-
-    full_text = "\n".join(page_texts)
-    results_summary, analytics = analyze_text_overall(full_text)
-    analytics["file_type"] = file_type
-    analytics["total_pages"] = len(page_texts)
-
-    # OpenAI verification
+    return job
+
+async def process_upload(file: UploadFile, profile: str, request: Request = None,
+                         priority: str = "interactive") -> PipelineJob:
+    """Save an uploaded file and, once the scheduler admits it, run it through the whole pipeline
+    with the given analysis profile; the work stops early if the client disconnects"""
+    t0 = time.perf_counter()
+    deadline = Deadline(UPLOAD_BUDGET_SECONDS)  # time spent queued counts against the budget
+    ticket = await admit_upload(request, file, priority, deadline)
     try:
-        openai_verif = ask_openai_for_verification_and_confidence(full_text)
-        analytics["verified_marker"] = openai_verif.get("marker","❌ UNVERIFIED")
-        analytics["ai_confidence"] = openai_verif.get("ai_confidence",None)
-        analytics["openai_raw"] = openai_verif.get("raw","")[:2000]
-    except Exception as e:
-        analytics["verified_marker"]="❌ UNVERIFIED"
-        analytics["ai_confidence"]=None
-        analytics["openai_raw"]=f"Error:{e}"
-
-    # Page-wise NLP
-    results=[]
-    for i,txt in enumerate(page_texts):
-        pdoc = nlp(txt)
-        page_names = [ent.text for ent in pdoc.ents if ent.label_=="PERSON"]
-        page_orgs = [ent.text for ent in pdoc.ents if ent.label_=="ORG"]
-        page_emails = re.findall(EMAIL_PATTERN, txt)
-        page_phones = re.findall(PHONE_PATTERN, txt)
-        page_clauses = [kw for kw in CLAUSE_KEYWORDS if re.search(r"\b"+re.escape(kw)+r"\b",txt,flags=re.IGNORECASE)]
-        page_signers = [m[1] for m in re.findall(SIGNER_PATTERN, txt, flags=re.IGNORECASE)]
-        results.append({
-            "page": i+1,
-            "names": page_names,
-            "organizations": page_orgs,
-            "emails": page_emails,
-            "phones": page_phones,
-            "clauses_found": page_clauses,
-            "signers": page_signers,
-            "text": txt
-        })
-
-    # Chart data
-    nlp_score = analytics.get("legality_score",0)
-    ai_conf = analytics.get("ai_confidence")
-    combined_confidence = ai_conf if isinstance(ai_conf,int) else nlp_score
-    chart_data = {
-        "labels":["NLP Legality Score","AI Confidence"],
-        "values":[nlp_score, ai_conf if ai_conf is not None else nlp_score],
-        "combined_confidence": combined_confidence
-    }
-    analytics["chart_data"] = chart_data
+        job = await start_upload(file, profile, request=request, deadline=deadline)
+        # analyze -> embed -> verify (OpenAI) -> persist (MongoDB)
+        await run_stages(request, job, ANALYSIS_STAGES)
+    finally:
+        ingest_scheduler.release(ticket)
+    metrics.observe("upload.seconds", time.perf_counter() - t0)
+    if "first_page" in job.timings:
+        metrics.observe("upload.time_to_first_page", job.timings["first_page"])
+    return job
 
-    # MongoDB insert
+@app.post("/upload")
+async def upload_file(
+    request: Request,
+    file: UploadFile = File(...),
+    profile: str = Query(UPLOAD_ANALYSIS_PROFILE, pattern=PROFILE_PATTERN),
+    priority: str = Query("interactive", pattern=PRIORITY_PATTERN),
+    fields: str = Query(None, description="extra fields, e.g. results.text; * for everything"),
+):
+    """Upload, scan, analyze, verify and save document (page text only with fields=results.text)"""
+    job = await process_upload(file, profile, request, priority)
+    return negotiated_response(request, {
+        "fileName": file.filename,
+        "results": job.page_results,
+        "analytics": job.analytics
+    }, UPLOAD_SLIM_EXCLUDE, fields, compress_min_bytes=RESPONSE_COMPRESS_MIN_BYTES)
+
+@app.post("/upload/batch")
+async def upload_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    profile: str = Query(BATCH_ANALYSIS_PROFILE, pattern=PROFILE_PATTERN),
+    priority: str = Query("bulk", pattern=PRIORITY_PATTERN),
+):
+    """Bulk import: every file through the pipeline (triage analysis by default, bulk priority
+    shared fairly between tenants); per-file status"""
+    if len(files) > BATCH_UPLOAD_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_UPLOAD_MAX_FILES} files per batch.")
+    results = []
+    for file in files:
+        if await request.is_disconnected():
+            metrics.incr("upload.client_disconnects")
+            break
+        try:
+            job = await process_upload(file, profile, request, priority)
+            results.append({
+                "fileName": file.filename,
+                "doc_id": job.doc_id,
+                "pages": len(job.pages),
+                "analysis_profile": job.profile,
+                "seconds": round(sum(v for k, v in job.timings.items() if k != "first_page"), 3)
+            })
+        except HTTPException as e:
+            results.append({"fileName": file.filename, "error": e.detail})
+    return negotiated_response(request, {"profile": profile, "results": results},
+                               compress_min_bytes=RESPONSE_COMPRESS_MIN_BYTES)
+
+# ---------------- Streaming Upload ----------------
+def stream_event(fmt: str, event: str, data: Dict[str, Any]) -> str:
+    """One NDJSON line or one Server-Sent Event"""
+    if fmt == "sse":
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+    return json.dumps({"event": event, **data}, default=str) + "\n"
+
+def stream_upload_events(job: PipelineJob, fmt: str, t0: float):
+    """Page events as soon as each page is extracted + analyzed, then the document event"""
+    yield stream_event(fmt, "start", {"fileName": job.filename, "file_type": job.file_type, "analysis_profile": job.profile})
     try:
-        doc_id = str(ObjectId())
-        doc_data = {
-            "doc_id": doc_id,
-            "filename": file.filename,
-            "results": results,
-            "analytics": analytics
-        }
-        collection.insert_one(doc_data)
+        for page in pipeline.iter_pages(job):
+            result = pipeline.analyze_page(job, page)
+            if len(job.streamed_results) == 1:
+                metrics.observe("upload.stream.time_to_first_page", time.perf_counter() - t0)
+            yield stream_event(fmt, "page", {
+                "page": result["page"],
+                "text": result["text"],
+                "entities": {field: result[field] for field in ENTITY_FIELDS.values()},
+                "clauses_found": result["clauses_found"],
+                "clauses": result["clauses"],
+            })
+        # pages are all extracted: ocr only records its version, the rest is document-level
+        pipeline.run(job, EXTRACTION_STAGES[-1:] + ANALYSIS_STAGES)
+    except RequestCancelled:
+        metrics.incr("upload.cancelled")
+        return
+    except DeadlineExceeded as e:
+        metrics.incr("upload.deadline_exceeded")
+        yield stream_event(fmt, "error", {"detail": str(e)})
+        return
+    except EmptyDocument:
+        metrics.incr("upload.stream.errors")
+        yield stream_event(fmt, "error", {"detail": "Failed to extract text from file."})
+        return
     except Exception as e:
-        print(f"⚠️ MongoDB insert failed: {e}")
-
-    return JSONResponse({
-        "fileName": file.filename,
-        "results": results,
-        "analytics": analytics
+        metrics.incr("upload.stream.errors")
+        yield stream_event(fmt, "error", {"detail": f"Processing failed: {e}"})
+        return
+    metrics.observe("upload.stream.seconds", time.perf_counter() - t0)
+    yield stream_event(fmt, "document", {
+        "fileName": job.filename,
+        "doc_id": job.doc_id,
+        "pages": len(job.pages),
+        "analytics": job.analytics,
+        # document-level segmentation: clauses may span pages
+        "clauses": [{k: v for k, v in c.items() if k != "text"} for c in job.clauses],
+        "timings": job.timings,
     })
 
+async def stream_until_disconnect(request: Request, events, job: PipelineJob, ticket=None):
+    """Relay events from the worker thread; if the client goes away (or the response is torn
+    down early), cancel the job so the thread stops at its next page/stage. The ingestion
+    slot (ticket) is held until the stream ends"""
+    watcher = asyncio.create_task(cancel_on_disconnect(request, job.deadline))
+    finished = False
+    try:
+        async for chunk in iterate_in_threadpool(events):
+            yield chunk
+        finished = True
+    finally:
+        watcher.cancel()
+        if ticket is not None:
+            ingest_scheduler.release(ticket)
+        if not finished and not job.deadline.cancelled:
+            metrics.incr("upload.client_disconnects")
+            job.deadline.cancel("client disconnected")
+
+@app.post("/upload/stream")
+async def upload_stream(
+    request: Request,
+    file: UploadFile = File(...),
+    profile: str = Query(UPLOAD_ANALYSIS_PROFILE, pattern=PROFILE_PATTERN),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+    priority: str = Query("interactive", pattern=PRIORITY_PATTERN),
+):
+    """Upload and stream per-page results (text, entities, clauses) as NDJSON or SSE while
+    the document is processed; the last event carries document analytics and verification"""
+    t0 = time.perf_counter()
+    metrics.incr("upload.stream.requests")
+    deadline = Deadline(UPLOAD_BUDGET_SECONDS)
+    ticket = await admit_upload(request, file, priority, deadline)
+    try:
+        job = await start_upload(file, profile, stages=EXTRACTION_STAGES[:-1], request=request, deadline=deadline)
+    except BaseException:
+        ingest_scheduler.release(ticket)
+        raise
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_until_disconnect(request, stream_upload_events(job, format, t0), job, ticket),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # ---------------- AI Question Route ----------------
 class AIRequest(BaseModel):
     text: str
@@ -360,32 +559,267 @@ async def ai_response(req: AIRequest):
     """Ask custom questions or summarize document text"""
     prompt = f"{req.text}\n\nQuestion: {req.question}\nAnswer briefly:" if req.question else f"Summarize the following document text briefly:\n\n{req.text}"
     try:
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[{"role":"user","content":prompt}],
+        answer = await llm.achat(
+            [{"role":"user","content":prompt}],
+            deadline=Deadline(AI_RESPONSE_BUDGET_SECONDS),
             temperature=0.3,
             max_tokens=500
         )
-        return {"answer":response.choices[0].message.content}
+        return {"answer":answer}
     except Exception as e:
         return {"answer":f"⚠️ Failed to call OpenAI: {e}"}
 
+@app.get("/api/ai-health")
+def ai_health():
+    """OpenAI circuit breaker state and call counters"""
+    return llm.health()
+
+# ---------------- Metrics ----------------
+@app.get("/metrics")
+def get_metrics():
+    """Process counters and latency percentiles (upload time, time to first page, ...)"""
+    return {**metrics.snapshot(), "worker": os.getenv("PREFORK_WORKER"), "process": metrics.process_memory()}
+
+# ---------------- Ingestion Queue ----------------
+@app.get("/ingest/queue")
+def ingest_queue():
+    """Queued / running uploads per priority class (and per tenant), slot limits and weights"""
+    return ingest_scheduler.stats()
+
 # ---------------- History ----------------
 @app.get("/history")
-def get_history():
-    """Get all stored document analysis history"""
+async def get_history(
+    request: Request,
+    fields: str = Query(None, description="extra fields, e.g. results,timings; * for everything"),
+):
+    """Get all stored document analysis history (per-page results, timings and raw OpenAI
+    output only when requested through fields)"""
     try:
-        docs = list(collection.find({},{"_id":0}))
-        return {"history":docs}
+        docs = await async_documents().find({},{"_id":0,"minhash":0,"lsh_bands":0}).to_list(None)
+        docs = slim(docs, HISTORY_SLIM_EXCLUDE, parse_fields(fields))
+        return negotiated_response(request, {"history":docs}, compress_min_bytes=RESPONSE_COMPRESS_MIN_BYTES)
     except Exception as e:
         return {"error":str(e),"history":[]}
 
+# ---------------- Document Pages ----------------
+@app.get("/document/{doc_id}/pages")
+def get_document_pages(
+    doc_id: str,
+    start: int = Query(1, alias="from", ge=1),
+    end: int = Query(None, alias="to", ge=1),
+):
+    """Page text for pages from..to (inclusive), read lazily from the page store"""
+    if not collection.find_one({"doc_id": doc_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Document not found")
+    last = start + MAX_PAGES_PER_REQUEST - 1
+    end = min(end, last) if end else last
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    return {
+        "doc_id": doc_id,
+        "from": start,
+        "to": end,
+        "total_pages": page_store.page_count(doc_id),
+        "pages": page_store.get_pages(doc_id, start, end)
+    }
+
+# ---------------- Page Images ----------------
+@app.get("/document/{doc_id}/page/{page}.png")
+def get_page_image(
+    doc_id: str,
+    page: int,
+    request: Request,
+    size: int = Query(PAGE_IMAGE_MAX_SIZE, ge=16, le=PAGE_IMAGE_MAX_SIZE, description="longer side in px"),
+):
+    """One page of a PDF / image document as PNG (small sizes for thumbnails),
+    cached on disk by file hash, page and size; answers If-None-Match with 304"""
+    doc = collection.find_one({"doc_id": doc_id}, {"_id": 0, "filename": 1, "sha256": 1, "source_path": 1,
+                                                   "analytics.file_type": 1, "analytics.total_pages": 1})
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    analytics = doc.get("analytics") or {}
+    file_type = analytics.get("file_type")
+    if file_type != "pdf" and file_type not in IMAGE_TYPES:
+        raise HTTPException(status_code=415, detail=f"No page images for {file_type or 'unknown'} files")
+    if page < 1 or page > (analytics.get("total_pages") or 1):
+        raise HTTPException(status_code=404, detail="Page not found")
+    path = doc.get("source_path") or os.path.join(UPLOAD_FOLDER, doc.get("filename") or "")
+    sha256 = doc.get("sha256")
+    if not sha256:
+        # documents stored before file hashes were recorded
+        if not os.path.isfile(path):
+            raise HTTPException(status_code=404, detail="Original file not available")
+        sha256 = content_sha256(path)
+        collection.update_one({"doc_id": doc_id}, {"$set": {"sha256": sha256, "source_path": path}})
+
+    headers = {"ETag": PageImageCache.etag(sha256, page, size), "Cache-Control": "private, max-age=86400"}
+    if headers["ETag"] in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    def load_source():
+        # uploads/ is keyed by filename, so the file may since have been replaced
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            data = None
+        if data is None or content_sha256(data) != sha256:
+            raise HTTPException(status_code=404, detail="Original file not available")
+        return data, file_type
+
+    try:
+        data, origin = page_images.page_png(sha256, page, size, load_source)
+    except IndexError:
+        raise HTTPException(status_code=404, detail="Page not found")
+    headers["X-Page-Image"] = origin
+    return Response(data, media_type="image/png", headers=headers)
+
+# ---------------- Near Duplicates ----------------
+@app.get("/document/{doc_id}/near-duplicates")
+def get_near_duplicates(
+    doc_id: str,
+    min_similarity: float = Query(0.5, ge=0.0, le=1.0),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Stored documents whose estimated Jaccard similarity (MinHash/LSH) is at least min_similarity"""
+    matches = near_duplicates.find(doc_id, min_similarity=min_similarity, limit=limit)
+    if matches is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"doc_id": doc_id, "near_duplicates": matches}
+
+# ---------------- Entities ----------------
+ENTITY_KIND_PATTERN = "^(" + "|".join(ENTITY_KINDS) + ")$"
+
+class AliasRequest(BaseModel):
+    kind: str
+    alias: str
+    canonical: str
+
+@app.get("/entities")
+def lookup_entity(
+    q: str = Query(..., min_length=1),
+    kind: str = Query("person", pattern=ENTITY_KIND_PATTERN),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Documents mentioning an entity (case, whitespace, honorifics and aliases folded)"""
+    found = entity_index.documents(kind, q, limit=limit)
+    names = {d["doc_id"]: d.get("filename") for d in collection.find(
+        {"doc_id": {"$in": found["doc_ids"]}}, {"_id": 0, "doc_id": 1, "filename": 1})}
+    found["documents"] = [{"doc_id": d, "filename": names.get(d)} for d in found.pop("doc_ids")]
+    return found
+
+@app.get("/entities/autocomplete")
+def autocomplete_entities(
+    prefix: str = Query(..., min_length=1),
+    kind: str = Query(None, pattern=ENTITY_KIND_PATTERN),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """Entities starting with prefix, most documents first"""
+    return {"prefix": prefix, "entities": entity_index.autocomplete(prefix, kind=kind, limit=limit)}
+
+@app.get("/entities/co-occurrence")
+def entity_co_occurrence(
+    q: str = Query(..., min_length=1),
+    kind: str = Query("person", pattern=ENTITY_KIND_PATTERN),
+    with_kind: str = Query(None, pattern=ENTITY_KIND_PATTERN),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Entities appearing in the same documents as the given one, by shared document count"""
+    return entity_index.co_occurring(kind, q, with_kind=with_kind, limit=limit)
+
+@app.post("/entities/aliases")
+def add_entity_alias(req: AliasRequest):
+    """Merge an entity spelling into a canonical one (stored and future documents)"""
+    if req.kind not in ENTITY_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(ENTITY_KINDS)}")
+    try:
+        return entity_index.add_alias(req.kind, req.alias, req.canonical)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# ---------------- Clauses ----------------
+@app.get("/clauses")
+def search_clauses(
+    type: str = Query(None, pattern="^(" + "|".join(CLAUSE_TYPES) + ")$"),
+    q: str = Query(None, min_length=1),
+    doc_id: str = None,
+    limit: int = Query(20, ge=1, le=100),
+    skip: int = Query(0, ge=0),
+):
+    """Clause bodies across all documents by clause type and/or text query (best match first)"""
+    if not type and not q and not doc_id:
+        raise HTTPException(status_code=400, detail="Provide type, q or doc_id")
+    return {"type": type, "q": q, "clauses": clause_store.search(type, q, doc_id=doc_id, limit=limit, skip=skip)}
+
+@app.get("/document/{doc_id}/clauses")
+def get_document_clauses(doc_id: str):
+    """Segmented clauses of one document, in order, with page offsets"""
+    if not collection.find_one({"doc_id": doc_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"doc_id": doc_id, "clauses": clause_store.get_clauses(doc_id)}
+
+# ---------------- Reprocessing ----------------
+reprocess_job = None
+
+def new_reprocess_job(profile: str = None, query: Dict[str, Any] = None) -> ReprocessJob:
+    return ReprocessJob(
+        collection,
+        page_store,
+        pipeline,
+        entity_index=entity_index,
+        clause_store=clause_store,
+        batch_size=REPROCESS_BATCH_SIZE,
+        max_docs_per_second=REPROCESS_MAX_DOCS_PER_SEC,
+        profile=profile,
+        query=query,
+    )
+
+@app.post("/reprocess")
+def start_reprocess(profile: str = Query(None, pattern=PROFILE_PATTERN)):
+    """Re-run stale analyze/embed/verify stages on stored documents in the background;
+    with profile, promote every document analyzed with a lower profile instead"""
+    global reprocess_job
+    if reprocess_job and reprocess_job.running:
+        raise HTTPException(status_code=409, detail="Reprocessing already running")
+    reprocess_job = new_reprocess_job(profile).start()
+    return reprocess_job.status()
+
+@app.post("/document/{doc_id}/promote")
+async def promote_document(doc_id: str, profile: str = Query("full", pattern=PROFILE_PATTERN)):
+    """Re-analyze one document with a higher profile from its stored pages (no re-extraction)"""
+    doc = await async_documents().find_one({"doc_id": doc_id}, {"_id": 0, "analytics.analysis_profile": 1})
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    current = (doc.get("analytics") or {}).get("analysis_profile", "full")
+    if ANALYSIS_PROFILES.index(current) >= ANALYSIS_PROFILES.index(profile):
+        raise HTTPException(status_code=409, detail=f"Document already analyzed with profile '{current}'")
+    status = await run_in_threadpool(new_reprocess_job(profile, {"doc_id": doc_id}).run)
+    if status["failed"]:
+        raise HTTPException(status_code=500, detail=status["errors"])
+    analytics = (await async_documents().find_one({"doc_id": doc_id}, {"_id": 0, "analytics": 1}))["analytics"]
+    return {"doc_id": doc_id, "analytics": analytics}
+
+@app.get("/reprocess/status")
+async def reprocess_status():
+    """Progress and ETA of the current/last reprocessing run"""
+    if not reprocess_job:
+        return {"state": "idle", "stale_documents": await async_documents().count_documents(stale_filter())}
+    return reprocess_job.status()
+
+@app.delete("/reprocess")
+def cancel_reprocess():
+    """Stop the running reprocessing job after its current batch"""
+    if not reprocess_job or not reprocess_job.running:
+        raise HTTPException(status_code=404, detail="No reprocessing running")
+    reprocess_job.cancel()
+    return reprocess_job.status()
+
 # ---------------- Analytics Summary ----------------
 @app.get("/analytics-summary")
-def analytics_summary():
+async def analytics_summary():
     """Summarize all analytics across documents"""
     try:
-        docs = list(collection.find({},{"_id":0}))
+        docs = await async_documents().find({},{"_id":0,"analytics":1}).to_list(None)
         summary = {
             "total_documents": len(docs),
             "total_pages":0,
@@ -416,6 +850,36 @@ def analytics_summary():
     except Exception as e:
         return {"error":str(e)}
 
+# ---------------- Analytics Export ----------------
+@app.get("/export/analytics")
+def export_analytics(
+    table: str = Query("documents", pattern="^(" + "|".join(EXPORT_TABLES) + ")$"),
+    format: str = Query("parquet", pattern="^(" + "|".join(EXPORT_FORMATS) + ")$"),
+    columns: str = Query(None, description="comma-separated column names (default: all)"),
+    since: datetime = Query(None, description="created at or after (UTC when no offset)"),
+    until: datetime = Query(None, description="created before (UTC when no offset)"),
+):
+    """Analytics (table=documents) or per-page entities (table=entities) as a Parquet / Arrow file,
+    written batch by batch from the Mongo cursor (src.export)"""
+    fd, path = tempfile.mkstemp(suffix=f".{format}")
+    os.close(fd)
+    try:
+        counts = export(collection, path, table, format,
+                        [c.strip() for c in columns.split(",") if c.strip()] if columns else None, since, until)
+    except ValueError as e:
+        os.remove(path)
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        os.remove(path)
+        raise HTTPException(status_code=501, detail=str(e))
+    return FileResponse(
+        path,
+        media_type=MEDIA_TYPES[format],
+        filename=f"{table}.{format}",
+        headers={"X-Export-Documents": str(counts["documents"]), "X-Export-Rows": str(counts["rows"])},
+        background=BackgroundTask(os.remove, path),
+    )
+
 # ===========================================================
 # ---------------------- RUN SERVER -------------------------
 # ===========================================================
@@ -0,0 +1,194 @@
+# src/analysis.py
+"""
+Rule + spaCy analysis of extracted document text (entities, clauses,
+signers, keyword frequency, extractive summary and legality score).
+Shared by main.py and backend/app through src/pipeline.py.
+"""
+import hashlib
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Tuple
+
+import dateparser
+
+EMAIL_PATTERN = r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+"
+PHONE_PATTERN = r"\+?\d[\d\s-]{7,}\d"
+DATE_PATTERN = r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b"
+SIGNER_PATTERN = r"(signed by|signature|authorized signatory|attested by)\s*[:\-]?\s*([A-Z][a-z]+(?:\s[A-Z][a-z]+)*)"
+
+CLAUSE_KEYWORDS = [
+    "termination", "confidentiality", "liability", "warranty",
+    "dispute", "governing law", "payment", "obligation",
+    "indemnity", "agreement"
+]
+
+# Bump when analyze_text_overall/analyze_pages change behaviour (e.g. the
+# legality scoring). Pattern and keyword edits are picked up automatically
+# by analysis_version(); stored analytics with another version are stale.
+ANALYSIS_VERSION = 1
+
+_EMAIL_RE = re.compile(EMAIL_PATTERN)
+_PHONE_RE = re.compile(PHONE_PATTERN)
+_DATE_RE = re.compile(DATE_PATTERN)
+_SIGNER_RE = re.compile(SIGNER_PATTERN, flags=re.IGNORECASE)
+_CLAUSE_RES = {kw: re.compile(r"\b" + re.escape(kw) + r"\b", flags=re.IGNORECASE) for kw in CLAUSE_KEYWORDS}
+
+
+def analysis_version() -> str:
+    """ANALYSIS_VERSION plus a fingerprint of the patterns and clause keywords."""
+    spec = "\n".join([EMAIL_PATTERN, PHONE_PATTERN, DATE_PATTERN, SIGNER_PATTERN] + CLAUSE_KEYWORDS)
+    return f"{ANALYSIS_VERSION}-{hashlib.sha1(spec.encode('utf-8')).hexdigest()[:8]}"
+
+
+@lru_cache(maxsize=None)
+def load_nlp(model: str = "en_core_web_sm"):
+    """Load a spaCy model once per process."""
+    import spacy
+
+    try:
+        return spacy.load(model)
+    except OSError:
+        raise RuntimeError(f"⚠️ SpaCy model '{model}' not found. Run: python -m spacy download {model}")
+
+
+@lru_cache(maxsize=None)
+def load_light_nlp(model: str = "en_core_web_sm"):
+    """The same model without parser and NER (tokens and lemmas only), for triage analysis."""
+    import spacy
+
+    try:
+        return spacy.load(model, disable=["parser", "ner"])
+    except OSError:
+        raise RuntimeError(f"⚠️ SpaCy model '{model}' not found. Run: python -m spacy download {model}")
+
+
+def _regex_findings(text: str, parse_dates: bool = True) -> Dict[str, Any]:
+    """
+    Everything the compiled patterns find: emails, phones, dates, signers,
+    clause counts. Without parse_dates, dates are kept as matched.
+    """
+    dates = []
+    for d in _DATE_RE.findall(text):
+        parsed = dateparser.parse(d) if parse_dates else None
+        if parsed:
+            dates.append(str(parsed.date()))
+        elif not parse_dates:
+            dates.append(d)
+    return {
+        "emails": _EMAIL_RE.findall(text),
+        "phones": _PHONE_RE.findall(text),
+        "dates": dates,
+        "signers": [m[1] for m in _SIGNER_RE.findall(text)],
+        "clauses": Counter({kw: len(pattern.findall(text)) for kw, pattern in _CLAUSE_RES.items()}),
+    }
+
+
+def _legality_score(names: List[str], total_clauses: int, emails: List[str], phones: List[str]) -> int:
+    return min(100, int(
+        min(40, len(set(names))*2) +
+        min(30, total_clauses*4) +
+        min(30, (len(set(emails))+len(set(phones)))*2)
+    ))
+
+
+def _summarize(results_summary: Dict[str, List[str]], clause_counter: Counter, keyword_frequency: Dict[str, int],
+               summary: str) -> Dict[str, Any]:
+    total_clauses = sum(clause_counter.values())
+    return {
+        "clause_summary": dict(clause_counter),
+        "keyword_frequency": keyword_frequency,
+        "summary": summary,
+        "legality_score": _legality_score(results_summary["names"], total_clauses,
+                                          results_summary["emails"], results_summary["phones"]),
+        "total_names": len(results_summary["names"]),
+        "total_emails": len(results_summary["emails"]),
+        "total_phones": len(results_summary["phones"]),
+        "total_signers": len(results_summary["signers"]),
+        "total_clauses": total_clauses
+    }
+
+
+def _results_summary(names, orgs, found: Dict[str, Any]) -> Dict[str, List[str]]:
+    return {
+        "names": list(set(names)),
+        "organizations": list(set(orgs)),
+        "emails": list(set(found["emails"])),
+        "phones": list(set(found["phones"])),
+        "dates": list(set(found["dates"])),
+        "clauses_found": list(found["clauses"].keys()),
+        "signers": list(set(found["signers"]))
+    }
+
+
+def analyze_text_overall(nlp, full_text: str) -> Tuple[Dict[str, List[str]], Dict[str, Any]]:
+    """Document-level entities and analytics for the whole text."""
+    doc = nlp(full_text)
+    names = [ent.text for ent in doc.ents if ent.label_ == "PERSON"]
+    orgs = [ent.text for ent in doc.ents if ent.label_ == "ORG"]
+    found = _regex_findings(full_text)
+    tokens = [t.lemma_.lower() for t in doc if t.is_alpha and not t.is_stop]
+    keyword_frequency = dict(Counter(tokens).most_common(10))
+
+    # Summarization
+    sentences = [s.text.strip() for s in doc.sents if len(s.text.strip()) > 20]
+    summary = "No summary available."
+    if sentences:
+        freq = Counter(t.lemma_.lower() for t in doc if not t.is_stop and not t.is_punct)
+        maxf = max(freq.values()) if freq else 1
+        sent_scores = {}
+        for s, s_doc in zip(sentences, nlp.pipe(s.lower() for s in sentences)):
+            sent_scores[s] = sum(freq.get(t.lemma_.lower(), 0) / maxf for t in s_doc)
+        summary = " ".join(s for s, _ in sorted(sent_scores.items(), key=lambda x: x[1], reverse=True)[:3])
+
+    results_summary = _results_summary(names, orgs, found)
+    return results_summary, _summarize(results_summary, found["clauses"], keyword_frequency, summary)
+
+
+def analyze_text_triage(nlp, full_text: str) -> Tuple[Dict[str, List[str]], Dict[str, Any]]:
+    """
+    Fast variant of analyze_text_overall for bulk imports: regex entities and
+    clause counts, keyword frequency from a spaCy pipeline without parser
+    and NER (load_light_nlp). No person/organization names, no summary, and
+    dates are left as written (dateparser is skipped).
+    """
+    found = _regex_findings(full_text, parse_dates=False)
+    tokens = [t.lemma_.lower() for t in nlp(full_text) if t.is_alpha and not t.is_stop]
+    results_summary = _results_summary([], [], found)
+    summary = "Summary not generated (triage analysis)."
+    return results_summary, _summarize(results_summary, found["clauses"], dict(Counter(tokens).most_common(10)), summary)
+
+
+def analyze_pages(nlp, page_texts: Iterable[str], batch_size: int = 16) -> List[Dict[str, Any]]:
+    """Page-wise entities; spaCy processes the pages in batches via nlp.pipe."""
+    texts = list(page_texts)
+    results = []
+    for i, (txt, pdoc) in enumerate(zip(texts, nlp.pipe(texts, batch_size=batch_size))):
+        results.append({
+            "page": i + 1,
+            "names": [ent.text for ent in pdoc.ents if ent.label_ == "PERSON"],
+            "organizations": [ent.text for ent in pdoc.ents if ent.label_ == "ORG"],
+            "emails": _EMAIL_RE.findall(txt),
+            "phones": _PHONE_RE.findall(txt),
+            "clauses_found": [kw for kw, pattern in _CLAUSE_RES.items() if pattern.search(txt)],
+            "signers": [m[1] for m in _SIGNER_RE.findall(txt)],
+            "text": txt
+        })
+    return results
+
+
+def analyze_pages_triage(page_texts: Iterable[str]) -> List[Dict[str, Any]]:
+    """Page-wise regex findings only (no spaCy), same shape as analyze_pages."""
+    return [
+        {
+            "page": i + 1,
+            "names": [],
+            "organizations": [],
+            "emails": _EMAIL_RE.findall(txt),
+            "phones": _PHONE_RE.findall(txt),
+            "clauses_found": [kw for kw, pattern in _CLAUSE_RES.items() if pattern.search(txt)],
+            "signers": [m[1] for m in _SIGNER_RE.findall(txt)],
+            "text": txt
+        }
+        for i, txt in enumerate(page_texts)
+    ]
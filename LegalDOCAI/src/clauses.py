@@ -0,0 +1,189 @@
+# src/clauses.py
+"""
+Clause segmentation and the per-clause collection.
+
+segment_clauses() walks the page texts line by line and starts a new clause
+at every heading it recognizes:
+
+  - "Section 4", "Clause 4.2", "Article IV" (with or without a title)
+  - numbered headings: "12.", "12.1", "3)" followed by a capitalized title
+  - short ALL-CAPS lines ("INDEMNIFICATION", "GOVERNING LAW")
+
+Text before the first heading becomes a "preamble" clause. Each clause is
+labeled with the CLAUSE_KEYWORDS types its heading names; untitled
+clauses fall back to the types their body mentions at least twice, and
+numbered sub-clauses ("12.3") inherit the types of their section ("12").
+Positions are kept as (page_start, start) .. (page_end, end) character
+offsets into the stored page text.
+
+ClauseStore keeps one record per clause in its own collection, with a
+multikey index on types and a text index on heading + text, so
+/clauses?type=indemnity&q=... is answered from clause records alone.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import ASCENDING, TEXT, InsertOne
+
+from src.analysis import CLAUSE_KEYWORDS
+
+# bump when segmentation or labeling changes; part of the analyze stage version
+CLAUSE_SEGMENTER_VERSION = 1
+MAX_HEADING_CHARS = 80
+BODY_TYPE_MIN_HITS = 2
+WRITE_BATCH = 500
+
+# wording variants per clause type; keywords not listed match literally
+CLAUSE_TYPE_VARIANTS = {
+    "termination": r"terminat\w*",
+    "confidentiality": r"confidential\w*|non-disclosure",
+    "liability": r"liabilit\w*|liable",
+    "warranty": r"warrant(?:y|ies)",
+    "dispute": r"disputes?|arbitration",
+    "governing law": r"governing law|jurisdiction",
+    "payment": r"payments?|fees|invoic\w*",
+    "obligation": r"obligations?",
+    "indemnity": r"indemn\w*",
+    "agreement": r"entire agreement",
+}
+CLAUSE_TYPES = list(CLAUSE_KEYWORDS)
+_TYPE_RES = {
+    kw: re.compile(r"\b(?:" + CLAUSE_TYPE_VARIANTS.get(kw, re.escape(kw)) + r")\b", flags=re.IGNORECASE)
+    for kw in CLAUSE_TYPES
+}
+
+_SECTION_RE = re.compile(
+    r"^\s*(?:section|clause|article)\s+(\d{1,3}(?:\.\d{1,3})*|[ivxlc]{1,6})\b[.:)\-–]?\s*(.*)$", flags=re.IGNORECASE
+)
+_NUMBERED_RE = re.compile(r"^\s*(\d{1,2}(?:\.\d{1,2}){0,3})[.)]?\s+([\"'“(]?[A-Z].*)$")
+_CAPS_RE = re.compile(r"^\s*([A-Z][A-Z0-9 &,'/()\-]{3,%d})\s*$" % MAX_HEADING_CHARS)
+
+
+def segmenter_version() -> str:
+    return f"c{CLAUSE_SEGMENTER_VERSION}"
+
+
+def clause_types(heading: str, body: str) -> List[str]:
+    """Clause types named by the heading, else mentioned repeatedly in the body."""
+    types = [kw for kw, rx in _TYPE_RES.items() if heading and rx.search(heading)]
+    if types:
+        return types
+    return [kw for kw, rx in _TYPE_RES.items() if len(rx.findall(body)) >= BODY_TYPE_MIN_HITS]
+
+
+def _heading_of(line: str):
+    """(number, heading) if the line starts a clause, else None."""
+    if len(line) > 400:
+        return None
+    m = _SECTION_RE.match(line)
+    if m:
+        return m.group(1).upper() if not m.group(1)[0].isdigit() else m.group(1), _title(m.group(2))
+    m = _NUMBERED_RE.match(line)
+    if m:
+        return m.group(1), _title(m.group(2))
+    m = _CAPS_RE.match(line)
+    if m and sum(c.isalpha() for c in m.group(1)) >= 4:
+        return None, m.group(1).strip().title()
+    return None
+
+
+def _title(rest: str) -> str:
+    """'Indemnity. The Supplier shall ...' -> 'Indemnity'."""
+    rest = rest.strip(" -–:.\t")
+    head = re.split(r"(?<=[a-z)])[.:]\s", rest, maxsplit=1)[0]
+    return head[:MAX_HEADING_CHARS].rstrip(" .:")
+
+
+def segment_clauses(page_texts: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Split page texts into clauses: {"index", "number", "heading", "types",
+    "page_start", "start", "page_end", "end", "text"}; pages are 1-based and
+    start/end are character offsets into those pages' text.
+    """
+    clauses: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    parts: List[str] = []
+
+    end_page, end = 1, 0  # where the last line seen ends
+
+    def close() -> None:
+        text = "\n".join(parts).strip()
+        if current is not None and text:
+            current.update(page_end=end_page, end=end, text=text)
+            clauses.append(current)
+
+    for page, page_text in enumerate(page_texts, start=1):
+        offset = 0
+        for line in page_text.split("\n"):
+            heading = _heading_of(line) if line.strip() else None
+            if heading is not None or current is None:
+                close()
+                number, title = heading if heading is not None else (None, "Preamble")
+                current = {"number": number, "heading": title, "page_start": page, "start": offset}
+                parts = []
+            parts.append(line)
+            end_page, end = page, offset + len(line)
+            offset += len(line) + 1
+    close()
+
+    section_types: Dict[str, List[str]] = {}
+    for i, clause in enumerate(clauses):
+        clause["index"] = i
+        clause["types"] = clause_types(clause["heading"] if clause["heading"] != "Preamble" else "", clause["text"])
+        number = clause["number"]
+        if number:
+            top = number.split(".")[0]
+            if "." in number:
+                clause["types"] = sorted(set(clause["types"]) | set(section_types.get(top, [])), key=CLAUSE_TYPES.index)
+            else:
+                section_types[top] = clause["types"]
+    return clauses
+
+
+class ClauseStore:
+    """Segmented clauses of every document, one record per clause."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_index([("doc_id", ASCENDING), ("index", ASCENDING)], unique=True)
+        self.collection.create_index([("types", ASCENDING)])
+        self.collection.create_index([("heading", TEXT), ("text", TEXT)], weights={"heading": 5, "text": 1})
+
+    def put_clauses(self, doc_id: str, clauses: Iterable[Dict[str, Any]], filename: Optional[str] = None) -> int:
+        """Replace the stored clauses of doc_id; returns the clause count."""
+        self.collection.delete_many({"doc_id": doc_id})
+        ops = [InsertOne({"doc_id": doc_id, "filename": filename, **c}) for c in clauses]
+        for i in range(0, len(ops), WRITE_BATCH):
+            self.collection.bulk_write(ops[i:i + WRITE_BATCH], ordered=False)
+        return len(ops)
+
+    def get_clauses(self, doc_id: str) -> List[Dict[str, Any]]:
+        return list(self.collection.find({"doc_id": doc_id}, {"_id": 0}).sort("index", ASCENDING))
+
+    def search(
+        self,
+        clause_type: Optional[str] = None,
+        q: Optional[str] = None,
+        doc_id: Optional[str] = None,
+        limit: int = 20,
+        skip: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """Clauses of a type and/or matching a text query (best text match first)."""
+        query: Dict[str, Any] = {}
+        if clause_type:
+            query["types"] = clause_type
+        if doc_id:
+            query["doc_id"] = doc_id
+        projection: Dict[str, Any] = {"_id": 0}
+        if q:
+            query["$text"] = {"$search": q}
+            projection["score"] = {"$meta": "textScore"}
+            cursor = self.collection.find(query, projection).sort([("score", {"$meta": "textScore"})])
+        else:
+            cursor = self.collection.find(query, projection).sort([("doc_id", ASCENDING), ("index", ASCENDING)])
+        return list(cursor.skip(skip).limit(limit))
+
+    def delete(self, doc_id: str) -> None:
+        self.collection.delete_many({"doc_id": doc_id})
@@ -1,8 +1,8 @@
-from pymongo import MongoClient
+from src import mongo
 
-client = MongoClient("mongodb://localhost:27017/")
-db = client["legal_documents"]
-collection = db["documents"]
+# Shared pooled client (src/mongo.py); these free-form records (no doc_id)
+# stay out of the app's analysis records
+collection = mongo.shared().db[mongo.LEGACY_DOCUMENTS]
 
 def insert_document(doc):
     collection.insert_one(doc)
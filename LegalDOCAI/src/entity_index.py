@@ -0,0 +1,224 @@
+# src/entity_index.py
+"""
+Inverted index of the entities analyze_text_overall extracts.
+
+Every (document, entity) pair is one small record in its own collection,
+{doc_id, kind, key, display}, where kind is person / organization / email /
+phone / signer, display the surface form as found and key its normalized
+form: case and whitespace folded, honorifics and punctuation dropped,
+company suffixes spelled one way ("Pvt. Ltd." / "Private Limited" ->
+"pvt ltd"), phones reduced to their last ten digits. Keys are then mapped
+through a manual alias table (entity_aliases) so "ACME" and "Acme
+Corporation" can be merged into one entity.
+
+With indexes on (kind, key, doc_id), (key) and (doc_id) an entity lookup is
+an index scan, autocomplete an anchored prefix range, and co-occurrence an
+aggregation over the entity records of the matching documents only.
+
+Rebuild from stored page results (documents ingested before the index):
+    python -m src.entity_index rebuild
+"""
+import argparse
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, InsertOne
+
+# kind -> key of the same entities in results_summary / page results
+ENTITY_FIELDS = {
+    "person": "names",
+    "organization": "organizations",
+    "email": "emails",
+    "phone": "phones",
+    "signer": "signers",
+}
+ENTITY_KINDS = tuple(ENTITY_FIELDS)
+WRITE_BATCH = 500
+
+_HONORIFICS = {"mr", "mrs", "ms", "miss", "dr", "prof", "shri", "sri", "smt", "sir", "madam"}
+_ORG_SUFFIXES = {
+    "limited": "ltd", "private": "pvt", "incorporated": "inc", "corporation": "corp",
+    "company": "co", "l.l.c": "llc", "l.l.p": "llp", "p": "pvt",
+}
+_PUNCT_RE = re.compile(r"[^\w@+\s]", flags=re.UNICODE)
+
+
+def normalize(kind: str, value: str) -> str:
+    """Canonical key of an entity surface form ("" if nothing is left)."""
+    text = " ".join(str(value).split()).casefold()
+    if kind == "email":
+        text = text.replace(" ", "")
+        return (text[7:] if text.startswith("mailto:") else text).strip(".,;:<>()[]\"'")
+    if kind == "phone":
+        digits = re.sub(r"\D", "", text)
+        return digits[-10:] if len(digits) >= 10 else digits
+    if kind == "organization":
+        for long, short in _ORG_SUFFIXES.items():
+            if "." in long:
+                text = text.replace(long, short)
+    words = _PUNCT_RE.sub(" ", text).split()
+    if kind in ("person", "signer"):
+        while words and words[0] in _HONORIFICS:
+            words = words[1:]
+    elif kind == "organization":
+        if words and words[0] == "the":
+            words = words[1:]
+        words = [_ORG_SUFFIXES.get(w, w) for w in words]
+    return " ".join(words)
+
+
+def entities_of(summary: Dict[str, Iterable[str]]) -> List[Tuple[str, str]]:
+    """(kind, surface form) pairs of a results_summary or page result."""
+    return [(kind, value) for kind, field in ENTITY_FIELDS.items() for value in summary.get(field) or [] if value]
+
+
+class EntityIndex:
+    """Entity records of all documents, plus the alias table used to merge them."""
+
+    def __init__(self, collection, aliases_collection):
+        self.collection = collection
+        self.aliases_collection = aliases_collection
+        self._aliases: Optional[Dict[Tuple[str, str], str]] = None
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_index([("kind", ASCENDING), ("key", ASCENDING), ("doc_id", ASCENDING)], unique=True)
+        self.collection.create_index([("key", ASCENDING)])
+        self.collection.create_index([("doc_id", ASCENDING)])
+        self.aliases_collection.create_index([("kind", ASCENDING), ("alias", ASCENDING)], unique=True)
+
+    # ---------------------- KEYS & ALIASES ----------------------
+    @property
+    def aliases(self) -> Dict[Tuple[str, str], str]:
+        if self._aliases is None:
+            self._aliases = {(a["kind"], a["alias"]): a["canonical"] for a in self.aliases_collection.find({}, {"_id": 0})}
+        return self._aliases
+
+    def key_of(self, kind: str, value: str) -> str:
+        key = normalize(kind, value)
+        return self.aliases.get((kind, key), key)
+
+    def add_alias(self, kind: str, alias: str, canonical: str) -> Dict[str, Any]:
+        """Merge entity `alias` into `canonical`, for stored records and future ingests."""
+        alias_key, canonical_key = normalize(kind, alias), self.key_of(kind, canonical)
+        if not alias_key or not canonical_key or alias_key == canonical_key:
+            raise ValueError("alias and canonical must normalize to different, non-empty keys")
+        self.aliases_collection.update_one(
+            {"kind": kind, "alias": alias_key}, {"$set": {"canonical": canonical_key}}, upsert=True
+        )
+        # earlier aliases of the merged entity follow it
+        self.aliases_collection.update_many({"kind": kind, "canonical": alias_key}, {"$set": {"canonical": canonical_key}})
+        self._aliases = None
+        moved = 0
+        for rec in self.collection.find({"kind": kind, "key": alias_key}, {"_id": 0}):
+            self.collection.update_one(
+                {"kind": kind, "key": canonical_key, "doc_id": rec["doc_id"]},
+                {"$setOnInsert": {"display": rec.get("display")}},
+                upsert=True,
+            )
+            moved += 1
+        self.collection.delete_many({"kind": kind, "key": alias_key})
+        return {"kind": kind, "alias": alias_key, "canonical": canonical_key, "documents_merged": moved}
+
+    # ---------------------- INGEST ----------------------
+    def index_document(self, doc_id: str, summary: Dict[str, Iterable[str]]) -> int:
+        """Replace the entity records of doc_id; returns how many were written."""
+        self.collection.delete_many({"doc_id": doc_id})
+        seen: Dict[Tuple[str, str], str] = {}
+        for kind, value in entities_of(summary):
+            key = self.key_of(kind, value)
+            if key:
+                seen.setdefault((kind, key), " ".join(str(value).split()))
+        ops = [InsertOne({"doc_id": doc_id, "kind": k, "key": key, "display": d}) for (k, key), d in seen.items()]
+        for i in range(0, len(ops), WRITE_BATCH):
+            self.collection.bulk_write(ops[i:i + WRITE_BATCH], ordered=False)
+        return len(ops)
+
+    def delete(self, doc_id: str) -> None:
+        self.collection.delete_many({"doc_id": doc_id})
+
+    # ---------------------- QUERIES ----------------------
+    def documents(self, kind: str, value: str, limit: int = 100) -> Dict[str, Any]:
+        """Documents mentioning the entity (matched on its normalized key)."""
+        key = self.key_of(kind, value)
+        cursor = self.collection.find({"kind": kind, "key": key}, {"_id": 0, "doc_id": 1, "display": 1})
+        recs = list(cursor.sort("doc_id", DESCENDING).limit(limit))
+        return {
+            "kind": kind,
+            "key": key,
+            "total": self.collection.count_documents({"kind": kind, "key": key}),
+            "forms": sorted({r["display"] for r in recs if r.get("display")}),
+            "doc_ids": [r["doc_id"] for r in recs],
+        }
+
+    def autocomplete(self, prefix: str, kind: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Entities whose key starts with the normalized prefix, most documents first."""
+        match: Dict[str, Any] = {}
+        if kind:
+            match["kind"] = kind
+        key_prefix = normalize(kind, prefix) if kind else " ".join(prefix.split()).casefold()
+        if key_prefix:
+            match["key"] = {"$regex": "^" + re.escape(key_prefix)}
+        return self._count_by_entity(match, limit)
+
+    def co_occurring(self, kind: str, value: str, with_kind: Optional[str] = None, limit: int = 20) -> Dict[str, Any]:
+        """Entities appearing in the same documents as (kind, value), by shared document count."""
+        key = self.key_of(kind, value)
+        doc_ids = self.collection.distinct("doc_id", {"kind": kind, "key": key})
+        match: Dict[str, Any] = {"doc_id": {"$in": doc_ids}}
+        if with_kind:
+            match["kind"] = with_kind
+        related = [e for e in self._count_by_entity(match, limit + 1) if (e["kind"], e["key"]) != (kind, key)]
+        return {"kind": kind, "key": key, "documents": len(doc_ids), "co_occurring": related[:limit]}
+
+    def _count_by_entity(self, match: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        pipeline = [
+            {"$match": match},
+            {"$group": {"_id": {"kind": "$kind", "key": "$key"}, "display": {"$first": "$display"}, "documents": {"$sum": 1}}},
+            {"$sort": {"documents": -1, "_id.key": 1}},
+            {"$limit": limit},
+        ]
+        return [
+            {"kind": g["_id"]["kind"], "key": g["_id"]["key"], "display": g["display"], "documents": g["documents"]}
+            for g in self.collection.aggregate(pipeline)
+        ]
+
+
+# ---------------------- REBUILD ----------------------
+def summary_from_results(results: Iterable[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Document-level entity lists from stored per-page results."""
+    summary: Dict[str, List[str]] = {field: [] for field in ENTITY_FIELDS.values()}
+    for page in results or []:
+        for field in summary:
+            summary[field].extend(page.get(field) or [])
+    return summary
+
+
+def rebuild(index: EntityIndex, documents_collection) -> int:
+    """Re-index every stored document from its page results; returns the document count."""
+    count = 0
+    for rec in documents_collection.find({}, {"_id": 0, "doc_id": 1, "results": 1}):
+        if rec.get("doc_id"):
+            index.index_document(rec["doc_id"], summary_from_results(rec.get("results")))
+            count += 1
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain the entity index")
+    parser.add_argument("command", choices=["rebuild"])
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+
+    from src import mongo
+
+    load_dotenv()
+    db = mongo.shared().db
+    index = EntityIndex(db["entities"], db["entity_aliases"])
+    index.ensure_indexes()
+    if args.command == "rebuild":
+        print(f"✅ Indexed entities of {rebuild(index, db['documents'])} documents")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# src/export.py
+"""
+Columnar bulk export of document analytics (Parquet or Arrow IPC).
+
+Two tables can be exported:
+
+    documents   one row per document: scores, entity / clause counts, one
+                clause_<keyword> column per CLAUSE_KEYWORDS entry (from
+                clause_summary), file type, profile, verification marker
+                and confidence
+    entities    one row per entity found on a page: doc_id, page, kind
+                (person / organization / email / phone / signer), value
+
+Rows are read from a MongoDB cursor `batch_size` documents at a time and
+written as one row group / record batch per `batch_size` rows, so memory
+stays bounded however many documents match. Only the Mongo fields behind
+the requested columns are projected (never page text, raw OpenAI output
+or chart data). since / until filter on the creation time embedded in the
+record's ObjectId, so no extra index is needed.
+
+    python -m src.export documents --out analytics.parquet --since 2025-01-01
+    python -m src.export entities --out entities.arrow --columns doc_id,kind,value
+
+pyarrow is an optional dependency; export() raises RuntimeError without it.
+"""
+import argparse
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+
+from src.analysis import CLAUSE_KEYWORDS
+from src.entity_index import ENTITY_FIELDS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = pq = None
+
+EXPORT_FORMATS = ("parquet", "arrow")
+EXPORT_TABLES = ("documents", "entities")
+DEFAULT_BATCH_ROWS = 5000
+MEDIA_TYPES = {"parquet": "application/vnd.apache.parquet", "arrow": "application/vnd.apache.arrow.file"}
+
+
+def _created_at(rec: Dict[str, Any]) -> Optional[datetime]:
+    return rec["_id"].generation_time if isinstance(rec.get("_id"), ObjectId) else None
+
+
+def _analytics(key: str) -> Callable[[Dict[str, Any]], Any]:
+    return lambda rec: (rec.get("analytics") or {}).get(key)
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def clause_column(keyword: str) -> str:
+    return "clause_" + keyword.replace(" ", "_")
+
+
+# column -> (arrow type, mongo fields it needs, getter(record))
+DOCUMENT_COLUMNS: Dict[str, Tuple[str, Tuple[str, ...], Callable[[Dict[str, Any]], Any]]] = {
+    "doc_id": ("string", ("doc_id",), lambda rec: rec.get("doc_id")),
+    "created_at": ("timestamp", ("_id",), _created_at),
+    "filename": ("string", ("filename",), lambda rec: rec.get("filename")),
+    "file_type": ("string", ("analytics.file_type",), _analytics("file_type")),
+    "analysis_profile": ("string", ("analytics.analysis_profile",), _analytics("analysis_profile")),
+    "total_pages": ("int32", ("analytics.total_pages",), _analytics("total_pages")),
+    "legality_score": ("float64", ("analytics.legality_score",), lambda rec: _number(_analytics("legality_score")(rec))),
+    "total_names": ("int32", ("analytics.total_names",), _analytics("total_names")),
+    "total_emails": ("int32", ("analytics.total_emails",), _analytics("total_emails")),
+    "total_phones": ("int32", ("analytics.total_phones",), _analytics("total_phones")),
+    "total_signers": ("int32", ("analytics.total_signers",), _analytics("total_signers")),
+    "total_clauses": ("int32", ("analytics.total_clauses",), _analytics("total_clauses")),
+    "verified_marker": ("string", ("analytics.verified_marker",), _analytics("verified_marker")),
+    "verified_by": ("string", ("analytics.verified_by",), _analytics("verified_by")),
+    "ai_confidence": ("float64", ("analytics.ai_confidence",), lambda rec: _number(_analytics("ai_confidence")(rec))),
+}
+for _kw in CLAUSE_KEYWORDS:
+    DOCUMENT_COLUMNS[clause_column(_kw)] = (
+        "int32", ("analytics.clause_summary",),
+        lambda rec, kw=_kw: int(((rec.get("analytics") or {}).get("clause_summary") or {}).get(kw, 0)),
+    )
+
+ENTITY_COLUMNS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "doc_id": ("string", ("doc_id",)),
+    "created_at": ("timestamp", ("_id",)),
+    "page": ("int32", ("results.page",)),
+    "kind": ("string", ()),
+    "value": ("string", tuple(f"results.{field}" for field in ENTITY_FIELDS.values())),
+}
+
+
+def _arrow_type(name: str):
+    if name == "timestamp":
+        return pa.timestamp("ms", tz="UTC")
+    return getattr(pa, name)()
+
+
+def resolve_columns(table: str, columns: Optional[Sequence[str]] = None) -> List[str]:
+    """Requested columns in table order (all when None); ValueError on unknown ones."""
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table '{table}' (choose from {', '.join(EXPORT_TABLES)})")
+    available = DOCUMENT_COLUMNS if table == "documents" else ENTITY_COLUMNS
+    if not columns:
+        return list(available)
+    unknown = [c for c in columns if c not in available]
+    if unknown:
+        raise ValueError(f"Unknown {table} columns: {', '.join(unknown)} (available: {', '.join(available)})")
+    return [c for c in available if c in columns]
+
+
+def date_filter(since: Optional[datetime] = None, until: Optional[datetime] = None) -> Dict[str, Any]:
+    """Mongo filter on the ObjectId creation time: since <= created < until (naive times are UTC)."""
+    bounds = {}
+    if since:
+        bounds["$gte"] = ObjectId.from_datetime(since)
+    if until:
+        bounds["$lt"] = ObjectId.from_datetime(until)
+    return {"_id": bounds} if bounds else {}
+
+
+def _document_rows(records, columns: List[str]) -> Iterator[Tuple[Any, ...]]:
+    getters = [DOCUMENT_COLUMNS[c][2] for c in columns]
+    for rec in records:
+        yield tuple(get(rec) for get in getters)
+
+
+def _entity_rows(records, columns: List[str]) -> Iterator[Tuple[Any, ...]]:
+    for rec in records:
+        base = {"doc_id": rec.get("doc_id"), "created_at": _created_at(rec)}
+        for result in rec.get("results") or []:
+            for kind, field in ENTITY_FIELDS.items():
+                for value in result.get(field) or []:
+                    row = dict(base, page=result.get("page"), kind=kind, value=value)
+                    yield tuple(row[c] for c in columns)
+
+
+def export(
+    collection,
+    sink,
+    table: str = "documents",
+    fmt: str = "parquet",
+    columns: Optional[Sequence[str]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    batch_size: int = DEFAULT_BATCH_ROWS,
+) -> Dict[str, int]:
+    """
+    Write `table` for the documents in `collection` created in [since, until)
+    to `sink` (path or binary file object) as Parquet or an Arrow IPC file.
+    Returns {"documents", "rows"}.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed (pip install pyarrow)")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format '{fmt}' (choose from {', '.join(EXPORT_FORMATS)})")
+    columns = resolve_columns(table, columns)
+    spec = DOCUMENT_COLUMNS if table == "documents" else ENTITY_COLUMNS
+    schema = pa.schema([(c, _arrow_type(spec[c][0])) for c in columns])
+    fields = {"doc_id"} if table == "entities" else set()
+    for c in columns:
+        fields.update(spec[c][1])
+    if table == "entities":
+        fields.add("results.page")
+        fields.update(ENTITY_COLUMNS["value"][1])
+    projection = {f: 1 for f in fields}
+    projection.setdefault("_id", 1 if "_id" in fields else 0)
+
+    counts = {"documents": 0, "rows": 0}
+
+    def records():
+        cursor = collection.find(date_filter(since, until), projection, batch_size=batch_size).sort("_id", 1)
+        for rec in cursor:
+            counts["documents"] += 1
+            yield rec
+
+    rows = _document_rows(records(), columns) if table == "documents" else _entity_rows(records(), columns)
+    writer = pq.ParquetWriter(sink, schema, compression="zstd") if fmt == "parquet" else pa.ipc.new_file(sink, schema)
+    try:
+        batch: List[Tuple[Any, ...]] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                _write(writer, schema, batch)
+                counts["rows"] += len(batch)
+                batch = []
+        if batch or not counts["rows"]:
+            _write(writer, schema, batch)
+            counts["rows"] += len(batch)
+    finally:
+        writer.close()
+    return counts
+
+
+def _write(writer, schema, batch: List[Tuple[Any, ...]]) -> None:
+    arrays = [pa.array([row[i] for row in batch], type=field.type) for i, field in enumerate(schema)]
+    writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export document analytics to Parquet / Arrow")
+    parser.add_argument("table", choices=EXPORT_TABLES)
+    parser.add_argument("--out", required=True, help="output file (.parquet, or .arrow / .feather for Arrow)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="default: from the --out extension")
+    parser.add_argument("--columns", help="comma-separated column names (default: all)")
+    parser.add_argument("--since", help="ISO date/time, inclusive (UTC when no offset)")
+    parser.add_argument("--until", help="ISO date/time, exclusive (UTC when no offset)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_ROWS)
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+
+    from src import mongo
+
+    load_dotenv()
+    fmt = args.format or ("arrow" if os.path.splitext(args.out)[1] in (".arrow", ".feather") else "parquet")
+    columns = [c.strip() for c in args.columns.split(",") if c.strip()] if args.columns else None
+    collection = mongo.shared().db["documents"]
+    counts = export(collection, args.out, args.table, fmt, columns, _parse_time(args.since),
+                    _parse_time(args.until), args.batch_size)
+    print(f"✅ Exported {counts['rows']} rows from {counts['documents']} documents to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
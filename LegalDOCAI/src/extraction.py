@@ -0,0 +1,512 @@
+# src/extraction.py
+"""
+Streaming text extraction shared by main.py and backend/app.
+
+Extractors are generators: they yield one page dict at a time so callers
+never hold more than the pages currently being worked on. Rasterized pages
+and embedded images are OCRed and released as soon as OCR is done.
+"""
+import datetime
+import io
+import threading
+import xml.etree.ElementTree as ET
+import zipfile
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+OCRFunc = Callable[[Image.Image], str]
+
+DEFAULT_MEMORY_BUDGET_BYTES = 256 * 1024 * 1024
+DEFAULT_OCR_DPI = 300
+MIN_OCR_DPI = 72
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    """Raised when a decoded image cannot fit in the request's memory budget."""
+
+
+class MemoryBudget:
+    """
+    Per-request accounting of decoded image memory.
+    Extractors acquire the decoded size of an image before materializing it
+    and the OCR step releases it as soon as it is done with the image. When
+    OCR runs in worker threads, acquire() waits for in-flight images to be
+    released instead of decoding more.
+    """
+
+    def __init__(self, limit_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES):
+        self.limit_bytes = int(limit_bytes)
+        self.in_use = 0
+        self.peak = 0
+        self._cond = threading.Condition()
+
+    @property
+    def available(self) -> int:
+        return max(0, self.limit_bytes - self.in_use)
+
+    def acquire(self, nbytes: int, timeout: float = 0.0) -> None:
+        with self._cond:
+            if nbytes > self.limit_bytes or not self._cond.wait_for(
+                lambda: nbytes <= self.available, timeout=timeout
+            ):
+                raise MemoryBudgetExceeded(
+                    f"needs {nbytes} bytes, only {self.available} of {self.limit_bytes} available"
+                )
+            self.in_use += nbytes
+            self.peak = max(self.peak, self.in_use)
+
+    def release(self, nbytes: int) -> None:
+        with self._cond:
+            self.in_use -= nbytes
+            self._cond.notify_all()
+
+    @contextmanager
+    def reserve(self, nbytes: int, timeout: float = 0.0):
+        self.acquire(nbytes, timeout)
+        try:
+            yield
+        finally:
+            self.release(nbytes)
+
+
+def _as_file(source: Union[str, bytes]):
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+# ---------------------- PDF ----------------------
+
+def _open_pdf(source: Union[str, bytes]) -> "fitz.Document":
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def _dpi_within_budget(page: "fitz.Page", dpi: int, budget: MemoryBudget) -> int:
+    """Lower the raster DPI until an RGB pixmap of the page fits the budget."""
+    width_in = page.rect.width / 72.0
+    height_in = page.rect.height / 72.0
+    while dpi > MIN_OCR_DPI and int(width_in * dpi) * int(height_in * dpi) * 3 > budget.limit_bytes:
+        dpi = max(MIN_OCR_DPI, int(dpi * 0.75))
+    return dpi
+
+
+def _render_page(page: "fitz.Page", dpi: int, budget: MemoryBudget, wait: float) -> Tuple[Image.Image, int]:
+    dpi = _dpi_within_budget(page, dpi, budget)
+    rect = page.rect
+    nbytes = (int(rect.width / 72.0 * dpi) + 1) * (int(rect.height / 72.0 * dpi) + 1) * 3
+    budget.acquire(nbytes, wait)
+    try:
+        pix = page.get_pixmap(dpi=dpi)
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples), nbytes
+    except Exception:
+        budget.release(nbytes)
+        raise
+
+
+def _decode_embedded_image(
+    doc: "fitz.Document", xref: int, budget: MemoryBudget, wait: float
+) -> Optional[Tuple[Image.Image, int]]:
+    base_image = doc.extract_image(xref)
+    img_bytes = base_image.get("image") if base_image else None
+    if not img_bytes:
+        return None
+    try:
+        img = Image.open(io.BytesIO(img_bytes))
+    except Exception:
+        # skip unreadable image
+        return None
+    try:
+        width, height = img.size
+        if width * height * 3 > budget.limit_bytes and img.format == "JPEG":
+            # decode JPEGs at a reduced scale instead of full size
+            scale = (width * height * 3 / budget.limit_bytes) ** 0.5
+            img.draft("RGB", (int(width / scale), int(height / scale)))
+            width, height = img.size
+        nbytes = width * height * 3
+        budget.acquire(nbytes, wait)
+    except MemoryBudgetExceeded as e:
+        img.close()
+        print(f"⚠️ Skipping embedded image xref={xref}: {e}")
+        return None
+    try:
+        return img.convert("RGB"), nbytes
+    except Exception:
+        budget.release(nbytes)
+        return None
+    finally:
+        img.close()
+
+
+def iter_pdf_units(
+    source: Union[str, bytes],
+    dpi: int = DEFAULT_OCR_DPI,
+    ocr_missing_text: bool = True,
+    ocr_embedded_images: bool = False,
+    budget: Optional[MemoryBudget] = None,
+    budget_wait: float = 0.0,
+) -> Iterator[Dict[str, object]]:
+    """
+    Yield one unit per PDF page with OCR deferred to the caller:
+    {"page", "text", "ocr_texts": [], "raster": image or None,
+     "images": [embedded images], "reserved": bytes held in `budget`}.
+    Pass each unit to ocr_unit() (possibly in a worker thread), which OCRs,
+    closes the images and releases the budget.
+    - With `ocr_missing_text`, pages without a text layer are rasterized.
+    - With `ocr_embedded_images`, each embedded image is decoded once per
+      document (images repeated across pages are deduplicated by xref).
+    - Raster DPI is lowered so a single page never exceeds `budget`; when
+      the budget is full, decoding waits up to `budget_wait` seconds for
+      in-flight images to be released.
+    """
+    budget = budget or MemoryBudget()
+    seen_xrefs: Set[int] = set()
+    doc = _open_pdf(source)
+    try:
+        for page_index in range(len(doc)):
+            page = doc[page_index]
+            unit: Dict[str, object] = {
+                "page": page_index + 1,
+                "text": page.get_text("text") or "",
+                "ocr_texts": [],
+                "raster": None,
+                "images": [],
+                "reserved": 0,
+            }
+            if ocr_missing_text and not str(unit["text"]).strip():
+                try:
+                    unit["raster"], unit["reserved"] = _render_page(page, dpi, budget, budget_wait)
+                except MemoryBudgetExceeded as e:
+                    print(f"⚠️ Skipping OCR of page {page_index + 1}: {e}")
+
+            if ocr_embedded_images:
+                for img in page.get_images(full=True):
+                    xref = img[0]
+                    if xref in seen_xrefs:
+                        continue
+                    seen_xrefs.add(xref)
+                    decoded = _decode_embedded_image(doc, xref, budget, budget_wait)
+                    if decoded:
+                        unit["images"].append(decoded[0])  # type: ignore[union-attr]
+                        unit["reserved"] += decoded[1]  # type: ignore[operator]
+
+            yield unit
+            del page, unit
+            # drop MuPDF's cache of decoded images/fonts from the finished page
+            fitz.TOOLS.store_shrink(100)
+    finally:
+        doc.close()
+
+
+def ocr_unit(unit: Dict[str, object], ocr: OCRFunc, budget: MemoryBudget) -> Dict[str, object]:
+    """
+    OCR a unit from iter_pdf_units/iter_image_units in place: the raster
+    becomes the page text, embedded images go to "ocr_texts". Images are
+    closed and their budget released even if OCR fails.
+    """
+    raster = unit.pop("raster", None)
+    images = unit.pop("images", None) or []
+    try:
+        if raster is not None:
+            unit["text"] = ocr(raster)
+            unit["ocr_page"] = True
+        for img in images:
+            t = ocr(img)
+            if t:
+                unit["ocr_texts"].append(t)  # type: ignore[union-attr]
+    finally:
+        for img in [raster] + list(images):
+            if img is not None:
+                img.close()
+        budget.release(int(unit.pop("reserved", 0) or 0))
+    return unit
+
+
+def iter_pdf_pages(
+    source: Union[str, bytes],
+    ocr: Optional[OCRFunc] = None,
+    dpi: int = DEFAULT_OCR_DPI,
+    ocr_missing_text: bool = True,
+    ocr_embedded_images: bool = False,
+    budget: Optional[MemoryBudget] = None,
+) -> Iterator[Dict[str, object]]:
+    """
+    Yield {"page", "text", "ocr_texts"} for each page of a PDF path or bytes,
+    OCRing each page inline before the next one is decoded.
+    """
+    budget = budget or MemoryBudget()
+    units = iter_pdf_units(
+        source,
+        dpi=dpi,
+        ocr_missing_text=bool(ocr) and ocr_missing_text,
+        ocr_embedded_images=bool(ocr) and ocr_embedded_images,
+        budget=budget,
+    )
+    for unit in units:
+        yield ocr_unit(unit, ocr, budget) if ocr else unit
+
+
+# ---------------------- IMAGES ----------------------
+
+def iter_image_units(
+    source: Union[str, bytes], budget: Optional[MemoryBudget] = None
+) -> Iterator[Dict[str, object]]:
+    """A single OCR unit (see iter_pdf_units) for an image file path or bytes."""
+    budget = budget or MemoryBudget()
+    with Image.open(_as_file(source)) as img:
+        nbytes = img.width * img.height * 3
+        budget.acquire(nbytes)
+        try:
+            raster = img.convert("RGB")
+        except Exception:
+            budget.release(nbytes)
+            raise
+    yield {"page": 1, "text": "", "ocr_texts": [], "raster": raster, "images": [], "reserved": nbytes}
+
+
+# ---------------------- SPREADSHEETS ----------------------
+
+DEFAULT_ROWS_PER_PAGE = 200
+DEFAULT_MAX_ROWS = 100_000
+DEFAULT_MAX_COLS = 50
+DEFAULT_MAX_CELL_CHARS = 200
+
+
+def _format_cell(value: object, max_chars: int) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    elif isinstance(value, datetime.datetime):
+        value = value.date().isoformat() if value.time() == datetime.time() else value.isoformat(sep=" ")
+    elif isinstance(value, datetime.date):
+        value = value.isoformat()
+    return str(value).strip()[:max_chars]
+
+
+def _iter_xlsx_sheets(source: Union[str, bytes], max_cols: int) -> Iterator[Tuple[str, Iterable[Sequence[object]]]]:
+    import openpyxl
+
+    # read_only streams rows from the sheet XML instead of building the cell grid
+    wb = openpyxl.load_workbook(_as_file(source), read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            yield ws.title, ws.iter_rows(max_col=max_cols, values_only=True)
+    finally:
+        wb.close()
+
+
+def _xls_row_values(sheet, row: int, ncols: int, datemode: int) -> List[object]:
+    """Cell values of one row, date cells (stored as day-count floats) as datetimes."""
+    import xlrd
+
+    values: List[object] = []
+    for cell in sheet.row_slice(row, 0, ncols):
+        value = cell.value
+        if cell.ctype == xlrd.XL_CELL_DATE:
+            try:
+                value = xlrd.xldate_as_datetime(value, datemode)
+            except (xlrd.xldate.XLDateError, ValueError, OverflowError):
+                pass  # out-of-range serial: keep the number
+        values.append(value)
+    return values
+
+
+def _iter_xls_sheets(source: Union[str, bytes], max_cols: int) -> Iterator[Tuple[str, Iterable[Sequence[object]]]]:
+    import xlrd
+
+    if isinstance(source, (bytes, bytearray)):
+        wb = xlrd.open_workbook(file_contents=source, on_demand=True)
+    else:
+        wb = xlrd.open_workbook(source, on_demand=True)
+    try:
+        for index in range(wb.nsheets):
+            sheet = wb.sheet_by_index(index)
+            ncols = min(max_cols, sheet.ncols)
+            yield sheet.name, (_xls_row_values(sheet, r, ncols, wb.datemode) for r in range(sheet.nrows))
+            wb.unload_sheet(index)
+    finally:
+        wb.release_resources()
+
+
+def iter_spreadsheet_pages(
+    source: Union[str, bytes],
+    rows_per_page: int = DEFAULT_ROWS_PER_PAGE,
+    max_rows: int = DEFAULT_MAX_ROWS,
+    max_cols: int = DEFAULT_MAX_COLS,
+    max_cell_chars: int = DEFAULT_MAX_CELL_CHARS,
+    xls: Optional[bool] = None,
+) -> Iterator[Dict[str, object]]:
+    """
+    Yield {"page", "text", "sheet"} for every sheet of an XLS/XLSX workbook
+    (path or bytes; pass `xls` for bytes of a legacy .xls file).
+    Rows are streamed and grouped into blocks of `rows_per_page` non-empty
+    rows; each block is its own page. At most `max_rows` non-empty rows
+    (whole workbook) and `max_cols` columns are read, and cells are truncated
+    to `max_cell_chars`. When the row limit cuts a sheet short, its last
+    page ends with a note saying so, and later sheets are not read.
+    """
+    if xls is None:
+        xls = isinstance(source, str) and source.lower().endswith(".xls")
+    sheets = _iter_xls_sheets if xls else _iter_xlsx_sheets
+    page_no = 0
+    rows_read = 0
+    for sheet_name, rows in sheets(source, max_cols):
+        block: List[str] = []
+        first_row = last_row = 0
+        truncated = False
+        for row_no, row in enumerate(rows, start=1):
+            cells = [_format_cell(v, max_cell_chars) for v in row]
+            while cells and not cells[-1]:
+                cells.pop()
+            if not cells:
+                continue
+            if rows_read >= max_rows:
+                truncated = True
+                break
+            rows_read += 1
+            # a full block is emitted once the next row shows up, so the note always has a page to go on
+            if len(block) >= rows_per_page:
+                page_no += 1
+                yield _sheet_page(page_no, sheet_name, first_row, last_row, block)
+                block = []
+            if not block:
+                first_row = row_no
+            last_row = row_no
+            block.append(" | ".join(cells))
+        if truncated:
+            block.append(f"[Row limit ({max_rows}) reached: the rest of this sheet and any later sheets were not extracted]")
+        if block:
+            page_no += 1
+            yield _sheet_page(page_no, sheet_name, first_row, last_row, block)
+        if truncated:
+            break
+
+
+def _sheet_page(page_no: int, sheet: str, first_row: int, last_row: int, lines: List[str]) -> Dict[str, object]:
+    header = f"Sheet: {sheet} (rows {first_row}-{last_row})" if first_row else f"Sheet: {sheet}"
+    return {"page": page_no, "text": "\n".join([header] + lines), "sheet": sheet}
+
+
+# ---------------------- DOCX ----------------------
+
+DEFAULT_DOCX_PAGE_CHARS = 3000
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P, _W_T, _W_TAB, _W_BR, _W_CR = _W + "p", _W + "t", _W + "tab", _W + "br", _W + "cr"
+_W_TBL, _W_TR, _W_TC = _W + "tbl", _W + "tr", _W + "tc"
+_W_TYPE = _W + "type"
+
+
+def _docx_paragraph_text(p: ET.Element) -> str:
+    parts: List[str] = []
+    for node in p.iter():
+        if node.tag == _W_T:
+            parts.append(node.text or "")
+        elif node.tag == _W_TAB:
+            parts.append("\t")
+        elif node.tag == _W_CR or (node.tag == _W_BR and node.get(_W_TYPE) != "page"):
+            parts.append("\n")
+    return "".join(parts).strip()
+
+
+def _docx_page_break(p: ET.Element) -> Optional[str]:
+    """Return "before"/"after" when the paragraph starts or ends a page."""
+    if p.find(f"{_W}pPr/{_W}pageBreakBefore") is not None:
+        return "before"
+    seen_text = False
+    for node in p.iter():
+        if node.tag == _W_T and (node.text or "").strip():
+            seen_text = True
+        elif node.tag == _W_BR and node.get(_W_TYPE) == "page":
+            return "after" if seen_text else "before"
+    if p.find(f"{_W}pPr/{_W}sectPr") is not None:
+        return "after"
+    return None
+
+
+def _docx_table_lines(tbl: ET.Element) -> List[str]:
+    lines = []
+    for tr in tbl.findall(_W_TR):
+        cells = [
+            " ".join(t for t in (_docx_paragraph_text(p) for p in tc.iter(_W_P)) if t)
+            for tc in tr.findall(_W_TC)
+        ]
+        if any(cells):
+            lines.append(" | ".join(cells))
+    return lines
+
+
+def _docx_part_text(zf: zipfile.ZipFile, prefix: str) -> str:
+    """Unique paragraph text of all header*.xml or footer*.xml parts."""
+    seen: List[str] = []
+    for name in sorted(n for n in zf.namelist() if n.startswith(f"word/{prefix}") and n.endswith(".xml")):
+        root = ET.fromstring(zf.read(name))
+        for p in root.iter(_W_P):
+            t = _docx_paragraph_text(p)
+            if t and t not in seen:
+                seen.append(t)
+    return "\n".join(seen)
+
+
+def iter_docx_pages(source: Union[str, bytes], page_chars: int = DEFAULT_DOCX_PAGE_CHARS) -> Iterator[Dict[str, object]]:
+    """
+    Yield {"page", "text"} units of a DOCX (path or bytes) by streaming
+    word/document.xml.
+    Paragraphs and tables (one " | " separated line per row) are grouped
+    into a unit until an explicit page/section break or until the unit
+    reaches `page_chars`. Header text is added to the first unit and
+    footer text to the last one.
+    """
+    with zipfile.ZipFile(_as_file(source)) as zf:
+        header = _docx_part_text(zf, "header")
+        footer = _docx_part_text(zf, "footer")
+        page_no = 0
+        lines: List[str] = [header] if header else []
+        size = len(header)
+        # finished units are held back one step so the footer can join the last one
+        ready: List[Dict[str, object]] = []
+
+        def flush() -> None:
+            nonlocal page_no, lines, size
+            page_no += 1
+            ready.append({"page": page_no, "text": "\n".join(lines)})
+            lines, size = [], 0
+
+        tbl_depth = 0
+        with zf.open("word/document.xml") as xml:
+            for event, el in ET.iterparse(xml, events=("start", "end")):
+                if el.tag == _W_TBL:
+                    if event == "start":
+                        tbl_depth += 1
+                        continue
+                    tbl_depth -= 1
+                    if tbl_depth:
+                        continue
+                    new_lines, brk = _docx_table_lines(el), None
+                elif el.tag == _W_P and event == "end" and not tbl_depth:
+                    text, brk = _docx_paragraph_text(el), _docx_page_break(el)
+                    new_lines = [text] if text else []
+                else:
+                    continue
+                el.clear()
+
+                while ready:
+                    yield ready.pop(0)
+                if brk == "before" and lines:
+                    flush()
+                lines.extend(new_lines)
+                size += sum(len(line) for line in new_lines)
+                if (brk == "after" or size >= page_chars) and lines:
+                    flush()
+
+        if footer:
+            if ready and not lines:
+                ready[-1]["text"] = f"{ready[-1]['text']}\n{footer}"
+            else:
+                lines.append(footer)
+        if lines:
+            flush()
+        yield from ready
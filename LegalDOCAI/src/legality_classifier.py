@@ -0,0 +1,247 @@
+# src/legality_classifier.py
+"""
+Local LEGAL / UNVERIFIED classifier trained from stored OpenAI verdicts.
+
+Logistic regression over TF-IDF of the text the LLM sees (first
+VERIFY_TEXT_CHARS characters) plus the numeric analytics that
+analyze_text_overall already computes (clause counts, entity and signer
+totals, legality score, page count). It runs in about a millisecond on CPU.
+LegalityClassifier.verdict() answers locally when P(LEGAL) is outside the
+uncertain band [lower, upper] and returns None otherwise, so the pipeline
+only calls OpenAI for the uncertain documents.
+
+Train / evaluate from the LegalDOCAI folder (uses MONGO_URI / DB_NAME):
+    python -m src.legality_classifier train --out models/legality_classifier.joblib
+    python -m src.legality_classifier report --model models/legality_classifier.joblib
+"""
+import argparse
+import os
+import re
+import time
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.analysis import CLAUSE_KEYWORDS, analysis_version
+
+# the OpenAI prompt only includes this much of the document
+VERIFY_TEXT_CHARS = 2000
+MIN_TRAINING_SAMPLES = 20
+NUMERIC_FEATURES = [
+    "total_names", "total_emails", "total_phones", "total_signers",
+    "total_clauses", "legality_score", "total_pages",
+]
+# a model reply names its verdict; failed calls stored before "Error:" was
+# prefixed (and before verified_by existed) only kept the exception text
+_VERDICT_TOKEN = re.compile(r"\b(LEGAL|UNVERIFIED)\b", re.IGNORECASE)
+
+
+def label_of(analytics: Dict[str, Any]) -> Optional[int]:
+    """1 = LEGAL, 0 = UNVERIFIED, None = no usable LLM verdict."""
+    if analytics.get("verified_by", "openai") != "openai":
+        return None  # never learn from our own predictions
+    marker = analytics.get("verified_marker") or ""
+    raw = str(analytics.get("openai_raw") or "")
+    if not marker or "skipped" in marker or raw.startswith("Error:") or not _VERDICT_TOKEN.search(raw):
+        return None
+    if "UNVERIFIED" in marker:
+        return 0
+    return 1 if "LEGAL" in marker else None
+
+
+def numeric_features(analytics: Dict[str, Any]) -> List[float]:
+    clauses = analytics.get("clause_summary") or {}
+    values = [float(clauses.get(kw, 0) or 0) for kw in CLAUSE_KEYWORDS]
+    values += [float(analytics.get(name, 0) or 0) for name in NUMERIC_FEATURES]
+    return list(np.log1p(np.maximum(values, 0.0)))
+
+
+class LegalityClassifier:
+    """TF-IDF + analytics features -> P(LEGAL)."""
+
+    def __init__(self, max_features: int = 20000, C: float = 4.0):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+
+        self.vectorizer = TfidfVectorizer(
+            max_features=max_features, ngram_range=(1, 2), sublinear_tf=True, min_df=2, strip_accents="unicode"
+        )
+        self.model = LogisticRegression(C=C, class_weight="balanced", max_iter=2000)
+        self.meta: Dict[str, Any] = {}
+
+    def _features(self, texts: List[str], analytics: List[Dict[str, Any]]):
+        from scipy.sparse import csr_matrix, hstack
+
+        tfidf = self.vectorizer.transform([t[:VERIFY_TEXT_CHARS] for t in texts])
+        numeric = csr_matrix(np.asarray([numeric_features(a) for a in analytics], dtype=np.float64))
+        return hstack([tfidf, numeric], format="csr")
+
+    def fit(self, texts: List[str], analytics: List[Dict[str, Any]], labels: List[int]) -> "LegalityClassifier":
+        self.vectorizer.fit([t[:VERIFY_TEXT_CHARS] for t in texts])
+        self.model.fit(self._features(texts, analytics), np.asarray(labels))
+        self.meta = {
+            "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "samples": len(labels),
+            "legal_fraction": round(float(np.mean(labels)), 3),
+            "analysis_version": analysis_version(),
+        }
+        return self
+
+    def predict_proba(self, texts: List[str], analytics: List[Dict[str, Any]]) -> np.ndarray:
+        """P(LEGAL) for each document."""
+        return self.model.predict_proba(self._features(texts, analytics))[:, 1]
+
+    def verdict(self, text: str, analytics: Dict[str, Any], lower: float = 0.15, upper: float = 0.85) -> Optional[Dict[str, Any]]:
+        """Verifier-shaped result when confident, None when P(LEGAL) is within [lower, upper]."""
+        p = float(self.predict_proba([text], [analytics])[0])
+        if lower < p < upper:
+            return None
+        legal = p >= upper
+        return {
+            "marker": "✅ LEGAL" if legal else "❌ UNVERIFIED",
+            "ai_confidence": int(round(100 * (p if legal else 1 - p))),
+            "raw": f"local classifier: P(LEGAL)={p:.3f}",
+            "verified_by": "local",
+        }
+
+    def save(self, path: str) -> None:
+        import joblib
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path: str) -> "LegalityClassifier":
+        import joblib
+
+        return joblib.load(path)
+
+
+@lru_cache(maxsize=None)
+def load_classifier(path: str) -> Optional[LegalityClassifier]:
+    """
+    Saved classifier, or None (with a warning) when missing or unreadable.
+    Cached per path, so workers forked by src.prefork reuse the parent's copy.
+    """
+    if not path or not os.path.exists(path):
+        print(f"⚠️ No local legality classifier at {path}; every document goes to OpenAI.")
+        return None
+    try:
+        clf = LegalityClassifier.load(path)
+    except Exception as e:
+        print(f"⚠️ Could not load legality classifier {path}: {e}")
+        return None
+    if clf.meta.get("analysis_version") != analysis_version():
+        print("⚠️ Legality classifier was trained on older analytics; consider retraining.")
+    print(f"✅ Local legality classifier loaded ({clf.meta.get('samples')} training samples)")
+    return clf
+
+
+# ---------------------- TRAINING DATA ----------------------
+def iter_labeled(collection, pages_collection) -> Iterator[Tuple[str, Dict[str, Any], int]]:
+    """(text, analytics, label) for every stored document with an OpenAI verdict."""
+    from src.page_store import PageStore
+
+    page_store = PageStore(pages_collection)
+    for rec in collection.find({"analytics.verified_marker": {"$exists": True}}, {"_id": 0}):
+        analytics = rec.get("analytics") or {}
+        label = label_of(analytics)
+        if label is None:
+            continue
+        text = page_store.get_text(rec["doc_id"]) if rec.get("doc_id") else ""
+        if not text:
+            text = "\n".join(r.get("text") or "" for r in rec.get("results") or [])
+        if text.strip():
+            yield text, analytics, label
+
+
+def evaluate(clf: LegalityClassifier, texts, analytics, labels, lower: float, upper: float) -> Dict[str, Any]:
+    """Agreement with the LLM verdicts and per-document latency of the local model."""
+    t0 = time.perf_counter()
+    probs = clf.predict_proba(texts, analytics)
+    batch_ms = (time.perf_counter() - t0) * 1000 / max(1, len(texts))
+    single = []
+    for text, a in list(zip(texts, analytics))[:200]:
+        t0 = time.perf_counter()
+        clf.predict_proba([text], [a])
+        single.append((time.perf_counter() - t0) * 1000)
+    labels = np.asarray(labels)
+    confident = (probs <= lower) | (probs >= upper)
+    agree = (probs >= 0.5) == (labels == 1)
+    return {
+        "documents": int(len(labels)),
+        "agreement_all": round(float(agree.mean()), 3),
+        "local_coverage": round(float(confident.mean()), 3),
+        "agreement_local": round(float(agree[confident].mean()), 3) if confident.any() else None,
+        "llm_calls_avoided": int(confident.sum()),
+        "latency_ms_p50": round(float(np.percentile(single, 50)), 3),
+        "latency_ms_p95": round(float(np.percentile(single, 95)), 3),
+        "latency_ms_batched": round(batch_ms, 3),
+    }
+
+
+def _print_report(stats: Dict[str, Any]) -> None:
+    for key, value in stats.items():
+        print(f"  {key:20s} {value}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train / evaluate the local legality classifier")
+    parser.add_argument("command", choices=["train", "report"])
+    parser.add_argument("--model", "--out", dest="model", default=os.getenv("LEGALITY_MODEL_PATH", "models/legality_classifier.joblib"))
+    parser.add_argument("--lower", type=float, default=float(os.getenv("LEGALITY_LOCAL_LOWER", "0.15")))
+    parser.add_argument("--upper", type=float, default=float(os.getenv("LEGALITY_LOCAL_UPPER", "0.85")))
+    parser.add_argument("--test-size", type=float, default=0.2)
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+
+    from src import mongo
+
+    load_dotenv()
+    db = mongo.shared().db
+    rows = list(iter_labeled(db["documents"], db["pages"]))
+    if not rows:
+        raise SystemExit("No stored OpenAI verdicts to learn from.")
+    texts, analytics, labels = (list(col) for col in zip(*rows))
+    print(f"{len(labels)} labeled documents ({sum(labels)} LEGAL)")
+    llm_ms = [
+        rec["timings"]["verify"] * 1000
+        for rec in db["documents"].find(
+            {"analytics.verified_by": "openai", "timings.verify": {"$exists": True}}, {"timings.verify": 1}
+        )
+    ]
+    if llm_ms:
+        print(f"OpenAI verify stage latency: p50 {np.percentile(llm_ms, 50):.0f} ms, "
+              f"p95 {np.percentile(llm_ms, 95):.0f} ms over {len(llm_ms)} documents")
+
+    if args.command == "report":
+        clf = LegalityClassifier.load(args.model)
+        print(f"Model {args.model}: {clf.meta}")
+        for lower, upper in ((0.5, 0.5), (args.lower, args.upper), (0.05, 0.95)):
+            print(f"band ({lower}, {upper}):")
+            _print_report(evaluate(clf, texts, analytics, labels, lower, upper))
+        return
+
+    if len(labels) < MIN_TRAINING_SAMPLES or len(set(labels)) < 2:
+        raise SystemExit(f"Need at least {MIN_TRAINING_SAMPLES} verdicts covering both labels.")
+    from sklearn.model_selection import train_test_split
+
+    idx_train, idx_test = train_test_split(
+        np.arange(len(labels)), test_size=args.test_size, stratify=labels, random_state=0
+    )
+    pick = lambda seq, idx: [seq[i] for i in idx]  # noqa: E731
+    held_out = LegalityClassifier().fit(pick(texts, idx_train), pick(analytics, idx_train), pick(labels, idx_train))
+    stats = evaluate(held_out, pick(texts, idx_test), pick(analytics, idx_test), pick(labels, idx_test), args.lower, args.upper)
+    print(f"Held-out evaluation, band ({args.lower}, {args.upper}):")
+    _print_report(stats)
+
+    clf = LegalityClassifier().fit(texts, analytics, labels)
+    clf.meta["held_out"] = stats
+    clf.save(args.model)
+    print(f"✅ Saved {args.model} (trained on all {len(labels)} documents)")
+
+
+if __name__ == "__main__":
+    main()
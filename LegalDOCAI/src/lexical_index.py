@@ -0,0 +1,445 @@
+# src/lexical_index.py
+"""
+Persistent BM25 inverted index with positional, compressed posting lists.
+
+Each term keeps three variable-byte (varint) encoded streams: doc number
+deltas, term frequencies, and in-document position deltas. New documents
+get increasing doc numbers, so indexing a document only appends bytes to
+the streams of its terms. Queries decode whole streams with NumPy and
+score every matching document at once.
+
+On disk an index directory holds a snapshot (`index.bin`) plus an
+append-only journal (`journal.jsonl`) of documents added or removed since;
+loading replays the journal over the snapshot, and save() folds it back
+into a fresh snapshot. Re-adding a doc_id tombstones its old postings;
+tombstoned postings are dropped when a snapshot is written.
+
+Several processes (prefork workers) may open the same directory. Writes
+take an exclusive flock on `writer.lock`, first catch up on what other
+processes journaled, then append; save() writes the snapshot from that
+caught-up view, so it never drops another worker's documents. Before a
+query (or len / generation) each process stats the snapshot and journal
+and, when they changed, reads the new journal lines or reloads a newly
+written snapshot under a shared flock.
+
+Query syntax: bare words are scored with BM25, "quoted phrases" must
+appear verbatim (consecutive positions) in every returned document.
+"""
+import fcntl
+import json
+import os
+import re
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"\w+(?:[./-]\w+)*")
+PHRASE_RE = re.compile(r'"([^"]+)"')
+
+SNAPSHOT_FILE = "index.bin"
+JOURNAL_FILE = "journal.jsonl"
+LOCK_FILE = "writer.lock"
+MAGIC = b"BM25IDX1"
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; keeps section numbers like 12.3 or 4-b intact."""
+    return TOKEN_RE.findall(text.lower())
+
+
+def parse_query(query: str) -> Tuple[List[str], List[List[str]]]:
+    """Split a query into scored terms and required phrases."""
+    phrases = [tokenize(p) for p in PHRASE_RE.findall(query)]
+    phrases = [p for p in phrases if p]
+    terms = tokenize(PHRASE_RE.sub(" ", query)) + [t for p in phrases for t in p]
+    return terms, phrases
+
+
+# ---------------------- VARINT CODEC ----------------------
+def encode_varints(values: Iterable[int], out: bytearray) -> None:
+    for v in values:
+        while v >= 0x80:
+            out.append((v & 0x7F) | 0x80)
+            v >>= 7
+        out.append(v)
+
+
+def decode_varints(buf: bytes) -> np.ndarray:
+    """Vectorized varint decode (low 7-bit groups first, high bit = continue)."""
+    b = np.frombuffer(buf, dtype=np.uint8)
+    if not b.size:
+        return np.zeros(0, dtype=np.int64)
+    ends = (b & 0x80) == 0
+    starts = np.flatnonzero(np.concatenate(([True], ends[:-1])))
+    group = np.cumsum(ends) - ends
+    shift = ((np.arange(b.size) - starts[group]) * 7).astype(np.uint64)
+    vals = (b & 0x7F).astype(np.uint64) << shift
+    return np.add.reduceat(vals, starts).astype(np.int64)
+
+
+class _Postings:
+    """Compressed posting list of one term."""
+
+    __slots__ = ("docs", "tfs", "positions", "df", "last_doc")
+
+    def __init__(self):
+        self.docs = bytearray()
+        self.tfs = bytearray()
+        self.positions = bytearray()
+        self.df = 0
+        self.last_doc = -1
+
+    def append(self, doc_num: int, positions: List[int]) -> None:
+        encode_varints((doc_num - self.last_doc - 1,), self.docs)
+        encode_varints((len(positions),), self.tfs)
+        prev = 0
+        deltas = []
+        for p in positions:
+            deltas.append(p - prev)
+            prev = p
+        encode_varints(deltas, self.positions)
+        self.df += 1
+        self.last_doc = doc_num
+
+    def doc_nums(self) -> Tuple[np.ndarray, np.ndarray]:
+        docs = np.cumsum(decode_varints(bytes(self.docs)) + 1) - 1
+        return docs, decode_varints(bytes(self.tfs))
+
+    def doc_positions(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(doc number, absolute position) for every occurrence."""
+        docs, tfs = self.doc_nums()
+        deltas = decode_varints(bytes(self.positions))
+        firsts = np.cumsum(tfs) - tfs
+        cs = np.cumsum(deltas)
+        base = np.repeat(cs[firsts] - deltas[firsts], tfs)
+        return np.repeat(docs, tfs), cs - base
+
+
+class LexicalIndex:
+    """BM25 index over (doc_id, text) pairs, optionally persisted to `path`."""
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.2, b: float = 0.75, snapshot_every: int = 1000):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.snapshot_every = snapshot_every
+        self._generation = 0  # bumped on every change; lets callers key caches
+        self._lock = threading.RLock()
+        self._reset()
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._refresh()
+        self._generation = 0
+
+    def _reset(self) -> None:
+        self._terms: Dict[str, _Postings] = {}
+        self._doc_ids: List[str] = []
+        self._lengths: List[int] = []
+        self._deleted: set = set()
+        self._num_by_id: Dict[str, int] = {}
+        self._total_length = 0
+        self._journal_entries = 0
+        self._snapshot_stat: Optional[Tuple[int, int, int]] = None  # snapshot file the view starts from
+        self._journal_offset = 0  # journal bytes applied to the view
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._num_by_id)
+
+    def __contains__(self, doc_id: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return doc_id in self._num_by_id
+
+    @property
+    def generation(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._generation
+
+    # ---------------------- WRITES ----------------------
+    def add(self, doc_id: str, text: str) -> None:
+        """Index (or re-index) a document."""
+        tokens = tokenize(text)
+        with self._writer():
+            self._add_tokens(doc_id, tokens)
+            self._journal({"id": doc_id, "tokens": tokens})
+
+    def remove(self, doc_id: str) -> None:
+        with self._writer():
+            if doc_id in self._num_by_id:
+                self._remove(doc_id)
+                self._journal({"id": doc_id, "delete": True})
+
+    def _add_tokens(self, doc_id: str, tokens: List[str]) -> None:
+        if doc_id in self._num_by_id:
+            self._remove(doc_id)
+        doc_num = len(self._doc_ids)
+        positions: Dict[str, List[int]] = {}
+        for i, tok in enumerate(tokens):
+            positions.setdefault(tok, []).append(i)
+        for tok, pos in positions.items():
+            postings = self._terms.get(tok)
+            if postings is None:
+                postings = self._terms[tok] = _Postings()
+            postings.append(doc_num, pos)
+        self._doc_ids.append(doc_id)
+        self._lengths.append(len(tokens))
+        self._num_by_id[doc_id] = doc_num
+        self._total_length += len(tokens)
+        self._generation += 1
+
+    def _remove(self, doc_id: str) -> None:
+        doc_num = self._num_by_id.pop(doc_id)
+        self._deleted.add(doc_num)
+        self._total_length -= self._lengths[doc_num]
+        self._generation += 1
+
+    # ---------------------- QUERIES ----------------------
+    def search(self, query: str, top_k: int = 10) -> List[Dict[str, object]]:
+        """BM25-ranked [{"doc_id", "score"}]; quoted phrases are required matches."""
+        terms, phrases = parse_query(query)
+        with self._lock:
+            self._refresh()
+            n_live = len(self._num_by_id)
+            if not terms or not n_live:
+                return []
+            n_docs = len(self._doc_ids)
+            lengths = np.asarray(self._lengths, dtype=np.float64)
+            avgdl = max(self._total_length / n_live, 1.0)
+            scores = np.zeros(n_docs, dtype=np.float64)
+            for term in set(terms):
+                postings = self._terms.get(term)
+                if postings is None:
+                    continue
+                docs, tfs = postings.doc_nums()
+                df = min(postings.df, n_live)  # df still counts tombstoned postings
+                idf = np.log1p((n_live - df + 0.5) / (df + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * lengths[docs] / avgdl)
+                scores[docs] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+
+            candidates = scores > 0
+            for phrase in phrases:
+                candidates &= self._phrase_mask(phrase, n_docs)
+            if self._deleted:
+                candidates[list(self._deleted)] = False
+            hits = np.flatnonzero(candidates)
+            if not hits.size:
+                return []
+            if hits.size > top_k:
+                hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+            hits = hits[np.argsort(-scores[hits], kind="stable")]
+            return [{"doc_id": self._doc_ids[i], "score": float(scores[i])} for i in hits]
+
+    def _phrase_mask(self, phrase: List[str], n_docs: int) -> np.ndarray:
+        mask = np.zeros(n_docs, dtype=bool)
+        keys = None
+        for offset, term in enumerate(phrase):
+            postings = self._terms.get(term)
+            if postings is None:
+                return mask
+            docs, pos = postings.doc_positions()
+            # a phrase starting at position p puts term i at p + i
+            term_keys = (docs << 32) + (pos - offset)
+            keys = term_keys if keys is None else np.intersect1d(keys, term_keys, assume_unique=True)
+            if not keys.size:
+                return mask
+        mask[np.unique(keys >> 32)] = True
+        return mask
+
+    # ---------------------- PERSISTENCE ----------------------
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _disk_state(self) -> Tuple[Optional[Tuple[int, int, int]], int]:
+        """(snapshot identity, journal size) as currently on disk."""
+        try:
+            st = os.stat(self._file(SNAPSHOT_FILE))
+            snapshot = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            snapshot = None
+        try:
+            journal = os.path.getsize(self._file(JOURNAL_FILE))
+        except FileNotFoundError:
+            journal = 0
+        return snapshot, journal
+
+    def _refresh(self) -> None:
+        """Pick up what other processes wrote (thread lock held); cheap when nothing changed."""
+        if not self.path or self._disk_state() == (self._snapshot_stat, self._journal_offset):
+            return
+        with open(self._file(LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH)
+            try:
+                self._sync()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _sync(self) -> None:
+        """Bring the view up to the files (a flock held): new journal lines, or a full
+        reload when another process wrote a new snapshot."""
+        snapshot, journal = self._disk_state()
+        if snapshot != self._snapshot_stat or journal < self._journal_offset:
+            generation = self._generation
+            self._reset()
+            self._load()
+            self._generation = generation + 1
+        elif journal > self._journal_offset:
+            self._replay_journal()
+
+    @contextmanager
+    def _writer(self):
+        """Exclusive writer lock across threads and processes, on an up-to-date view."""
+        with self._lock:
+            if not self.path:
+                yield
+                return
+            with open(self._file(LOCK_FILE), "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    self._sync()
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _journal(self, entry: Dict[str, object]) -> None:
+        """Append one entry (writer lock held)."""
+        if not self.path:
+            return
+        journal = self._file(JOURNAL_FILE)
+        if os.path.exists(journal) and os.path.getsize(journal) > self._journal_offset:
+            os.truncate(journal, self._journal_offset)  # drop a torn append
+        line = (json.dumps(entry) + "\n").encode("utf-8")
+        with open(journal, "ab") as f:
+            f.write(line)
+        self._journal_offset += len(line)
+        self._journal_entries += 1
+        if self._journal_entries >= self.snapshot_every:
+            self._save()
+
+    def save(self) -> None:
+        """Write a compacted snapshot atomically and truncate the journal."""
+        if not self.path:
+            return
+        with self._writer():
+            self._save()
+
+    def _save(self) -> None:
+        """save() with the writer lock held: the view includes every process's journal."""
+        if self._deleted:
+            self._compact()
+        terms = {}
+        blob = bytearray()
+        for term, p in self._terms.items():
+            terms[term] = [p.df, p.last_doc, len(p.docs), len(p.tfs), len(p.positions)]
+            blob += p.docs
+            blob += p.tfs
+            blob += p.positions
+        header = zlib.compress(json.dumps({
+            "doc_ids": self._doc_ids,
+            "lengths": self._lengths,
+            "terms": terms,
+        }).encode("utf-8"))
+        tmp = os.path.join(self.path, SNAPSHOT_FILE + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.path, SNAPSHOT_FILE))
+        open(os.path.join(self.path, JOURNAL_FILE), "w").close()
+        self._journal_entries = 0
+        self._snapshot_stat, self._journal_offset = self._disk_state()
+
+    def _compact(self) -> None:
+        """Drop tombstoned postings and renumber live documents."""
+        live = [n for n in range(len(self._doc_ids)) if n not in self._deleted]
+        remap = np.full(len(self._doc_ids), -1, dtype=np.int64)
+        remap[live] = np.arange(len(live))
+        terms: Dict[str, _Postings] = {}
+        for term, p in self._terms.items():
+            docs, pos = p.doc_positions()
+            keep = remap[docs] >= 0
+            if not keep.any():
+                continue
+            docs, pos = remap[docs[keep]], pos[keep]
+            new = terms[term] = _Postings()
+            bounds = np.flatnonzero(np.diff(docs)) + 1
+            for d, chunk in zip(docs[np.r_[0, bounds]], np.split(pos, bounds)):
+                new.append(int(d), chunk.tolist())
+        self._terms = terms
+        self._doc_ids = [self._doc_ids[n] for n in live]
+        self._lengths = [self._lengths[n] for n in live]
+        self._num_by_id = {doc_id: i for i, doc_id in enumerate(self._doc_ids)}
+        self._deleted = set()
+
+    def _load(self) -> None:
+        """Snapshot + journal into an empty view (a flock held)."""
+        snapshot = os.path.join(self.path, SNAPSHOT_FILE)
+        if os.path.exists(snapshot):
+            with open(snapshot, "rb") as f:
+                st = os.fstat(f.fileno())
+                self._snapshot_stat = (st.st_ino, st.st_mtime_ns, st.st_size)
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise ValueError(f"{snapshot} is not a lexical index snapshot")
+                (header_len,) = struct.unpack("<Q", f.read(8))
+                header = json.loads(zlib.decompress(f.read(header_len)))
+                blob = f.read()
+            self._doc_ids = header["doc_ids"]
+            self._lengths = header["lengths"]
+            self._num_by_id = {doc_id: i for i, doc_id in enumerate(self._doc_ids)}
+            self._total_length = sum(self._lengths)
+            offset = 0
+            for term, (df, last_doc, n_docs, n_tfs, n_pos) in header["terms"].items():
+                p = _Postings()
+                p.df, p.last_doc = df, last_doc
+                p.docs = bytearray(blob[offset:offset + n_docs])
+                offset += n_docs
+                p.tfs = bytearray(blob[offset:offset + n_tfs])
+                offset += n_tfs
+                p.positions = bytearray(blob[offset:offset + n_pos])
+                offset += n_pos
+                self._terms[term] = p
+
+        self._replay_journal()
+
+    def _replay_journal(self) -> None:
+        """Apply the journal lines written after the ones already applied."""
+        journal = os.path.join(self.path, JOURNAL_FILE)
+        if not os.path.exists(journal):
+            return
+        with open(journal, "rb") as f:
+            f.seek(self._journal_offset)
+            data = f.read()
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break  # torn (or still being written) last line
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            if entry.get("delete"):
+                if entry["id"] in self._num_by_id:
+                    self._remove(entry["id"])
+            else:
+                self._add_tokens(entry["id"], entry["tokens"])
+            self._journal_entries += 1
+            self._journal_offset += len(line)
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[Dict[str, object]]], k: int = 60, top_k: int = 10) -> List[Dict[str, object]]:
+    """Merge ranked [{"doc_id", ...}] lists: score = sum of 1 / (k + rank)."""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            doc_id = str(hit["doc_id"])
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    ordered = sorted(fused.items(), key=lambda x: x[1], reverse=True)[:top_k]
+    return [{"doc_id": doc_id, "score": score} for doc_id, score in ordered]
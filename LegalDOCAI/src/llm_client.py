@@ -0,0 +1,334 @@
+# src/llm_client.py
+"""
+Shared, resilient async OpenAI client.
+
+One LLMClient per process owns an AsyncOpenAI client and a private event
+loop running in a daemon thread, so async routes (`await client.achat(...)`)
+and synchronous pipeline code (`client.chat(...)`, e.g. the verify stage
+running in a worker thread) share the same limits:
+
+  - per-call timeout, capped by the caller's Deadline (remaining request budget)
+  - retries with full-jitter exponential backoff on 429, 5xx, timeouts and
+    connection errors (Retry-After is honoured), never past the deadline
+  - a global concurrency semaphore and a tokens-per-minute bucket
+  - cancellation: a cancelled Deadline (e.g. the client disconnected) aborts
+    the call in flight with RequestCancelled
+  - a circuit breaker: after `breaker_failures` consecutive failed calls it
+    opens for `breaker_reset_seconds` and calls fail fast with CircuitOpen;
+    one trial call is let through afterwards (half-open); only an upstream
+    answer closes it again. A call whose deadline runs out counts as failed
+    when one of its attempts failed upstream (timeout, connection error, 429,
+    5xx); one cancelled by the caller, or out of time before any attempt
+    reached upstream, just frees the trial slot
+
+`base_url` points the client at any OpenAI-compatible server, e.g. the local
+fake in benchmarks/fake_openai.py.
+"""
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+import openai
+
+
+class LLMUnavailable(Exception):
+    """The call was not made or did not succeed within its limits."""
+
+
+class CircuitOpen(LLMUnavailable):
+    """Upstream marked unhealthy; calls are skipped until the breaker resets."""
+
+
+class DeadlineExceeded(LLMUnavailable):
+    """The request budget ran out before the LLM answered."""
+
+
+class RequestCancelled(LLMUnavailable):
+    """The request was cancelled (e.g. the client disconnected)."""
+
+
+# how often an in-flight call looks at its Deadline's cancellation flag
+CANCEL_POLL_SECONDS = 0.1
+
+
+class Deadline:
+    """
+    Absolute point in time by which a request must finish, plus the
+    request's cancellation flag. child() derives a tighter deadline (e.g.
+    for one pipeline stage) that expires no later than its parent and is
+    cancelled together with it.
+    """
+
+    def __init__(self, seconds: Optional[float], parent: Optional["Deadline"] = None):
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+        if parent is not None and parent.expires_at is not None:
+            self.expires_at = parent.expires_at if self.expires_at is None else min(self.expires_at, parent.expires_at)
+        self._cancelled = parent._cancelled if parent is not None else threading.Event()
+        self._reason = parent._reason if parent is not None else [None]
+
+    def child(self, seconds: Optional[float]) -> "Deadline":
+        return Deadline(seconds, parent=self)
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if not self._cancelled.is_set():
+            self._reason[0] = reason
+            self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def reason(self) -> Optional[str]:
+        return self._reason[0]
+
+    def check(self, what: str = "request") -> None:
+        """Raise RequestCancelled / DeadlineExceeded if the work should stop."""
+        if self.cancelled:
+            raise RequestCancelled(f"{what} cancelled: {self.reason}")
+        if self.expired:
+            raise DeadlineExceeded(f"{what} deadline exceeded")
+
+    def remaining(self) -> Optional[float]:
+        if self.cancelled:
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def cap(self, timeout: float) -> float:
+        """timeout limited to what is left of the deadline."""
+        remaining = self.remaining()
+        return timeout if remaining is None else min(timeout, remaining)
+
+
+class CircuitBreaker:
+    def __init__(self, failures: int = 5, reset_seconds: float = 30.0):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> None:
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial_running):
+            raise CircuitOpen("OpenAI circuit breaker is open")
+        if state == "half_open":
+            self._trial_running = True
+
+    def release(self) -> None:
+        """End a call that got no upstream answer (caller cancelled or out of time): neither
+        success nor failure, but a half-open trial slot is freed for the next caller."""
+        self._trial_running = False
+
+    def record(self, ok: bool) -> None:
+        self._trial_running = False
+        if ok:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            return
+        self.consecutive_failures += 1
+        if self.opened_at is not None or self.consecutive_failures >= self.failures:
+            self.opened_at = time.monotonic()
+
+
+class TokenBucket:
+    """Tokens-per-minute limiter; tokens are estimated before the call."""
+
+    def __init__(self, tokens_per_minute: int):
+        self.rate = tokens_per_minute / 60.0
+        self.capacity = float(tokens_per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self, tokens: int, deadline: Deadline) -> None:
+        if self.rate <= 0:
+            return
+        tokens = min(float(tokens), self.capacity)
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return
+            wait = (tokens - self.tokens) / self.rate
+            remaining = deadline.remaining()
+            if remaining is not None and wait > remaining:
+                raise DeadlineExceeded("token rate limit wait exceeds the request deadline")
+            await asyncio.sleep(wait)
+
+
+def _retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    return sum(len(m.get("content") or "") for m in messages) // 4 + max_tokens
+
+
+class LLMClient:
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        base_url: Optional[str] = None,
+        timeout: float = 20.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        max_concurrency: int = 8,
+        tokens_per_minute: int = 0,
+        breaker_failures: int = 5,
+        breaker_reset_seconds: float = 30.0,
+    ):
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset_seconds)
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "skipped_open_circuit": 0, "deadline_exceeded": 0, "cancelled": 0}
+        self._max_concurrency = max_concurrency
+        self._tokens_per_minute = tokens_per_minute
+        self._client_kwargs = {"api_key": api_key, "base_url": base_url, "max_retries": 0}
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, name="llm-client", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        # created inside the loop they belong to
+        self._client = openai.AsyncOpenAI(**self._client_kwargs)
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        self._bucket = TokenBucket(self._tokens_per_minute)
+        self._ready.set()
+        self._loop.run_forever()
+
+    # ---------------------- PUBLIC API ----------------------
+    def chat(self, messages: List[Dict[str, str]], deadline: Optional[Deadline] = None, **kwargs: Any) -> str:
+        """Blocking call for synchronous code (worker threads, scripts)."""
+        return self._submit(messages, deadline, kwargs).result()
+
+    async def achat(self, messages: List[Dict[str, str]], deadline: Optional[Deadline] = None, **kwargs: Any) -> str:
+        """Awaitable from any event loop (e.g. FastAPI routes)."""
+        return await asyncio.wrap_future(self._submit(messages, deadline, kwargs))
+
+    def health(self) -> Dict[str, Any]:
+        return {"circuit": self.breaker.state, **self.stats}
+
+    def close(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    # ---------------------- INTERNALS ----------------------
+    def _submit(self, messages, deadline, kwargs) -> Future:
+        return asyncio.run_coroutine_threadsafe(self._call(messages, deadline or Deadline(None), kwargs), self._loop)
+
+    async def _call(self, messages: List[Dict[str, str]], deadline: Deadline, kwargs: Dict[str, Any]) -> str:
+        try:
+            self.breaker.before_call()
+        except CircuitOpen:
+            self.stats["skipped_open_circuit"] += 1
+            raise
+        self.stats["calls"] += 1
+        upstream = {"failed": False}  # set by _call_with_retries when an attempt failed upstream
+        try:
+            content = await self._until_cancelled(self._call_with_retries(messages, deadline, kwargs, upstream), deadline)
+        except DeadlineExceeded as e:
+            if deadline.cancelled:
+                self.stats["cancelled"] += 1
+                self.breaker.release()  # the caller gave up: no upstream verdict either way
+                raise RequestCancelled(f"OpenAI call cancelled: {deadline.reason}") from e
+            self.stats["deadline_exceeded"] += 1
+            if upstream["failed"]:
+                self.breaker.record(ok=False)  # e.g. upstream hangs: attempts timed out until the budget ran out
+            else:
+                self.breaker.release()  # out of time before any attempt reached upstream
+            raise
+        except RequestCancelled:
+            self.stats["cancelled"] += 1
+            self.breaker.release()  # the caller gave up: no upstream verdict either way
+            raise
+        except Exception:
+            self.stats["failures"] += 1
+            self.breaker.record(ok=False)
+            raise
+        self.breaker.record(ok=True)
+        return content
+
+    async def _until_cancelled(self, coro, deadline: Deadline):
+        """Await coro, abandoning it as soon as the deadline is cancelled."""
+        task = asyncio.ensure_future(coro)
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=CANCEL_POLL_SECONDS)
+            if done:
+                return task.result()
+            if deadline.cancelled:
+                task.cancel()
+                raise RequestCancelled(f"OpenAI call cancelled: {deadline.reason}")
+
+    async def _call_with_retries(self, messages, deadline: Deadline, kwargs, upstream: Dict[str, bool]) -> str:
+        kwargs.setdefault("model", self.model)
+        await self._bucket.acquire(estimate_tokens(messages, kwargs.get("max_tokens") or 256), deadline)
+        attempt = 0
+        while True:
+            timeout = deadline.cap(self.timeout)
+            if timeout <= 0:
+                raise DeadlineExceeded("request deadline reached before calling OpenAI")
+            try:
+                async with self._semaphore:
+                    timeout = deadline.cap(self.timeout)
+                    if timeout <= 0:
+                        raise DeadlineExceeded("request deadline reached while queued for OpenAI")
+                    resp = await asyncio.wait_for(
+                        self._client.chat.completions.create(messages=messages, timeout=timeout, **kwargs),
+                        timeout=timeout + 1.0,
+                    )
+                return resp.choices[0].message.content or ""
+            except Exception as e:
+                if _retryable(e):
+                    upstream["failed"] = True
+                if not _retryable(e) or attempt >= self.max_retries:
+                    if deadline.expired:
+                        raise DeadlineExceeded(f"request deadline reached: {e}") from e
+                    raise
+                delay = _retry_after(e) or random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                remaining = deadline.remaining()
+                if remaining is not None and delay >= remaining:
+                    raise DeadlineExceeded(f"no time left to retry: {e}") from e
+                attempt += 1
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay)
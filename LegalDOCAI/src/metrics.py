@@ -0,0 +1,113 @@
+# src/metrics.py
+"""
+In-process counters and latency histograms.
+
+incr() bumps a named counter, gauge() sets a current value (queue depth,
+...), observe() records one sample (seconds, bytes, ...) into a bounded
+window per name, and snapshot() returns every counter and gauge plus
+count / sum / p50 / p95 / p99 / max of each window, ready to be served
+as JSON (GET /metrics). Counts and sums cover the whole process lifetime;
+percentiles cover the last WINDOW samples only. process_memory() reads a
+process's RSS / PSS split from /proc (Linux), for per-worker reporting.
+
+    from src import metrics
+    metrics.observe("upload.time_to_first_page", 0.42)
+    metrics.incr("upload.stream.requests")
+"""
+import os
+import threading
+from collections import deque
+from typing import Any, Deque, Dict
+
+WINDOW = 2048
+
+
+class Metrics:
+    """Thread-safe registry of counters and sample windows."""
+
+    def __init__(self, window: int = WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._samples: Dict[str, Deque[float]] = {}
+        self._totals: Dict[str, list] = {}  # name -> [count, sum, max]
+
+    def incr(self, name: str, n: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            if name not in self._samples:
+                self._samples[name] = deque(maxlen=self.window)
+                self._totals[name] = [0, 0.0, value]
+            self._samples[name].append(value)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += value
+            totals[2] = max(totals[2], value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            windows = {name: (sorted(s), list(self._totals[name])) for name, s in self._samples.items()}
+        histograms = {}
+        for name, (values, (count, total, peak)) in windows.items():
+            histograms[name] = {
+                "count": count,
+                "sum": round(total, 6),
+                "p50": _percentile(values, 0.50),
+                "p95": _percentile(values, 0.95),
+                "p99": _percentile(values, 0.99),
+                "max": round(peak, 6),
+            }
+        return {"counters": counters, "gauges": gauges, "histograms": histograms}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._samples.clear()
+            self._totals.clear()
+
+
+def _percentile(values, q: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    return round(values[min(len(values) - 1, int(q * len(values)))], 6)
+
+
+def process_memory(pid="self") -> Dict[str, Any]:
+    """
+    Memory of one process in MiB: rss (resident), pss (proportional: shared
+    pages divided among the processes mapping them, so PSS sums to the real
+    total across workers), shared and private. Empty off Linux.
+    """
+    fields = {"Rss": "rss_mib", "Pss": "pss_mib", "Shared_Clean": "shared_mib", "Shared_Dirty": "shared_mib",
+              "Private_Clean": "private_mib", "Private_Dirty": "private_mib"}
+    usage: Dict[str, Any] = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    usage[fields[key]] = usage.get(fields[key], 0.0) + int(rest.split()[0]) / 1024
+    except (OSError, ValueError):
+        return {}
+    usage = {k: round(v, 1) for k, v in usage.items()}
+    usage["pid"] = os.getpid() if pid == "self" else int(pid)
+    return usage
+
+
+registry = Metrics()
+incr = registry.incr
+gauge = registry.gauge
+observe = registry.observe
+snapshot = registry.snapshot
@@ -0,0 +1,186 @@
+# src/mongo.py
+"""
+One MongoDB access layer for the app, the backend routers and the CLIs.
+
+Every process talks to Mongo through a single MongoLayer (shared()):
+one pooled pymongo client for code running in worker threads (pipeline
+stages, stores, reprocessing, CLIs) and one motor client for async
+request handlers, so reads in the event loop do not block it. Both
+clients are created lazily, once per process (a forked worker gets its
+own, see src/prefork.py), with the same settings, read from the
+environment:
+
+    MONGO_URI, DB_NAME                       where
+    MONGO_MAX_POOL_SIZE / MONGO_MIN_POOL_SIZE connections per client
+    MONGO_MAX_IDLE_MS                        close pooled connections idle this long
+    MONGO_WAIT_QUEUE_TIMEOUT_MS              fail instead of queueing forever for a connection
+    MONGO_SERVER_SELECTION_TIMEOUT_MS        fail fast when no server is reachable
+    MONGO_READ_PREFERENCE                    primary, primaryPreferred, secondaryPreferred, ...
+    MONGO_WRITE_CONCERN, MONGO_JOURNAL       w (1, majority, ...) and j
+
+The apps share the database but not their document records, which have
+different shapes: main.py's analysis records (results, analytics, verify
+fields) live in "documents", the backend's search records (vector, text
+preview) in "search_documents" and the legacy src/database.py helpers'
+free-form records in "legacy_documents". History, analytics, exports and
+reprocessing therefore only ever see analysis records. The entity index,
+its alias table and the clause store are split the same way ("entities",
+"entity_aliases", "clauses" for main.py, the SEARCH_* collections for the
+backend), so each app's lookups only return doc_ids it can resolve and an
+alias added through one app does not rewrite the other's keys. Page text
+is keyed by doc_id (unique across the apps) and shared.
+
+ensure_indexes() creates the document-record indexes (doc_id, content
+hash, file type + creation time) on one of those collections and those of
+the stores kept in their own collections (pages, entities, clauses,
+near-duplicate bands); the apps call it at startup.
+"""
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from pymongo import ASCENDING, MongoClient
+
+DEFAULT_URI = "mongodb://localhost:27017"
+DEFAULT_DB_NAME = "LegalDocAI_DB"
+DOCUMENTS = "documents"
+SEARCH_DOCUMENTS = "search_documents"
+LEGACY_DOCUMENTS = "legacy_documents"
+SEARCH_ENTITIES = "search_entities"
+SEARCH_ENTITY_ALIASES = "search_entity_aliases"
+SEARCH_CLAUSES = "search_clauses"
+
+# (keys, options) of the indexes on document records, one per query pattern
+DOCUMENT_INDEXES = [
+    # partial: records written without a doc_id must not collide on null
+    ([("doc_id", ASCENDING)], {"unique": True, "partialFilterExpression": {"doc_id": {"$exists": True}}}),
+    ([("sha256", ASCENDING)], {}),
+    # file type + creation time (ObjectId) for analytics summaries and exports
+    ([("analytics.file_type", ASCENDING), ("_id", ASCENDING)], {}),
+]
+
+
+def _write_concern(value: str):
+    return int(value) if value.isdigit() else value
+
+
+class MongoLayer:
+    """Pooled sync + async clients of one database, created lazily per process."""
+
+    def __init__(
+        self,
+        uri: str = DEFAULT_URI,
+        db_name: str = DEFAULT_DB_NAME,
+        max_pool_size: int = 50,
+        min_pool_size: int = 0,
+        max_idle_ms: int = 300000,
+        wait_queue_timeout_ms: int = 10000,
+        server_selection_timeout_ms: int = 5000,
+        read_preference: str = "primary",
+        write_concern: str = "1",
+        journal: Optional[bool] = None,
+    ):
+        self.uri = uri
+        self.db_name = db_name
+        self.options: Dict[str, Any] = {
+            "maxPoolSize": max_pool_size,
+            "minPoolSize": min_pool_size,
+            "maxIdleTimeMS": max_idle_ms,
+            "waitQueueTimeoutMS": wait_queue_timeout_ms,
+            "serverSelectionTimeoutMS": server_selection_timeout_ms,
+            "readPreference": read_preference,
+            "w": _write_concern(write_concern),
+            "appname": "LegalDocAI",
+        }
+        if journal is not None:
+            self.options["journal"] = journal
+        self._lock = threading.Lock()
+        self._pid = None
+        self._client = None
+        self._async_client = None
+
+    @classmethod
+    def from_env(cls) -> "MongoLayer":
+        journal = os.getenv("MONGO_JOURNAL")
+        return cls(
+            uri=os.getenv("MONGO_URI", DEFAULT_URI),
+            db_name=os.getenv("DB_NAME", DEFAULT_DB_NAME),
+            max_pool_size=int(os.getenv("MONGO_MAX_POOL_SIZE", "50")),
+            min_pool_size=int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+            max_idle_ms=int(os.getenv("MONGO_MAX_IDLE_MS", "300000")),
+            wait_queue_timeout_ms=int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000")),
+            server_selection_timeout_ms=int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+            read_preference=os.getenv("MONGO_READ_PREFERENCE", "primary"),
+            write_concern=os.getenv("MONGO_WRITE_CONCERN", "1"),
+            journal=journal.lower() in ("1", "true", "yes") if journal else None,
+        )
+
+    def _check_pid(self) -> None:
+        """Clients inherited through fork are unusable: start over in the child (lock held)."""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._client = self._async_client = None
+
+    # ---------------------- CLIENTS ----------------------
+    @property
+    def client(self) -> MongoClient:
+        with self._lock:
+            self._check_pid()
+            if self._client is None:
+                self._client = MongoClient(self.uri, **self.options)
+            return self._client
+
+    @property
+    def db(self):
+        return self.client[self.db_name]
+
+    @property
+    def async_client(self):
+        with self._lock:
+            self._check_pid()
+            if self._async_client is None:
+                from motor.motor_asyncio import AsyncIOMotorClient
+
+                self._async_client = AsyncIOMotorClient(self.uri, **self.options)
+            return self._async_client
+
+    @property
+    def async_db(self):
+        return self.async_client[self.db_name]
+
+    # ---------------------- INDEXES ----------------------
+    def ensure_indexes(self, *stores, documents: str = DOCUMENTS) -> None:
+        """Document-record indexes of `documents`, then each store's own (warnings only: the app still starts)."""
+        documents = self.db[documents]
+        for keys, options in DOCUMENT_INDEXES:
+            try:
+                documents.create_index(keys, **options)
+            except Exception as e:
+                print(f"⚠️ Could not create document index {keys}: {e}")
+        for store in stores:
+            try:
+                store.ensure_indexes()
+            except Exception as e:
+                print(f"⚠️ Could not create {type(store).__name__} indexes: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                if self._client is not None:
+                    self._client.close()
+                if self._async_client is not None:
+                    self._async_client.close()
+            self._client = self._async_client = None
+
+
+_shared: Optional[MongoLayer] = None
+_shared_lock = threading.Lock()
+
+
+def shared() -> MongoLayer:
+    """The process-wide layer, configured from the environment on first use."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = MongoLayer.from_env()
+        return _shared
@@ -0,0 +1,147 @@
+# src/near_duplicates.py
+"""
+Near-duplicate detection with MinHash signatures and LSH banding.
+
+A document's text is reduced to word shingles (SHINGLE_SIZE-grams of the
+lexical tokens), and the shingles to NUM_PERM MinHash values; the fraction
+of equal values between two signatures estimates the Jaccard similarity of
+their shingle sets. The signature is cut into BANDS bands of ROWS values
+and each band hashed to a 64-bit key. Documents sharing any band key are
+candidates; with 16 x 8 the candidate probability is ~50% at Jaccard 0.7
+and ~99% at 0.85.
+
+Signatures and band keys are stored on the document record itself
+("minhash", "lsh_bands"); a multikey index on lsh_bands turns the
+candidate lookup into an indexed $in query, independent of corpus size.
+LSHIndex is the same structure in memory (benchmarks, tests).
+"""
+import hashlib
+import zlib
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+from bson import Binary
+from pymongo import ASCENDING
+
+from src.lexical_index import tokenize
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_MASK = np.uint64(0xFFFFFFFF)
+
+_rng = np.random.RandomState(20240601)  # fixed: signatures must be stable across processes
+_A = _rng.randint(1, 2**31 - 1, size=NUM_PERM).astype(np.uint64)[:, None]
+_B = _rng.randint(0, 2**31 - 1, size=NUM_PERM).astype(np.uint64)[:, None]
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """32-bit hashes of the distinct word shingles of text."""
+    tokens = tokenize(text)
+    if not tokens:
+        return np.zeros(0, dtype=np.uint64)
+    if len(tokens) < size:
+        grams = [" ".join(tokens)]
+    else:
+        grams = [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+    return np.unique(np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams)))
+
+
+def minhash(text: str) -> Optional[np.ndarray]:
+    """uint32[NUM_PERM] signature, or None for a text without tokens."""
+    hashes = shingle_hashes(text)
+    if not hashes.size:
+        return None
+    # (a * x + b) mod p per permutation; a, x < 2**32 so nothing overflows uint64
+    return (((_A * hashes[None, :] + _B) % _PRIME) & _MASK).min(axis=1).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray) -> List[int]:
+    """One signed 64-bit key per band (band number is part of the key)."""
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+        digest = hashlib.blake2b(bytes([band]) + chunk, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+
+def signature_fields(signature: Optional[np.ndarray]) -> Dict[str, object]:
+    """Fields stored on a document record for near-duplicate lookup."""
+    if signature is None:
+        return {"minhash": None, "lsh_bands": []}
+    return {"minhash": Binary(signature.tobytes()), "lsh_bands": band_keys(signature)}
+
+
+def _decode(value) -> Optional[np.ndarray]:
+    return np.frombuffer(bytes(value), dtype=np.uint32) if value else None
+
+
+class NearDuplicateIndex:
+    """Candidate lookup over the signatures stored in a documents collection."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_index([("lsh_bands", ASCENDING)])
+
+    def find(self, doc_id: str, min_similarity: float = 0.5, limit: int = 20) -> Optional[List[Dict[str, object]]]:
+        """Similar documents by estimated Jaccard, best first; None if doc_id is unknown."""
+        doc = self.collection.find_one({"doc_id": doc_id}, {"_id": 0, "minhash": 1, "lsh_bands": 1})
+        if doc is None:
+            return None
+        signature = _decode(doc.get("minhash"))
+        if signature is None or not doc.get("lsh_bands"):
+            return []
+        cursor = self.collection.find(
+            {"lsh_bands": {"$in": doc["lsh_bands"]}, "doc_id": {"$ne": doc_id}},
+            {"_id": 0, "doc_id": 1, "filename": 1, "minhash": 1},
+        )
+        hits = []
+        for cand in cursor:
+            other = _decode(cand.get("minhash"))
+            if other is None:
+                continue
+            score = similarity(signature, other)
+            if score >= min_similarity:
+                hits.append({"doc_id": cand["doc_id"], "filename": cand.get("filename"), "similarity": round(score, 3)})
+        hits.sort(key=lambda h: h["similarity"], reverse=True)
+        return hits[:limit]
+
+
+class LSHIndex:
+    """In-memory equivalent of NearDuplicateIndex (band key -> doc ids)."""
+
+    def __init__(self):
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.buckets: Dict[int, Set[str]] = {}
+
+    def add(self, doc_id: str, signature: Optional[np.ndarray]) -> None:
+        if signature is None:
+            return
+        self.signatures[doc_id] = signature
+        for key in band_keys(signature):
+            self.buckets.setdefault(key, set()).add(doc_id)
+
+    def candidates(self, signature: np.ndarray) -> Set[str]:
+        found: Set[str] = set()
+        for key in band_keys(signature):
+            found |= self.buckets.get(key, set())
+        return found
+
+    def query(self, signature: np.ndarray, min_similarity: float = 0.5, exclude: Iterable[str] = ()) -> List[Dict[str, object]]:
+        skip = set(exclude)
+        hits = [
+            {"doc_id": d, "similarity": round(similarity(signature, self.signatures[d]), 3)}
+            for d in self.candidates(signature) if d not in skip
+        ]
+        hits = [h for h in hits if h["similarity"] >= min_similarity]
+        return sorted(hits, key=lambda h: h["similarity"], reverse=True)
@@ -0,0 +1,154 @@
+# src/ocr_engine.py
+"""
+OCR engines shared by every OCR call site.
+
+pytesseract.image_to_string spawns a tesseract process per call, writes the
+image to a temp file and reloads the language data every time. When
+tesserocr (Tesseract C API bindings) is installed, TesserocrPool keeps a
+pool of initialized TessBaseAPI handles instead: images are passed in
+memory, models stay loaded, and the GIL is released while recognizing so
+pages can be OCRed in parallel threads. Otherwise PytesseractEngine is
+used with the same settings.
+"""
+import os
+import queue
+import threading
+from typing import Callable, Optional
+
+from PIL import Image
+
+from src.image_preprocess import preprocess_for_ocr, tesseract_config
+
+try:
+    import tesserocr
+except ImportError:  # optional dependency
+    tesserocr = None
+
+Preprocess = Callable[[Image.Image], Image.Image]
+
+
+class OCREngine:
+    """Common interface: image_to_string(PIL image) -> text."""
+
+    name = "base"
+
+    def __init__(self, lang: str = "eng", psm: int = 3, oem: int = 3, preprocess: Optional[Preprocess] = None):
+        self.lang = lang
+        self.psm = psm
+        self.oem = oem
+        self.preprocess = preprocess
+
+    def image_to_string(self, image: Image.Image) -> str:
+        if self.preprocess:
+            image = self.preprocess(image)
+        return self._recognize(image)
+
+    def _recognize(self, image: Image.Image) -> str:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class PytesseractEngine(OCREngine):
+    """One tesseract subprocess per call (fallback)."""
+
+    name = "pytesseract"
+
+    def _recognize(self, image: Image.Image) -> str:
+        import pytesseract
+
+        return pytesseract.image_to_string(image, lang=self.lang, config=tesseract_config(self.psm, self.oem))
+
+
+class TesserocrPool(OCREngine):
+    """Pool of long-lived TessBaseAPI handles, borrowed one per call."""
+
+    name = "tesserocr"
+
+    def __init__(self, workers: int = 2, tessdata: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+        self._apis: "queue.Queue" = queue.Queue()
+        self._all = []
+        for _ in range(max(1, workers)):
+            api_kwargs = {"lang": self.lang, "psm": self.psm, "oem": self.oem}
+            if tessdata:
+                api_kwargs["path"] = tessdata
+            api = tesserocr.PyTessBaseAPI(**api_kwargs)
+            self._all.append(api)
+            self._apis.put(api)
+
+    def _recognize(self, image: Image.Image) -> str:
+        api = self._apis.get()
+        try:
+            api.SetImage(image)
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+            self._apis.put(api)
+
+    def close(self) -> None:
+        for api in self._all:
+            api.End()
+        self._all = []
+
+
+def create_ocr_engine(
+    backend: str = "auto",
+    lang: str = "eng",
+    psm: int = 3,
+    oem: int = 3,
+    workers: int = 2,
+    preprocess: bool = True,
+    target_dpi: int = 300,
+    tessdata: Optional[str] = None,
+) -> OCREngine:
+    """
+    Build an engine. backend is "auto" (tesserocr if importable, else
+    pytesseract), "tesserocr" or "pytesseract".
+    """
+    prep = (lambda img: preprocess_for_ocr(img, target_dpi=target_dpi)) if preprocess else None
+    settings = {"lang": lang, "psm": psm, "oem": oem, "preprocess": prep}
+    if backend in ("auto", "tesserocr"):
+        try:
+            return TesserocrPool(workers=workers, tessdata=tessdata, **settings)
+        except Exception as e:
+            if backend == "tesserocr":
+                raise
+            print(f"⚠️ tesserocr unavailable ({e}); falling back to pytesseract.")
+    return PytesseractEngine(**settings)
+
+
+# ---------------------- PROCESS-WIDE ENGINE ----------------------
+_engine: Optional[OCREngine] = None
+_engine_lock = threading.Lock()
+
+
+def configure_ocr_engine(**settings) -> OCREngine:
+    """Replace the process-wide engine (main.py calls this with config.py values)."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.close()
+        _engine = create_ocr_engine(**settings)
+        return _engine
+
+
+def get_ocr_engine() -> OCREngine:
+    """Process-wide engine; built from TESSERACT_*/OCR_* env vars on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_ocr_engine(
+                backend=os.getenv("OCR_ENGINE", "auto"),
+                lang=os.getenv("TESSERACT_LANG", "eng"),
+                psm=int(os.getenv("TESSERACT_PSM", "3")),
+                oem=int(os.getenv("TESSERACT_OEM", "3")),
+                workers=int(os.getenv("OCR_WORKERS", "2")),
+                preprocess=os.getenv("OCR_PREPROCESS", "true").lower() in ("1", "true", "yes"),
+                target_dpi=int(os.getenv("OCR_TARGET_DPI", "300")),
+                tessdata=os.getenv("TESSDATA_PREFIX"),
+            )
+        return _engine
@@ -0,0 +1,147 @@
+# src/page_images.py
+"""
+Rendered page images (PNG) with an on-disk LRU cache.
+
+Pages are rendered with PyMuPDF so their longer side is `size` pixels
+(images are simply scaled). PNGs are cached in one directory as
+<file sha256>-<page>-<size>.png; a hit bumps the file's mtime and, when
+the directory grows past max_bytes, the files with the oldest mtime are
+deleted first. The cache key depends only on the file content, page and
+size, so etag() can answer conditional requests without rendering.
+
+Rasters rendered for OCR are written to the cache at the largest size
+(store_raster, wired in as the pipeline's raster_sink). Later requests for
+that page are served from that image, or scaled down from it for
+thumbnails, instead of rendering the PDF again.
+"""
+import io
+import os
+import threading
+from typing import Callable, Optional, Tuple, Union
+
+import fitz
+from PIL import Image
+
+from src import metrics
+
+def _scale(width: float, height: float, size: int) -> float:
+    return size / max(width, height)
+
+
+def render_page(source: Union[str, bytes], file_type: str, page: int, size: int) -> Image.Image:
+    """Page `page` (1-based) of a PDF, or of an image file (one page), longer side `size` px."""
+    if file_type == "pdf":
+        doc = fitz.open(stream=source, filetype="pdf") if isinstance(source, (bytes, bytearray)) else fitz.open(source)
+        try:
+            if not 1 <= page <= len(doc):
+                raise IndexError(f"page {page} out of range")
+            pdf_page = doc[page - 1]
+            zoom = _scale(pdf_page.rect.width, pdf_page.rect.height, size)
+            pix = pdf_page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        finally:
+            doc.close()
+    if page != 1:
+        raise IndexError(f"page {page} out of range")
+    with Image.open(io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source) as img:
+        return downscale(img.convert("RGB"), size)
+
+
+def downscale(image: Image.Image, size: int) -> Image.Image:
+    """Copy of image with its longer side at most `size` px."""
+    image = image.copy()
+    image.thumbnail((size, size), Image.LANCZOS)
+    return image
+
+
+def to_png(image: Image.Image) -> bytes:
+    out = io.BytesIO()
+    image.save(out, format="PNG", optimize=False)
+    return out.getvalue()
+
+
+class PageImageCache:
+    """Disk LRU of page PNGs keyed by (file sha256, page, size), capped at max_bytes."""
+
+    def __init__(self, directory: str, max_bytes: int, max_size: int = 1600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._bytes = sum(e.stat().st_size for e in os.scandir(directory) if e.name.endswith(".png"))
+
+    def _path(self, sha256: str, page: int, size: int) -> str:
+        return os.path.join(self.directory, f"{sha256}-{page}-{size}.png")
+
+    @staticmethod
+    def etag(sha256: str, page: int, size: int) -> str:
+        return f'"{sha256[:32]}-{page}-{size}"'
+
+    def get(self, sha256: str, page: int, size: int) -> Optional[bytes]:
+        path = self._path(sha256, page, size)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, sha256: str, page: int, size: int, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(sha256, page, size)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        with self._lock:
+            old = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp, path)
+            self._bytes += len(data) - old
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used files until the cache fits max_bytes (lock held)."""
+        entries = sorted((e for e in os.scandir(self.directory) if e.name.endswith(".png")),
+                         key=lambda e: e.stat().st_mtime_ns)
+        total = sum(e.stat().st_size for e in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            metrics.incr("page_images.evictions")
+        self._bytes = total
+
+    def store_raster(self, sha256: str, page: int, image: Image.Image) -> None:
+        """Keep a raster rendered elsewhere (OCR) as the largest cached size of the page."""
+        self.put(sha256, page, self.max_size, to_png(downscale(image, self.max_size)))
+        metrics.incr("page_images.rasters_stored")
+
+    def page_png(
+        self, sha256: str, page: int, size: int, load_source: Callable[[], Tuple[Union[str, bytes], str]]
+    ) -> Tuple[bytes, str]:
+        """
+        PNG of the page at `size`, and where it came from: "cache", "raster"
+        (scaled from the cached largest size, e.g. an OCR raster) or "render".
+        load_source() -> (file path or bytes, file type) is only called to render.
+        """
+        data = self.get(sha256, page, size)
+        if data is not None:
+            metrics.incr("page_images.hits")
+            return data, "cache"
+        largest = self.get(sha256, page, self.max_size) if size < self.max_size else None
+        if largest is not None:
+            with Image.open(io.BytesIO(largest)) as img:
+                data, origin = to_png(downscale(img, size)), "raster"
+        else:
+            data, origin = to_png(render_page(*load_source(), page, size)), "render"
+        metrics.incr(f"page_images.{origin}")
+        self.put(sha256, page, size, data)
+        return data, origin
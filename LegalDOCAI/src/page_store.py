@@ -0,0 +1,105 @@
+# src/page_store.py
+"""
+Compressed per-page text storage in its own MongoDB collection.
+
+Document records keep metadata and analytics only; page text lives in one
+small record per page ({doc_id, page, codec, chars, data}) so listing or
+querying documents never loads text, no single record approaches the 16 MB
+BSON limit, and page ranges can be read on demand. Text is compressed with
+zstd when the zstandard package is installed, zlib otherwise; the codec is
+stored with each page so either can be read back.
+"""
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from bson import Binary
+from pymongo import ASCENDING, InsertOne
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+DEFAULT_CODEC = "zstd" if zstandard is not None else "zlib"
+WRITE_BATCH_PAGES = 200
+
+
+def compress_text(text: str, codec: str = DEFAULT_CODEC, level: int = 3) -> bytes:
+    data = text.encode("utf-8")
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed")
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    if codec == "zlib":
+        return zlib.compress(data, level)
+    raise ValueError(f"Unknown page codec: {codec}")
+
+
+def decompress_text(data: bytes, codec: str) -> str:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    if codec == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown page codec: {codec}")
+
+
+class PageStore:
+    """Page text of every document, keyed by (doc_id, page)."""
+
+    def __init__(self, collection, codec: Optional[str] = None, level: int = 3):
+        self.collection = collection
+        self.codec = codec or DEFAULT_CODEC
+        if self.codec == "zstd" and zstandard is None:
+            print("⚠️ zstandard not installed; compressing pages with zlib.")
+            self.codec = "zlib"
+        self.level = level
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_index([("doc_id", ASCENDING), ("page", ASCENDING)], unique=True)
+
+    def put_pages(self, doc_id: str, pages: Iterable[Tuple[int, str]]) -> int:
+        """Replace the stored pages of doc_id; writes in bulk batches. Returns the page count."""
+        self.collection.delete_many({"doc_id": doc_id})
+        count = 0
+        batch: List[InsertOne] = []
+        for page, text in pages:
+            batch.append(InsertOne({
+                "doc_id": doc_id,
+                "page": int(page),
+                "codec": self.codec,
+                "chars": len(text),
+                "data": Binary(compress_text(text, self.codec, self.level)),
+            }))
+            count += 1
+            if len(batch) >= WRITE_BATCH_PAGES:
+                self.collection.bulk_write(batch, ordered=False)
+                batch = []
+        if batch:
+            self.collection.bulk_write(batch, ordered=False)
+        return count
+
+    def iter_pages(self, doc_id: str, start: int = 1, end: Optional[int] = None) -> Iterator[Dict[str, object]]:
+        """Yield {"page", "text"} for pages start..end (1-based, inclusive), in order."""
+        page_filter: Dict[str, int] = {"$gte": start}
+        if end is not None:
+            page_filter["$lte"] = end
+        cursor = self.collection.find(
+            {"doc_id": doc_id, "page": page_filter},
+            {"_id": 0, "page": 1, "codec": 1, "data": 1},
+        ).sort("page", ASCENDING)
+        for rec in cursor:
+            yield {"page": rec["page"], "text": decompress_text(bytes(rec["data"]), rec["codec"])}
+
+    def get_pages(self, doc_id: str, start: int = 1, end: Optional[int] = None) -> List[Dict[str, object]]:
+        return list(self.iter_pages(doc_id, start, end))
+
+    def get_text(self, doc_id: str) -> str:
+        return "\n".join(str(p["text"]) for p in self.iter_pages(doc_id))
+
+    def page_count(self, doc_id: str) -> int:
+        return self.collection.count_documents({"doc_id": doc_id})
+
+    def delete(self, doc_id: str) -> None:
+        self.collection.delete_many({"doc_id": doc_id})
@@ -0,0 +1,579 @@
+# src/pipeline.py
+"""
+Staged ingestion pipeline shared by main.py and backend/app.
+
+    ingest -> extract -> ocr -> analyze -> embed -> verify -> persist
+
+Each stage has a StageConfig (enabled, concurrency, batch_size, timeout),
+overridable per process with PIPELINE_<STAGE>_ENABLED / _CONCURRENCY /
+_BATCH_SIZE / _TIMEOUT env vars. Stages use the settings that apply to them:
+OCR runs `concurrency` pages at once in worker threads and analyze feeds
+spaCy `batch_size` pages per batch.
+
+A job's `deadline` (src.llm_client.Deadline) is the request's time budget
+and cancellation flag. Each stage runs under a child deadline capped by its
+`timeout`; extraction, OCR workers and NLP check it between pages, images
+and batches and the LLM verifier is handed it, so a cancelled (client gone)
+or over-budget job stops with RequestCancelled / DeadlineExceeded instead
+of running to completion. Stops are counted per stage in src.metrics.
+
+Every job carries an analysis profile (ANALYSIS_PROFILES):
+
+    triage    regex entities, clause counts and keywords from a spaCy
+              pipeline without parser/NER; no summary, no verification
+    standard  full spaCy analysis, verified by the local classifier only
+              (marked "NOT VERIFIED", verified_by "skipped", when it has
+              no confident verdict)
+    full      full analysis, local classifier then the LLM verifier
+
+Stored page text is enough to re-run analyze/verify with a higher profile
+later (src/reprocess.py), so triaged documents are never re-extracted.
+
+Heavy resources are process-wide and shared by every Pipeline instance: the
+OCR engine (src/ocr_engine.py), the spaCy model (src/analysis.load_nlp) and
+a stage output cache keyed by file content hash, so the same file submitted
+through either API reuses its extracted text and analysis.
+"""
+import copy
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from src.analysis import (
+    analysis_version,
+    analyze_pages,
+    analyze_pages_triage,
+    analyze_text_overall,
+    analyze_text_triage,
+    load_light_nlp,
+    load_nlp,
+)
+from src.clauses import segment_clauses, segmenter_version
+from src.extraction import (
+    DEFAULT_DOCX_PAGE_CHARS,
+    DEFAULT_MEMORY_BUDGET_BYTES,
+    MemoryBudget,
+    iter_docx_pages,
+    iter_image_units,
+    iter_pdf_units,
+    iter_spreadsheet_pages,
+    ocr_unit,
+)
+from src import metrics
+from src.llm_client import Deadline, DeadlineExceeded, RequestCancelled
+from src.near_duplicates import minhash
+from src.ocr_engine import get_ocr_engine
+
+STAGES = ("ingest", "extract", "ocr", "analyze", "embed", "verify", "persist")
+EXTRACTION_STAGES = STAGES[:3]
+ANALYSIS_STAGES = STAGES[3:]
+
+# Version of each stage's output, stored with every document as
+# "pipeline_version". Bump a stage when its output changes so src/reprocess.py
+# can find and refresh stale documents; analyze is derived from src.analysis
+# and the clause segmenter (src.clauses).
+STAGE_VERSIONS: Dict[str, str] = {
+    "extract": "1",
+    "ocr": "1",
+    "analyze": f"{analysis_version()}+{segmenter_version()}",
+    "embed": "2",
+    "verify": "1",
+}
+
+# cheapest first; documents can be promoted to a later profile
+ANALYSIS_PROFILES = ("triage", "standard", "full")
+STANDARD_UNVERIFIED_MARKER = "⚠️ NOT VERIFIED (standard profile)"
+DEFAULT_PROFILE = "full"
+
+IMAGE_TYPES = {"png", "jpg", "jpeg", "tiff", "bmp", "gif"}
+DOCUMENT_TYPES = {"pdf", "docx", "xls", "xlsx"} | IMAGE_TYPES
+
+# seconds the extractor waits for OCR workers to free image memory
+BUDGET_WAIT_SECONDS = 60.0
+
+
+class UnsupportedFileType(ValueError):
+    """The file extension is not one the pipeline can extract."""
+
+
+class EmptyDocument(ValueError):
+    """Extraction and OCR produced no text."""
+
+
+class StageConfig:
+    """Settings for one pipeline stage."""
+
+    def __init__(self, enabled: bool = True, concurrency: int = 1, batch_size: int = 1, timeout: float = 0.0):
+        self.enabled = enabled
+        self.concurrency = max(1, int(concurrency))
+        self.batch_size = max(1, int(batch_size))
+        self.timeout = max(0.0, float(timeout))  # seconds; 0 = only the job's deadline applies
+
+    @classmethod
+    def from_env(cls, stage: str, **defaults) -> "StageConfig":
+        prefix = f"PIPELINE_{stage.upper()}_"
+        enabled = os.getenv(prefix + "ENABLED")
+        return cls(
+            enabled=defaults.get("enabled", True) if enabled is None else enabled.lower() in ("1", "true", "yes"),
+            concurrency=int(os.getenv(prefix + "CONCURRENCY", defaults.get("concurrency", 1))),
+            batch_size=int(os.getenv(prefix + "BATCH_SIZE", defaults.get("batch_size", 1))),
+            timeout=float(os.getenv(prefix + "TIMEOUT", defaults.get("timeout", 0.0))),
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"StageConfig(enabled={self.enabled}, concurrency={self.concurrency}, "
+            f"batch_size={self.batch_size}, timeout={self.timeout})"
+        )
+
+
+DEFAULT_STAGE_SETTINGS: Dict[str, Dict[str, Any]] = {
+    "ocr": {"concurrency": 2},
+    "analyze": {"batch_size": 16},
+}
+
+
+def default_stage_configs() -> Dict[str, StageConfig]:
+    return {stage: StageConfig.from_env(stage, **DEFAULT_STAGE_SETTINGS.get(stage, {})) for stage in STAGES}
+
+
+class StageCache:
+    """Thread-safe LRU of stage outputs keyed by (content hash, stage, settings)."""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return copy.deepcopy(self._data[key])
+
+    def put(self, key: tuple, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = copy.deepcopy(value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+_stage_cache = StageCache(int(os.getenv("PIPELINE_CACHE_ENTRIES", "64")))
+
+
+def bounded_map(fn: Callable[[Any], Any], items: Iterable[Any], concurrency: int, executor: Optional[Executor]) -> Iterator[Any]:
+    """
+    Ordered, lazy map that keeps at most `concurrency` items in flight, so
+    a generator of decoded pages is never read far ahead of the workers.
+    """
+    if concurrency <= 1 or executor is None:
+        for item in items:
+            yield fn(item)
+        return
+    window: deque = deque()
+    try:
+        for item in items:
+            window.append(executor.submit(fn, item))
+            if len(window) >= concurrency:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+    finally:
+        # consumer stopped early (error, cancelled job): drop work not yet started
+        for future in window:
+            future.cancel()
+
+
+def detect_file_type(filename: str) -> str:
+    ext = filename.split(".")[-1].lower() if "." in filename else ""
+    if ext in DOCUMENT_TYPES:
+        return ext
+    return "unknown"
+
+
+def content_sha256(source: Union[str, bytes]) -> str:
+    """Hex SHA-256 of raw bytes or of a file, read in chunks."""
+    h = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray)):
+        h.update(source)
+    else:
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def page_text(page: Dict[str, Any]) -> str:
+    """Text layer plus OCR output of one extracted page."""
+    return "\n".join([page["text"]] + page["ocr_texts"]) if page.get("ocr_texts") else page["text"]
+
+
+class PipelineJob:
+    """One document moving through the pipeline; each stage fills in its fields."""
+
+    def __init__(self, filename: str, source: Union[str, bytes], profile: str = DEFAULT_PROFILE):
+        if profile not in ANALYSIS_PROFILES:
+            raise ValueError(f"Unknown analysis profile: {profile}")
+        self.filename = filename
+        self.source = source  # file path or raw bytes
+        self.profile = profile
+        self.file_type = "unknown"
+        self.sha256 = ""
+        self.pages: List[Dict[str, Any]] = []
+        self.results_summary: Dict[str, Any] = {}
+        self.analytics: Dict[str, Any] = {}
+        self.page_results: List[Dict[str, Any]] = []
+        self.clauses: List[Dict[str, Any]] = []  # src.clauses.segment_clauses output
+        self.vector: Optional[List[float]] = None
+        self.minhash: Optional[Any] = None  # src.near_duplicates signature (numpy uint32 array)
+        self.doc_id: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self.versions: Dict[str, str] = {}  # stage -> STAGE_VERSIONS entry it ran with
+        self.cache_hits: List[str] = []
+        self.budget: Optional[MemoryBudget] = None
+        self.units: Optional[Iterator[Dict[str, Any]]] = None
+        self.deadline: Optional[Deadline] = None  # request budget + cancellation flag, if any
+        self.stage_deadline: Optional[Deadline] = None  # deadline of the stage running in run()
+        self.streamed_results: List[Dict[str, Any]] = []  # Pipeline.analyze_page output, in page order
+        self.started = time.perf_counter()
+
+    @property
+    def page_texts(self) -> List[str]:
+        return [page_text(p) for p in self.pages]
+
+    @property
+    def full_text(self) -> str:
+        return "\n".join(self.page_texts)
+
+
+class Pipeline:
+    """
+    Runs PipelineJobs through the stages. Callers plug in what differs
+    between the two APIs: `embedder(texts) -> vectors`,
+    `verifier(full_text, deadline) -> {"marker", "ai_confidence", "raw"}` and
+    `persister(job) -> doc_id`; a stage without its callable is a no-op,
+    except that embed always computes the MinHash signature used for
+    near-duplicate lookup (src/near_duplicates.py).
+    An optional `classifier(full_text, analytics)` is asked first in the
+    verify stage and returns a verifier-shaped result, or None to defer to
+    `verifier` (see src/legality_classifier.py); only jobs with the full
+    profile reach `verifier`.
+    `raster_sink(sha256, page, image)`, when given, receives each page raster
+    rendered for OCR before it is OCRed (e.g. to cache page images).
+    """
+
+    def __init__(
+        self,
+        stage_configs: Optional[Dict[str, StageConfig]] = None,
+        embedder: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        verifier: Optional[Callable[[str, Any], Dict[str, Any]]] = None,
+        persister: Optional[Callable[[PipelineJob], Optional[str]]] = None,
+        classifier: Optional[Callable[[str, Dict[str, Any]], Optional[Dict[str, Any]]]] = None,
+        accept_text_files: bool = False,
+        require_text: bool = True,
+        ocr_missing_text: bool = True,
+        ocr_embedded_images: bool = False,
+        memory_budget_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES,
+        spreadsheet_limits: Optional[Dict[str, int]] = None,
+        docx_page_chars: int = DEFAULT_DOCX_PAGE_CHARS,
+        nlp_loader: Callable[[], Any] = load_nlp,
+        light_nlp_loader: Callable[[], Any] = load_light_nlp,
+        cache: Optional[StageCache] = None,
+        raster_sink: Optional[Callable[[str, int, Any], None]] = None,
+    ):
+        self.stages = default_stage_configs()
+        self.stages.update(stage_configs or {})
+        self.embedder = embedder
+        self.verifier = verifier
+        self.persister = persister
+        self.classifier = classifier
+        self.accept_text_files = accept_text_files
+        self.require_text = require_text
+        self.ocr_missing_text = ocr_missing_text
+        self.ocr_embedded_images = ocr_embedded_images
+        self.memory_budget_bytes = memory_budget_bytes
+        self.spreadsheet_limits = dict(spreadsheet_limits or {})
+        self.docx_page_chars = docx_page_chars
+        self.nlp_loader = nlp_loader
+        self.light_nlp_loader = light_nlp_loader
+        self.cache = cache if cache is not None else _stage_cache
+        self.raster_sink = raster_sink
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._executors_lock = threading.Lock()
+
+    # ---------------------- RUNNING ----------------------
+    def run(self, job: PipelineJob, stages: Sequence[str] = STAGES) -> PipelineJob:
+        """Run the given stages (in pipeline order) on the job."""
+        for name in stages:
+            cfg = self.stages[name]
+            if not cfg.enabled:
+                continue
+            if job.deadline is not None and job.deadline.cancelled:
+                metrics.incr(f"pipeline.cancelled.{name}")
+                job.deadline.check(name)
+            if job.deadline is not None or cfg.timeout:
+                job.stage_deadline = Deadline(cfg.timeout or None, parent=job.deadline)
+            t0 = time.perf_counter()
+            try:
+                getattr(self, f"_{name}")(job, cfg)
+            except RequestCancelled:
+                metrics.incr(f"pipeline.cancelled.{name}")
+                raise
+            except DeadlineExceeded:
+                metrics.incr(f"pipeline.deadline_exceeded.{name}")
+                raise
+            finally:
+                job.stage_deadline = None
+            job.timings[name] = round(time.perf_counter() - t0, 4)
+            if name in STAGE_VERSIONS:
+                job.versions[name] = STAGE_VERSIONS[name]
+        return job
+
+    def iter_pages(self, job: PipelineJob) -> Iterator[Dict[str, Any]]:
+        """
+        Yield finished pages ({"page", "text", "ocr_texts"}) as they come
+        out of extract + OCR, appending each to job.pages. run() drains this
+        in the ocr stage; streaming callers can consume it directly.
+        Seconds from job creation to the first page go to
+        job.timings["first_page"].
+        """
+        for page in self._iter_new_pages(job):
+            job.timings.setdefault("first_page", round(time.perf_counter() - job.started, 4))
+            yield page
+
+    def checkpoint(self, job: PipelineJob, what: str) -> None:
+        """Raise if the job was cancelled or its current stage (or request) deadline passed."""
+        deadline = job.stage_deadline or job.deadline
+        if deadline is not None:
+            deadline.check(what)
+
+    def _iter_new_pages(self, job: PipelineJob) -> Iterator[Dict[str, Any]]:
+        if job.units is None:
+            yield from job.pages
+            return
+        cfg = self.stages["ocr"]
+        units, job.units = job.units, None
+        if cfg.enabled:
+            units = bounded_map(lambda u: self._ocr_unit(job, u), units, cfg.concurrency, self._executor("ocr", cfg))
+        for unit in units:
+            self.checkpoint(job, "ocr" if cfg.enabled else "extract")
+            page = {"page": unit["page"], "text": unit["text"], "ocr_texts": unit.get("ocr_texts") or []}
+            if unit.get("ocr_page"):
+                page["ocr_page"] = True
+            job.pages.append(page)
+            yield page
+        self._check_text(job)
+        self.cache.put(self._cache_key(job, "pages"), job.pages)
+
+    def analyze_page(self, job: PipelineJob, page: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Page-level analysis of one finished page, for streaming callers; the
+        analyze stage reuses these results instead of analyzing pages again.
+        Returns the page result plus the clauses whose headings are on it.
+        """
+        self.checkpoint(job, "analyze")
+        text = page_text(page)
+        if job.profile == "triage":
+            result = analyze_pages_triage([text])[0]
+        else:
+            result = analyze_pages(self.nlp_loader(), [text], batch_size=1)[0]
+        result["page"] = page["page"]
+        job.streamed_results.append(result)
+        clauses = segment_clauses([text])
+        for clause in clauses:
+            clause.update(page_start=page["page"], page_end=page["page"])
+        return dict(result, clauses=clauses)
+
+    def _executor(self, stage: str, cfg: StageConfig) -> Optional[ThreadPoolExecutor]:
+        if cfg.concurrency <= 1:
+            return None
+        with self._executors_lock:
+            if stage not in self._executors:
+                self._executors[stage] = ThreadPoolExecutor(cfg.concurrency, thread_name_prefix=f"pipeline-{stage}")
+            return self._executors[stage]
+
+    def _cache_key(self, job: PipelineJob, stage: str) -> tuple:
+        settings = (
+            self.ocr_missing_text and self.stages["ocr"].enabled,
+            self.ocr_embedded_images and self.stages["ocr"].enabled,
+            self.docx_page_chars,
+            tuple(sorted(self.spreadsheet_limits.items())),
+        )
+        versions = (
+            STAGE_VERSIONS["extract"],
+            STAGE_VERSIONS["ocr"],
+            f"{STAGE_VERSIONS['analyze']}/{job.profile}" if stage == "analyze" else "",
+        )
+        return (job.sha256, stage, versions, settings)
+
+    def _check_text(self, job: PipelineJob) -> None:
+        if self.require_text and not any(t.strip() for t in job.page_texts):
+            raise EmptyDocument("Failed to extract text from file.")
+
+    # ---------------------- STAGES ----------------------
+    def _ingest(self, job: PipelineJob, cfg: StageConfig) -> None:
+        job.file_type = detect_file_type(job.filename)
+        if job.file_type == "unknown":
+            if not self.accept_text_files:
+                raise UnsupportedFileType("Unsupported file type")
+            job.file_type = "text"
+        job.sha256 = content_sha256(job.source)
+
+    def _extract(self, job: PipelineJob, cfg: StageConfig) -> None:
+        cached = self.cache.get(self._cache_key(job, "pages"))
+        if cached is not None:
+            job.pages = cached
+            job.cache_hits.append("extract")
+            return
+
+        ocr_enabled = self.stages["ocr"].enabled
+        job.budget = MemoryBudget(self.memory_budget_bytes)
+        wait = BUDGET_WAIT_SECONDS if self.stages["ocr"].concurrency > 1 else 0.0
+        if job.file_type == "pdf":
+            job.units = iter_pdf_units(
+                job.source,
+                ocr_missing_text=ocr_enabled and self.ocr_missing_text,
+                ocr_embedded_images=ocr_enabled and self.ocr_embedded_images,
+                budget=job.budget,
+                budget_wait=wait,
+            )
+        elif job.file_type in IMAGE_TYPES:
+            job.units = iter_image_units(job.source, budget=job.budget) if ocr_enabled else iter(())
+        elif job.file_type == "docx":
+            job.units = iter_docx_pages(job.source, page_chars=self.docx_page_chars)
+        elif job.file_type in ("xls", "xlsx"):
+            job.units = iter_spreadsheet_pages(job.source, xls=job.file_type == "xls", **self.spreadsheet_limits)
+        else:
+            job.units = iter([{"page": 1, "text": _decode_text(job.source)}])
+
+        if not ocr_enabled:
+            for _ in self.iter_pages(job):
+                pass
+
+    def _ocr_unit(self, job: PipelineJob, unit: Dict[str, Any]) -> Dict[str, Any]:
+        if unit.get("raster") is None and not unit.get("images"):
+            return unit
+        if self.raster_sink is not None and unit.get("raster") is not None and job.sha256:
+            try:
+                self.raster_sink(job.sha256, unit["page"], unit["raster"])
+            except Exception as e:
+                print(f"⚠️ Could not keep page {unit['page']} raster: {e}")
+        engine = get_ocr_engine()
+        deadline = job.stage_deadline or job.deadline
+
+        def ocr(image):
+            # checked per image; ocr_unit still closes the images and frees their budget
+            if deadline is not None:
+                deadline.check("ocr")
+            return engine.image_to_string(image)
+
+        return ocr_unit(unit, ocr, job.budget)  # type: ignore[arg-type]
+
+    def _ocr(self, job: PipelineJob, cfg: StageConfig) -> None:
+        # extraction is lazy: pages are decoded here, `concurrency` at a time
+        for _ in self.iter_pages(job):
+            pass
+
+    def _analyze(self, job: PipelineJob, cfg: StageConfig) -> None:
+        # jobs built from stored text (reprocessing) have no content hash
+        key = self._cache_key(job, "analyze") if job.sha256 else None
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            job.results_summary, job.analytics, job.page_results, job.clauses = cached
+            job.cache_hits.append("analyze")
+        else:
+            page_texts = job.page_texts
+            if job.profile == "triage":
+                job.results_summary, job.analytics = analyze_text_triage(self.light_nlp_loader(), "\n".join(page_texts))
+                job.page_results = analyze_pages_triage(page_texts)
+            else:
+                nlp = self.nlp_loader()
+                self.checkpoint(job, "analyze")
+                job.results_summary, job.analytics = analyze_text_overall(nlp, "\n".join(page_texts))
+                if len(job.streamed_results) == len(page_texts):
+                    job.page_results = [dict(r, page=i) for i, r in enumerate(job.streamed_results, start=1)]
+                else:
+                    job.page_results = []
+                    # one batch at a time so a cancelled job stops between batches
+                    for i in range(0, len(page_texts), cfg.batch_size):
+                        self.checkpoint(job, "analyze")
+                        batch = analyze_pages(nlp, page_texts[i:i + cfg.batch_size], batch_size=cfg.batch_size)
+                        job.page_results.extend(dict(r, page=i + r["page"]) for r in batch)
+            self.checkpoint(job, "analyze")
+            job.clauses = segment_clauses(page_texts)
+            if key:
+                self.cache.put(key, (job.results_summary, job.analytics, job.page_results, job.clauses))
+        job.analytics["file_type"] = job.file_type
+        job.analytics["total_pages"] = len(job.pages)
+        job.analytics["analysis_profile"] = job.profile
+
+    def _embed(self, job: PipelineJob, cfg: StageConfig) -> None:
+        text = job.full_text
+        job.minhash = minhash(text)
+        if self.embedder:
+            self.checkpoint(job, "embed")
+            job.vector = self.embedder([text])[0] if text else []
+
+    def _verify(self, job: PipelineJob, cfg: StageConfig) -> None:
+        analytics = job.analytics
+        verif = None
+        if job.profile == "triage":
+            analytics["chart_data"] = chart_data(analytics)
+            return
+        if self.classifier:
+            try:
+                verif = self.classifier(job.full_text, analytics)
+            except Exception as e:
+                print(f"⚠️ Local legality classifier failed: {e}")
+        if verif is None and self.verifier and job.profile == "full":
+            try:
+                verif = dict(self.verifier(job.full_text, job.stage_deadline or job.deadline))
+                verif.setdefault("verified_by", "openai")
+            except RequestCancelled:
+                raise
+            except Exception as e:
+                verif = {"marker": "❌ UNVERIFIED", "ai_confidence": None, "raw": f"Error:{e}", "verified_by": "openai"}
+        if verif is None and job.profile == "standard":
+            # no classifier, or its score fell in the uncertain band: say so, so the
+            # document can be told apart from verified ones and promoted later
+            verif = {"marker": STANDARD_UNVERIFIED_MARKER, "ai_confidence": None, "raw": "", "verified_by": "skipped"}
+        if verif is not None:
+            analytics["verified_marker"] = verif.get("marker", "❌ UNVERIFIED")
+            analytics["ai_confidence"] = verif.get("ai_confidence", None)
+            analytics["openai_raw"] = (verif.get("raw") or "")[:2000]
+            analytics["verified_by"] = verif.get("verified_by", "openai")
+
+        analytics["chart_data"] = chart_data(analytics)
+
+    def _persist(self, job: PipelineJob, cfg: StageConfig) -> None:
+        if self.persister:
+            job.doc_id = self.persister(job)
+
+
+def chart_data(analytics: Dict[str, Any]) -> Dict[str, Any]:
+    """NLP legality score vs AI confidence, as shown by the frontend chart."""
+    nlp_score = analytics.get("legality_score", 0)
+    ai_conf = analytics.get("ai_confidence")
+    return {
+        "labels": ["NLP Legality Score", "AI Confidence"],
+        "values": [nlp_score, ai_conf if ai_conf is not None else nlp_score],
+        "combined_confidence": ai_conf if isinstance(ai_conf, int) else nlp_score,
+    }
+
+
+def _decode_text(data: Union[str, bytes]) -> str:
+    if not isinstance(data, (bytes, bytearray)):
+        with open(data, "rb") as f:
+            data = f.read()
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
@@ -0,0 +1,211 @@
+# src/prefork.py
+"""
+Pre-fork multi-worker serving.
+
+`uvicorn --workers N` starts N fresh interpreters, each loading spaCy, the
+legality classifier and any transformers pipelines on its own. Here the
+parent process loads those read-only models once (PREFORK_PRELOAD), binds
+the listening socket, freezes the garbage collector's view of everything
+loaded so far (gc.freeze(), so collections in the workers do not write to
+the shared pages) and then forks the workers. Each worker imports the app
+(main.py finds the models already cached by src.analysis.load_nlp / the
+classifier loader), and serves the inherited socket with uvicorn; model
+memory stays shared copy-on-write.
+
+Nothing that owns threads, sockets or event loops (MongoClient, the
+LLMClient loop, the OCR worker pool) is created before the fork; those are
+made per worker when the app module is imported. Vectors are served from
+src.vector_index (a memory-mapped file, one writer at a time), which all
+workers read through the shared page cache; the BM25 index
+(src.lexical_index) is shared the same way, each worker catching up on the
+others' journal entries before it searches.
+
+The parent restarts workers that die and, every --report-every seconds,
+prints each worker's RSS / PSS and the total PSS (the real memory of the
+whole group; RSS counts shared pages once per worker).
+
+Run from the LegalDOCAI folder:
+    python -m src.prefork main:app --workers 4 --port 8000
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Callable, Dict, List
+
+from src.metrics import process_memory
+
+DEFAULT_PRELOAD = "spacy,classifier"
+
+
+def _preload_spacy() -> None:
+    from src.analysis import load_light_nlp, load_nlp
+
+    load_nlp()
+    load_light_nlp()
+
+
+def _preload_classifier() -> None:
+    from config import LEGALITY_LOCAL_ENABLED, LEGALITY_MODEL_PATH
+    from src.legality_classifier import load_classifier
+
+    if LEGALITY_LOCAL_ENABLED:
+        load_classifier(LEGALITY_MODEL_PATH)
+
+
+def _preload_summarizer() -> None:
+    import backend.app.summarizer  # noqa: F401  (pipeline built at import)
+
+
+def _preload_transformers() -> None:
+    import src.nlp_model  # noqa: F401  (summarizer + QA pipelines built at import)
+
+
+PRELOADERS: Dict[str, Callable[[], None]] = {
+    "spacy": _preload_spacy,
+    "classifier": _preload_classifier,
+    "summarizer": _preload_summarizer,
+    "transformers": _preload_transformers,
+}
+
+
+def preload(names: List[str]) -> None:
+    """Load the named models into this (parent) process."""
+    for name in names:
+        if name not in PRELOADERS:
+            raise ValueError(f"Unknown preload '{name}' (choose from {', '.join(PRELOADERS)})")
+        t0 = time.perf_counter()
+        try:
+            PRELOADERS[name]()
+        except Exception as e:
+            print(f"⚠️ Could not preload {name}: {e}")
+            continue
+        print(f"✅ Preloaded {name} in {time.perf_counter() - t0:.1f}s")
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve(app: str, sock: socket.socket, worker: int, log_level: str) -> None:
+    """Worker body: import the app and serve the inherited socket until told to stop."""
+    import uvicorn
+
+    os.environ["PREFORK_WORKER"] = str(worker)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    server = uvicorn.Server(uvicorn.Config(app, log_level=log_level, lifespan="on"))
+    server.run(sockets=[sock])
+
+
+def memory_report(workers: Dict[int, int]) -> Dict[str, object]:
+    """Per-worker memory (src.metrics.process_memory) of {worker: pid}, plus parent and totals."""
+    report = {"parent": process_memory(os.getpid()), "workers": {}}
+    for worker, pid in sorted(workers.items()):
+        report["workers"][worker] = process_memory(pid)
+    rows = [report["parent"]] + list(report["workers"].values())
+    report["total_rss_mib"] = round(sum(r.get("rss_mib", 0) for r in rows), 1)
+    report["total_pss_mib"] = round(sum(r.get("pss_mib", 0) for r in rows), 1)
+    return report
+
+
+def print_report(report: Dict[str, object]) -> None:
+    for worker, mem in report["workers"].items():
+        print(f"   worker {worker} pid {mem.get('pid')}: rss {mem.get('rss_mib', 0):7.1f} MiB  "
+              f"pss {mem.get('pss_mib', 0):7.1f} MiB  shared {mem.get('shared_mib', 0):7.1f} MiB")
+    print(f"   total: rss {report['total_rss_mib']:.1f} MiB, pss {report['total_pss_mib']:.1f} MiB "
+          f"(parent pss {report['parent'].get('pss_mib', 0):.1f} MiB)")
+
+
+class Supervisor:
+    """Forks `workers` processes serving `app` on one socket and keeps them running."""
+
+    def __init__(self, app: str, sock: socket.socket, workers: int, log_level: str = "info"):
+        self.app = app
+        self.sock = sock
+        self.n_workers = workers
+        self.log_level = log_level
+        self.workers: Dict[int, int] = {}  # worker number -> pid
+        self.stopping = False
+
+    def spawn(self, worker: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _serve(self.app, self.sock, worker, self.log_level)
+            except BaseException as e:
+                print(f"❌ Worker {worker} failed: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[worker] = pid
+
+    def stop(self, *_) -> None:
+        self.stopping = True
+        for pid in self.workers.values():
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self, report_every: float = 0.0) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for worker in range(self.n_workers):
+            self.spawn(worker)
+        print(f"✅ {self.n_workers} workers serving {self.app} (parent pid {os.getpid()})")
+        next_report = time.monotonic() + report_every if report_every else None
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                worker = next((w for w, p in self.workers.items() if p == pid), None)
+                if worker is not None:
+                    del self.workers[worker]
+                    if not self.stopping:
+                        print(f"⚠️ Worker {worker} (pid {pid}) exited with status {status}; restarting")
+                        self.spawn(worker)
+                continue
+            if next_report and time.monotonic() >= next_report:
+                print_report(memory_report(self.workers))
+                next_report = time.monotonic() + report_every
+            time.sleep(0.2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve an ASGI app from pre-forked workers sharing preloaded models")
+    parser.add_argument("app", nargs="?", default="main:app")
+    parser.add_argument("--host", default=os.getenv("PREFORK_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PREFORK_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("PREFORK_WORKERS", "2")))
+    parser.add_argument("--preload", default=os.getenv("PREFORK_PRELOAD", DEFAULT_PRELOAD),
+                        help=f"comma-separated: {', '.join(PRELOADERS)}")
+    parser.add_argument("--report-every", type=float, default=float(os.getenv("PREFORK_REPORT_SECONDS", "0")),
+                        help="seconds between per-worker memory reports (0 = off)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        sys.exit("Pre-fork serving needs os.fork (Linux/macOS); use uvicorn --workers instead.")
+    sys.path.insert(0, os.getcwd())
+    preload([n.strip() for n in args.preload.split(",") if n.strip()])
+    sock = bind_socket(args.host, args.port)
+    # everything loaded so far is shared with the workers; keep the collector off those pages
+    gc.collect()
+    gc.freeze()
+    Supervisor(args.app, sock, args.workers, args.log_level).run(args.report_every)
+
+
+if __name__ == "__main__":
+    main()
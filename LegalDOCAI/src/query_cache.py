@@ -0,0 +1,92 @@
+# src/query_cache.py
+"""
+Size-capped LRU caches for search: query embeddings and result lists.
+
+ByteLRUCache keeps entries in least-recently-used order and evicts from
+the cold end until the estimated size of what it holds (approx_bytes:
+sys.getsizeof over lists, tuples, dicts and their contents) fits
+max_bytes. Values larger than the whole cap are not stored. Hits, misses
+and evictions are counted in src.metrics as search_cache.<name>.<event>
+and returned with the hit rate by stats().
+
+Callers make invalidation part of the key: search results are keyed on
+the index generation, so once a document is added the old entries can
+never be hit again and simply age out.
+"""
+import copy
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+
+from src import metrics
+
+_MISSING = object()
+
+
+def approx_bytes(value: Any) -> int:
+    """Rough in-memory size of a JSON-like value, containers included."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approx_bytes(k) + approx_bytes(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(approx_bytes(v) for v in value)
+    return size
+
+
+class ByteLRUCache:
+    """Thread-safe LRU bounded by the approximate byte size of keys + values."""
+
+    def __init__(self, name: str, max_bytes: int):
+        self.name = name
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _count(self, event: str) -> None:
+        self._counts[event] += 1
+        metrics.incr(f"search_cache.{self.name}.{event}")
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self._count("misses")
+                return default
+            self._data.move_to_end(key)
+            self._count("hits")
+            return copy.deepcopy(entry[0])
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = approx_bytes(key) + approx_bytes(value)
+        if size > self.max_bytes:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._bytes -= evicted
+                self._count("evictions")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counts["hits"] + self._counts["misses"]
+            return {
+                **self._counts,
+                "hit_rate": round(self._counts["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
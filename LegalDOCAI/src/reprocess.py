@@ -0,0 +1,230 @@
+# src/reprocess.py
+"""
+Background backfill of stale analytics.
+
+Every stored document carries "pipeline_version" ({stage: version}, see
+src.pipeline.STAGE_VERSIONS). ReprocessJob finds documents whose analyze,
+embed or verify version differs from the running code and re-runs only
+those stages, starting from the page text already in the page store (legacy
+records that still hold text in results[].text are migrated to it), so no
+file is re-read or re-OCRed. Documents are handled in batches written
+with one bulk_write each, at most `max_docs_per_second`, in a daemon
+thread that reports progress and ETA through status().
+
+When analyze is re-run, the document's entity records (EntityIndex) and
+segmented clauses (ClauseStore) are rebuilt too, if those are given.
+
+With `profile` set the job promotes instead: documents analyzed with a
+lower analysis profile (e.g. triage imports) get analyze and verify re-run
+with that profile, again from stored page text only. Documents keep their
+own profile when they are merely stale.
+
+Documents whose extract/ocr version changed cannot be refreshed from
+stored text; they are counted as `needs_reupload` and left untouched.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pymongo import UpdateOne
+
+from src.near_duplicates import signature_fields
+from src.page_store import PageStore
+from src.pipeline import ANALYSIS_PROFILES, DEFAULT_PROFILE, STAGE_VERSIONS, Pipeline, PipelineJob, chart_data
+
+REPROCESSABLE_STAGES = ("analyze", "embed", "verify")
+TEXT_STAGES = ("extract", "ocr")
+VERIFY_FIELDS = ("verified_marker", "ai_confidence", "openai_raw", "verified_by")
+
+
+def stale_filter(stages: Sequence[str] = REPROCESSABLE_STAGES) -> Dict[str, Any]:
+    """Mongo filter matching documents with an outdated version of any stage."""
+    return {"$or": [{f"pipeline_version.{s}": {"$ne": STAGE_VERSIONS[s]}} for s in stages]}
+
+
+class ReprocessJob:
+    """One backfill run over `collection`; start() runs it in a background thread."""
+
+    def __init__(
+        self,
+        collection,
+        page_store: PageStore,
+        pipeline: Pipeline,
+        entity_index: Optional[Any] = None,
+        clause_store: Optional[Any] = None,
+        batch_size: int = 50,
+        max_docs_per_second: float = 0.0,
+        stages: Sequence[str] = REPROCESSABLE_STAGES,
+        profile: Optional[str] = None,
+        query: Optional[Dict[str, Any]] = None,
+    ):
+        if profile is not None and profile not in ANALYSIS_PROFILES:
+            raise ValueError(f"Unknown analysis profile: {profile}")
+        self.collection = collection
+        self.page_store = page_store
+        self.pipeline = pipeline
+        self.entity_index = entity_index
+        self.clause_store = clause_store
+        self.batch_size = max(1, batch_size)
+        self.max_docs_per_second = max_docs_per_second
+        self.stages = tuple(stages)
+        self.profile = profile
+        self.query = query
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._status: Dict[str, Any] = {
+            "state": "pending",
+            "total": 0,
+            "done": 0,
+            "updated": 0,
+            "needs_reupload": 0,
+            "failed": 0,
+            "errors": [],
+            "started_at": None,
+            "finished_at": None,
+        }
+
+    # ---------------------- CONTROL ----------------------
+    def start(self) -> "ReprocessJob":
+        self._thread = threading.Thread(target=self.run, name="reprocess", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self) -> Dict[str, Any]:
+        """Progress snapshot with processing rate (docs/s) and ETA (seconds)."""
+        with self._lock:
+            status = dict(self._status, errors=list(self._status["errors"]))
+        started = status["started_at"]
+        elapsed = ((status["finished_at"] or time.time()) - started) if started else 0.0
+        rate = status["done"] / elapsed if elapsed > 0 else 0.0
+        remaining = status["total"] - status["done"]
+        status["elapsed_seconds"] = round(elapsed, 1)
+        status["docs_per_second"] = round(rate, 2)
+        status["eta_seconds"] = round(remaining / rate, 1) if rate > 0 and status["state"] == "running" else None
+        status["versions"] = {s: STAGE_VERSIONS[s] for s in self.stages}
+        status["profile"] = self.profile
+        return status
+
+    def _update(self, **counts: int) -> None:
+        with self._lock:
+            for key, value in counts.items():
+                self._status[key] += value
+
+    # ---------------------- RUN ----------------------
+    def selection(self) -> Dict[str, Any]:
+        """Mongo filter of the documents this job will process."""
+        if self.profile:
+            lower = list(ANALYSIS_PROFILES[:ANALYSIS_PROFILES.index(self.profile)])
+            selected = {"analytics.analysis_profile": {"$in": lower}}
+        else:
+            selected = stale_filter(self.stages)
+        return {"$and": [selected, self.query]} if self.query else selected
+
+    def run(self) -> Dict[str, Any]:
+        ids = [d["_id"] for d in self.collection.find(self.selection(), {"_id": 1})]
+        with self._lock:
+            self._status.update(state="running", total=len(ids), started_at=time.time())
+        try:
+            for i in range(0, len(ids), self.batch_size):
+                if self._cancel.is_set():
+                    break
+                t0 = time.perf_counter()
+                self._run_batch(ids[i:i + self.batch_size])
+                self._throttle(min(self.batch_size, len(ids) - i), time.perf_counter() - t0)
+            state = "cancelled" if self._cancel.is_set() else "done"
+        except Exception as e:
+            print(f"⚠️ Reprocessing stopped: {e}")
+            with self._lock:
+                self._status["errors"].append(str(e))
+            state = "failed"
+        with self._lock:
+            self._status.update(state=state, finished_at=time.time())
+        return self.status()
+
+    def _throttle(self, n_docs: int, spent: float) -> None:
+        if self.max_docs_per_second > 0:
+            wait = n_docs / self.max_docs_per_second - spent
+            if wait > 0:
+                self._cancel.wait(wait)
+
+    def _run_batch(self, ids: List[Any]) -> None:
+        ops: List[UpdateOne] = []
+        failed = skipped = 0
+        for rec in self.collection.find({"_id": {"$in": ids}}):
+            try:
+                op = self._reprocess(rec)
+            except Exception as e:
+                failed += 1
+                with self._lock:
+                    if len(self._status["errors"]) < 20:
+                        self._status["errors"].append(f"{rec.get('doc_id')}: {e}")
+                continue
+            if op is None:
+                skipped += 1
+            else:
+                ops.append(op)
+        if ops:
+            self.collection.bulk_write(ops, ordered=False)
+        self._update(done=len(ids), updated=len(ops), needs_reupload=skipped, failed=failed)
+
+    def _load_pages(self, rec: Dict[str, Any]) -> Tuple[List[str], bool]:
+        """(page texts, migrated_from_legacy) for a stored document."""
+        doc_id = rec.get("doc_id")
+        pages = self.page_store.get_pages(doc_id) if doc_id else []
+        if pages:
+            return [str(p["text"]) for p in pages], False
+        return [r.get("text") or "" for r in rec.get("results") or []], True
+
+    def _reprocess(self, rec: Dict[str, Any]) -> Optional[UpdateOne]:
+        stored = rec.get("pipeline_version") or {}
+        if any(s in stored and stored[s] != STAGE_VERSIONS[s] for s in TEXT_STAGES):
+            return None
+        promote = ("analyze", "verify") if self.profile else ()
+        changed = [s for s in self.stages if stored.get(s) != STAGE_VERSIONS[s] or s in promote]
+        old_analytics = dict(rec.get("analytics") or {})
+
+        texts, legacy = self._load_pages(rec)
+        profile = self.profile or old_analytics.get("analysis_profile", DEFAULT_PROFILE)
+        job = PipelineJob(rec.get("filename") or "", b"", profile=profile)
+        job.file_type = old_analytics.get("file_type", "unknown")
+        job.pages = [{"page": i, "text": t, "ocr_texts": []} for i, t in enumerate(texts, start=1)]
+        job.analytics = old_analytics
+        job.page_results = rec.get("results") or []
+
+        if "analyze" in changed:
+            self.pipeline.run(job, ("analyze",))
+            if self.entity_index is not None and rec.get("doc_id"):
+                self.entity_index.index_document(rec["doc_id"], job.results_summary)
+            if self.clause_store is not None and rec.get("doc_id"):
+                self.clause_store.put_clauses(rec["doc_id"], job.clauses, rec.get("filename"))
+            for field in VERIFY_FIELDS:
+                if field in old_analytics and "verify" not in changed:
+                    job.analytics[field] = old_analytics[field]
+        if "verify" in changed:
+            self.pipeline.run(job, ("verify",))
+        else:
+            job.analytics["chart_data"] = chart_data(job.analytics)
+        if "embed" in changed:
+            self.pipeline.run(job, ("embed",))
+
+        if legacy and rec.get("doc_id"):
+            self.page_store.put_pages(rec["doc_id"], enumerate(texts, start=1))
+        update = {
+            "analytics": job.analytics,
+            "results": [{k: v for k, v in r.items() if k != "text"} for r in job.page_results],
+        }
+        if "embed" in changed:
+            update.update(signature_fields(job.minhash))
+            if job.vector is not None:
+                update["vector"] = job.vector
+        for stage in changed:
+            update[f"pipeline_version.{stage}"] = STAGE_VERSIONS[stage]
+        return UpdateOne({"_id": rec["_id"]}, {"$set": update})
@@ -0,0 +1,137 @@
+# src/responses.py
+"""
+Response shaping, encoding and compression for large analysis payloads.
+
+Slim by default: each endpoint names the heavy fields it leaves out
+(page text of /upload, per-page results of /history, ...) as dotted paths
+through dicts and lists ("results.text" drops "text" from every page
+result). Clients ask for them back with ?fields=results.text,timings, or
+?fields=* for the complete payload.
+
+The remaining payload is encoded with orjson when installed (else the
+standard json module), or as MessagePack when the request's Accept header
+asks for application/msgpack (or application/x-msgpack) and msgpack is
+installed. Bodies of at least `compress_min_bytes` are compressed with br
+(brotli package) or gzip, whichever the Accept-Encoding header prefers and
+is available.
+"""
+import gzip
+import json
+from typing import Any, Iterable, Optional, Set, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+ALL_FIELDS = "*"
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+DEFAULT_COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def parse_fields(spec: Optional[str]) -> Set[str]:
+    return {f.strip() for f in (spec or "").split(",") if f.strip()}
+
+
+def _drop(value: Any, path: Tuple[str, ...]) -> Any:
+    """Copy of value without the dotted path (applied to every item of lists on the way)."""
+    if isinstance(value, list):
+        return [_drop(v, path) for v in value]
+    if not isinstance(value, dict) or path[0] not in value:
+        return value
+    if len(path) == 1:
+        return {k: v for k, v in value.items() if k != path[0]}
+    return {**value, path[0]: _drop(value[path[0]], path[1:])}
+
+
+def slim(payload: Any, excluded: Iterable[str], fields: Set[str]) -> Any:
+    """payload without the `excluded` paths, except those (or their parents) requested in `fields`."""
+    if ALL_FIELDS in fields:
+        return payload
+    for path in excluded:
+        parts = tuple(path.split("."))
+        if any(".".join(parts[:i]) in fields for i in range(1, len(parts) + 1)):
+            continue
+        payload = _drop(payload, parts)
+    return payload
+
+
+def dumps_json(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, default=str, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=str, ensure_ascii=False).encode("utf-8")
+
+
+def dumps_msgpack(payload: Any) -> bytes:
+    return msgpack.packb(payload, default=str, use_bin_type=True)
+
+
+def _accepts(header: str, value: str) -> float:
+    """q-value the header gives `value` (0 when absent)."""
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() in (value, "*"):
+            q = params.strip()
+            if q.startswith("q="):
+                try:
+                    return float(q[2:])
+                except ValueError:
+                    return 0.0
+            return 1.0 if name.strip() == value else 0.001
+    return 0.0
+
+
+def negotiate(request: Optional[Request]) -> Tuple[str, Optional[str]]:
+    """(media type, content encoding or None) to answer `request` with."""
+    accept = request.headers.get("accept", "") if request is not None else ""
+    encodings = request.headers.get("accept-encoding", "") if request is not None else ""
+    media_type = "application/json"
+    if msgpack is not None and any(t in accept for t in MSGPACK_TYPES):
+        media_type = "application/msgpack"
+    candidates = [("br", _accepts(encodings, "br") if brotli is not None else 0.0),
+                  ("gzip", _accepts(encodings, "gzip"))]
+    encoding, q = max(candidates, key=lambda c: c[1])
+    return media_type, encoding if q > 0 else None
+
+
+def encode(payload: Any, media_type: str, encoding: Optional[str],
+           compress_min_bytes: int = DEFAULT_COMPRESS_MIN_BYTES) -> Tuple[bytes, Optional[str]]:
+    """(body, content encoding actually applied)"""
+    body = dumps_msgpack(payload) if media_type == "application/msgpack" else dumps_json(payload)
+    if encoding is None or len(body) < compress_min_bytes:
+        return body, None
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY), "br"
+    return gzip.compress(body, compresslevel=GZIP_LEVEL), "gzip"
+
+
+def negotiated_response(
+    request: Optional[Request],
+    payload: Any,
+    excluded: Iterable[str] = (),
+    fields: Optional[str] = None,
+    status_code: int = 200,
+    compress_min_bytes: int = DEFAULT_COMPRESS_MIN_BYTES,
+) -> Response:
+    """Slimmed payload in the format and encoding the client asked for."""
+    media_type, encoding = negotiate(request)
+    body, applied = encode(slim(payload, excluded, parse_fields(fields)), media_type, encoding, compress_min_bytes)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if applied:
+        headers["Content-Encoding"] = applied
+    return Response(body, status_code=status_code, media_type=media_type, headers=headers)
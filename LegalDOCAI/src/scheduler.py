@@ -0,0 +1,193 @@
+# src/scheduler.py
+"""
+Admission scheduler for ingestion work: priority classes + weighted fair
+queuing between tenants.
+
+Every upload asks for one of `slots` execution slots before it runs,
+tagged with a priority class and a tenant key:
+
+    interactive   single uploads from reviewers; always admitted first
+    bulk          batch / archive imports; may hold at most `class_slots`
+                  ["bulk"] slots, so some capacity is always left for
+                  interactive work
+
+Classes are served in strict priority order. Within a class, tenants
+share the class's slots by weighted fair queuing: each request gets a
+virtual finish time start + cost / weight (start = the later of the class's
+virtual clock and the tenant's previous finish), and the smallest finish
+time is admitted next. A tenant pushing 500 files therefore cannot starve
+another tenant's 5; with weights 2:1 the first gets twice the share.
+`cost` is the caller's estimate of the work (main uses the file size).
+
+The scheduler lives on the event loop (no threads): acquire() waits on a
+future, polling the request's Deadline so a client that disconnects or
+runs out of budget while queued leaves the queue (RequestCancelled /
+DeadlineExceeded, raised by Deadline.check). Queue depth and running
+slots per class are kept as src.metrics gauges
+(ingest.queue_depth.<class>, ingest.running.<class>) and every
+admission records ingest.wait_seconds.<class>.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src import metrics
+
+PRIORITY_CLASSES = ("interactive", "bulk")
+DEFAULT_TENANT = "default"
+DEADLINE_POLL_SECONDS = 0.25
+
+
+class Ticket:
+    """One queued or admitted request."""
+
+    __slots__ = ("priority", "tenant", "cost", "start", "finish", "enqueued", "future", "admitted", "released")
+
+    def __init__(self, priority: str, tenant: str, cost: float, future: "asyncio.Future"):
+        self.priority = priority
+        self.tenant = tenant
+        self.cost = cost
+        self.start = self.finish = 0.0
+        self.enqueued = time.perf_counter()
+        self.future = future
+        self.admitted = False
+        self.released = False
+
+
+class _ClassQueue:
+    """Weighted fair queue of one priority class."""
+
+    def __init__(self):
+        self.virtual_time = 0.0
+        self.last_finish: Dict[str, float] = {}
+        self.heap: List[Tuple[float, int, Ticket]] = []
+        self.waiting = 0
+        self.running = 0
+
+
+class FairScheduler:
+    """`slots` concurrent admissions, strict priority across classes, WFQ across tenants."""
+
+    def __init__(
+        self,
+        slots: int,
+        class_slots: Optional[Dict[str, int]] = None,
+        tenant_weights: Optional[Dict[str, float]] = None,
+        classes: Sequence[str] = PRIORITY_CLASSES,
+    ):
+        self.slots = max(1, slots)
+        self.classes = tuple(classes)
+        self.class_slots = {c: min(self.slots, max(1, (class_slots or {}).get(c, self.slots))) for c in self.classes}
+        self.tenant_weights = dict(tenant_weights or {})
+        self._queues = {c: _ClassQueue() for c in self.classes}
+        self._seq = itertools.count()
+        self.running = 0
+
+    def weight(self, tenant: str) -> float:
+        return max(1e-6, float(self.tenant_weights.get(tenant, 1.0)))
+
+    # ---------------------- QUEUEING ----------------------
+    async def acquire(self, priority: str, tenant: str = DEFAULT_TENANT, cost: float = 1.0, deadline=None) -> Ticket:
+        """Wait until admitted; the returned ticket must be passed to release()."""
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority class '{priority}' (choose from {', '.join(self.classes)})")
+        ticket = Ticket(priority, tenant or DEFAULT_TENANT, max(cost, 1e-6), asyncio.get_running_loop().create_future())
+        queue = self._queues[priority]
+        ticket.start = max(queue.virtual_time, queue.last_finish.get(ticket.tenant, 0.0))
+        ticket.finish = ticket.start + ticket.cost / self.weight(ticket.tenant)
+        queue.last_finish[ticket.tenant] = ticket.finish
+        heapq.heappush(queue.heap, (ticket.finish, next(self._seq), ticket))
+        queue.waiting += 1
+        self._dispatch()
+        try:
+            while not ticket.future.done():
+                if deadline is not None:
+                    deadline.check(f"{priority} queue")
+                    timeout = min(DEADLINE_POLL_SECONDS, deadline.remaining() or DEADLINE_POLL_SECONDS)
+                else:
+                    timeout = None
+                await asyncio.wait({ticket.future}, timeout=timeout)
+            if deadline is not None:
+                deadline.check(f"{priority} queue")  # gave up just as it was admitted
+        except BaseException:
+            self._abandon(ticket)
+            raise
+        return ticket
+
+    def release(self, ticket: Ticket) -> None:
+        if not ticket.admitted or ticket.released:
+            return
+        ticket.released = True
+        self.running -= 1
+        self._queues[ticket.priority].running -= 1
+        self._dispatch()
+
+    def _abandon(self, ticket: Ticket) -> None:
+        """Queued ticket whose request gave up (disconnect, deadline, cancellation)."""
+        if ticket.admitted:
+            self.release(ticket)
+            return
+        if not ticket.future.done():
+            ticket.future.cancel()
+            self._queues[ticket.priority].waiting -= 1
+            metrics.incr(f"ingest.abandoned.{ticket.priority}")
+            self._publish()
+
+    def _dispatch(self) -> None:
+        """Admit queued tickets while slots are free: highest class first, smallest finish time within it."""
+        while self.running < self.slots:
+            ticket = None
+            for name in self.classes:
+                queue = self._queues[name]
+                if queue.running >= self.class_slots[name]:
+                    continue
+                while queue.heap and queue.heap[0][2].future.done():
+                    heapq.heappop(queue.heap)  # abandoned
+                if queue.heap:
+                    ticket = heapq.heappop(queue.heap)[2]
+                    queue.virtual_time = max(queue.virtual_time, ticket.start)
+                    break
+            if ticket is None:
+                break
+            queue = self._queues[ticket.priority]
+            queue.waiting -= 1
+            queue.running += 1
+            self.running += 1
+            ticket.admitted = True
+            ticket.future.set_result(None)
+            metrics.observe(f"ingest.wait_seconds.{ticket.priority}", time.perf_counter() - ticket.enqueued)
+            metrics.incr(f"ingest.admitted.{ticket.priority}")
+        self._publish()
+
+    def _publish(self) -> None:
+        for name, queue in self._queues.items():
+            metrics.gauge(f"ingest.queue_depth.{name}", queue.waiting)
+            metrics.gauge(f"ingest.running.{name}", queue.running)
+
+    # ---------------------- REPORTING ----------------------
+    def stats(self) -> Dict[str, Any]:
+        classes = {}
+        for name, queue in self._queues.items():
+            tenants: Dict[str, int] = {}
+            for _, _, ticket in queue.heap:
+                if not ticket.future.done():
+                    tenants[ticket.tenant] = tenants.get(ticket.tenant, 0) + 1
+            classes[name] = {
+                "queued": queue.waiting,
+                "running": queue.running,
+                "max_slots": self.class_slots[name],
+                "queued_by_tenant": tenants,
+            }
+        return {"slots": self.slots, "running": self.running, "classes": classes, "tenant_weights": self.tenant_weights}
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """"acme=2,globex=0.5" -> {"acme": 2.0, "globex": 0.5}"""
+    weights = {}
+    for part in (spec or "").split(","):
+        tenant, _, weight = part.partition("=")
+        if tenant.strip():
+            weights[tenant.strip()] = float(weight or 1)
+    return weights
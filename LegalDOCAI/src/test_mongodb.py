@@ -1,17 +1,16 @@
-from pymongo import MongoClient
+from dotenv import load_dotenv
 
-# Connect to MongoDB
-# For local MongoDB
-client = MongoClient("mongodb://localhost:27017")
+from src import mongo
 
-# For MongoDB Atlas, use your connection string instead
-# client = MongoClient("mongodb+srv://<username>:<password>@cluster0.mongodb.net/test")
+# Connect through the shared layer (MONGO_URI / DB_NAME from .env; for
+# MongoDB Atlas set MONGO_URI to the mongodb+srv://... connection string)
+load_dotenv()
+layer = mongo.shared()
+print("Server version:", layer.client.server_info()["version"])
+print("Database:", layer.db_name, "| options:", layer.options)
 
-# Create/use database
-db = client['LegalDocAI']
-
-# Create/use collection
-collection = db['documents']
+# Scratch collection, so the test document never shows up in history
+collection = layer.db['connection_test']
 
 # Insert a test document
 test_doc = {
@@ -26,3 +25,5 @@ print("Inserted document ID:", inserted_id)
 print("\nAll documents in collection:")
 for doc in collection.find():
     print(doc)
+
+collection.delete_many({})
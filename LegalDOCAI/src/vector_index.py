@@ -0,0 +1,252 @@
+# src/vector_index.py
+"""
+Memory-mapped vector index shared by every worker process.
+
+Vectors are stored L2-normalized as raw float32 rows in one file and read
+through np.memmap, so N worker processes scan the same page-cache pages
+instead of each holding a copy. Cosine similarity is one matrix-vector
+product over the mapped rows.
+
+    index/
+      manifest.json        {"dim", "count", "ids_bytes", "superseded", "generation", "vectors", "ids"}
+      vectors-<gen>.f32    count x dim float32 rows, append-only
+      ids-<gen>.txt        one doc_id per row, same order
+      writer.lock          flock()ed by the single writer
+
+Writers take an exclusive flock on writer.lock, append rows to both files
+and then atomically replace the manifest with the new row count and ids
+file length (a torn append is cut back to those on the next write). Readers take
+no lock: they only ever look at the first `count` rows of the manifest they
+loaded, which are never rewritten, and re-map when the manifest changes.
+Re-adding a doc_id appends a new row; the last row of an id wins. When
+superseded rows outnumber live ones the writer compacts into a new
+generation of files and swaps the manifest; readers still mapping the old
+files keep a valid view until they notice the new manifest.
+"""
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = "writer.lock"
+
+
+class VectorIndex:
+    """Cosine-similarity index over (doc_id, vector) pairs, memory-mapped from `path`."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._manifest_stat: Optional[Tuple[int, int]] = None
+        self._manifest: Dict[str, object] = {}
+        self._ids: List[str] = []
+        self._row_of: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._live: Optional[np.ndarray] = None
+
+    # ---------------------- READS ----------------------
+    def _refresh(self) -> None:
+        """Re-map the files if another process (or this one) committed rows."""
+        try:
+            st = os.stat(os.path.join(self.path, MANIFEST_FILE))
+        except FileNotFoundError:
+            self._manifest, self._ids, self._row_of, self._matrix, self._live = {}, [], {}, None, None
+            return
+        stat = (st.st_mtime_ns, st.st_size)
+        if stat == self._manifest_stat:
+            return
+        manifest = self._read_manifest()
+        count, dim = int(manifest["count"]), int(manifest["dim"])
+        ids_file = self._file(manifest["ids"])
+        if self._manifest.get("generation") == manifest["generation"] and len(self._ids) <= count:
+            # same files, more rows: read only the ids appended since
+            new = _read_ids(ids_file, self._manifest["ids_bytes"], manifest["ids_bytes"])
+        else:
+            self._ids, self._row_of = [], {}
+            new = _read_ids(ids_file, 0, manifest["ids_bytes"])
+        for doc_id in new:
+            self._row_of[doc_id] = len(self._ids)
+            self._ids.append(doc_id)
+        self._matrix = (
+            np.memmap(self._file(manifest["vectors"]), dtype=np.float32, mode="r", shape=(count, dim))
+            if count else np.zeros((0, dim), dtype=np.float32)
+        )
+        self._live = np.zeros(count, dtype=bool)
+        self._live[list(self._row_of.values())] = True
+        self._manifest, self._manifest_stat = manifest, stat
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._row_of)
+
+    @property
+    def generation(self) -> Tuple[int, int]:
+        """(file generation, committed rows): changes whenever the index does."""
+        with self._lock:
+            self._refresh()
+            return int(self._manifest.get("generation", 0)), int(self._manifest.get("count", 0))
+
+    def search(self, vector: Sequence[float], top_k: int = 5) -> List[Dict[str, object]]:
+        """[{"doc_id", "score"}] by cosine similarity, best first."""
+        with self._lock:
+            self._refresh()
+            matrix, live, ids = self._matrix, self._live, self._ids
+        if matrix is None or not matrix.shape[0]:
+            return []
+        q = _normalize(np.asarray([vector], dtype=np.float32))[0]
+        if q.shape[0] != matrix.shape[1]:
+            return []
+        scores = matrix @ q
+        scores[~live] = -np.inf
+        k = min(top_k, int(live.sum()))
+        if k <= 0:
+            return []
+        hits = np.argpartition(-scores, k - 1)[:k]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [{"doc_id": ids[i], "score": float(scores[i])} for i in hits]
+
+    # ---------------------- WRITES ----------------------
+    def add(self, doc_id: str, vector: Sequence[float]) -> None:
+        self.add_many([(doc_id, vector)])
+
+    def add_many(self, items: Iterable[Tuple[str, Sequence[float]]]) -> int:
+        """Append (or replace) vectors; returns how many were written."""
+        items = [(str(doc_id), v) for doc_id, v in items if v is not None and len(v)]
+        if not items:
+            return 0
+        rows = _normalize(np.asarray([v for _, v in items], dtype=np.float32))
+        with self._writer():
+            self._refresh()  # rows other processes committed before we got the lock
+            manifest = dict(self._manifest) or {
+                "dim": rows.shape[1], "count": 0, "ids_bytes": 0, "superseded": 0,
+                "generation": 1, "vectors": "vectors-1.f32", "ids": "ids-1.txt",
+            }
+            if not manifest["count"]:
+                manifest["dim"] = rows.shape[1]
+            if rows.shape[1] != manifest["dim"]:
+                raise ValueError(f"vector dimension {rows.shape[1]} != index dimension {manifest['dim']}")
+            vectors_file, ids_file = self._file(manifest["vectors"]), self._file(manifest["ids"])
+            _truncate(vectors_file, manifest["count"] * manifest["dim"] * 4)  # drop a torn append
+            _truncate(ids_file, manifest["ids_bytes"])
+            id_bytes = "".join(doc_id + "\n" for doc_id, _ in items).encode("utf-8")
+            with open(vectors_file, "ab") as f:
+                f.write(rows.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(ids_file, "ab") as f:
+                f.write(id_bytes)
+                f.flush()
+                os.fsync(f.fileno())
+            batch = set()
+            for doc_id, _ in items:
+                manifest["superseded"] += doc_id in self._row_of or doc_id in batch
+                batch.add(doc_id)
+            manifest["count"] += len(items)
+            manifest["ids_bytes"] += len(id_bytes)
+            self._write_manifest(manifest)
+            if manifest["superseded"] > manifest["count"] - manifest["superseded"]:
+                self._compact(manifest)
+        return len(items)
+
+    def rebuild(self, items: Iterable[Tuple[str, Sequence[float]]]) -> int:
+        """Replace the whole index with the given vectors (new file generation)."""
+        latest = {str(doc_id): v for doc_id, v in items if v is not None and len(v)}
+        with self._writer():
+            self._refresh()
+            old = self._manifest or None
+            rows = _normalize(np.asarray(list(latest.values()), dtype=np.float32)) if latest else None
+            dim = rows.shape[1] if rows is not None else (old["dim"] if old else 0)
+            self._write_generation(old, list(latest), rows, dim)
+        return len(latest)
+
+    def compact(self) -> None:
+        """Rewrite the live rows only, into a new file generation."""
+        with self._writer():
+            self._refresh()
+            if self._manifest:
+                self._compact(self._manifest)
+
+    def _compact(self, manifest: Dict[str, object]) -> None:
+        count, dim = int(manifest["count"]), int(manifest["dim"])
+        ids = _read_ids(self._file(manifest["ids"]), 0, manifest["ids_bytes"])
+        last = {doc_id: row for row, doc_id in enumerate(ids)}
+        matrix = np.memmap(self._file(manifest["vectors"]), dtype=np.float32, mode="r", shape=(count, dim))
+        rows = np.asarray(matrix[sorted(last.values())]) if last else None
+        order = sorted(last, key=last.get)
+        self._write_generation(manifest, order, rows, dim)
+
+    def _write_generation(self, old, ids: List[str], rows: Optional[np.ndarray], dim: int) -> None:
+        generation = (old["generation"] if old else 0) + 1
+        id_bytes = "".join(doc_id + "\n" for doc_id in ids).encode("utf-8")
+        manifest = {"dim": dim, "count": len(ids), "ids_bytes": len(id_bytes), "superseded": 0,
+                    "generation": generation, "vectors": f"vectors-{generation}.f32", "ids": f"ids-{generation}.txt"}
+        with open(self._file(manifest["vectors"]), "wb") as f:
+            if rows is not None:
+                f.write(rows.astype(np.float32).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self._file(manifest["ids"]), "wb") as f:
+            f.write(id_bytes)
+            f.flush()
+            os.fsync(f.fileno())
+        self._write_manifest(manifest)
+        if old:
+            # readers still mapping the old files keep them alive until they re-map
+            for name in (old["vectors"], old["ids"]):
+                try:
+                    os.remove(self._file(name))
+                except FileNotFoundError:
+                    pass
+
+    # ---------------------- FILES ----------------------
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @contextmanager
+    def _writer(self):
+        """Exclusive writer lock, across threads and processes."""
+        with self._lock, open(self._file(LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+                self._manifest_stat = None  # re-read on next search
+
+    def _read_manifest(self) -> Dict[str, object]:
+        with open(self._file(MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest: Dict[str, object]) -> None:
+        tmp = self._file(MANIFEST_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._file(MANIFEST_FILE))
+
+
+def _normalize(rows: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    return (rows / np.where(norms > 0, norms, 1.0)).astype(np.float32)
+
+
+def _read_ids(path: str, start: int, end: int) -> List[str]:
+    """doc_ids stored in bytes [start, end) of an ids file."""
+    if end <= start:
+        return []
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start).decode("utf-8").splitlines()
+
+
+def _truncate(path: str, size: int) -> None:
+    if os.path.exists(path) and os.path.getsize(path) > size:
+        os.truncate(path, size)